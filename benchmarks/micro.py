@@ -0,0 +1,84 @@
+"""Micro-benchmarks for scoring and story metric extraction over synthetic corpora."""
+
+import time
+from typing import Dict
+
+import numpy as np
+
+from report import summarize
+
+STORY_TEMPLATES = (
+    "Raw materials are mined and refined, releasing {carbon} kg CO2 before production even starts.",
+    "Manufacturing consumes {water} liters water, much of it in regions already facing scarcity.",
+    "Trucks and ships move the product thousands of miles through a complex supply chain.",
+    "Consumers use it daily, and the ongoing energy demand adds to its footprint over time.",
+    "When thrown away it may persist {landfill} years landfill, slowly breaking into fragments.",
+    "Only about {recycle}% recyclable in practice, since collection and sorting are patchy.",
+)
+
+
+def make_metric_corpus(size: int, seed: int = 0) -> np.ndarray:
+    """Synthetic (carbon, water, landfill, recyclability) rows spanning every scoring band."""
+    rng = np.random.default_rng(seed)
+    return np.column_stack([
+        rng.lognormal(0.5, 1.5, size),
+        rng.lognormal(6.5, 1.2, size),
+        rng.lognormal(3.0, 2.0, size),
+        rng.uniform(0, 100, size),
+    ])
+
+
+def make_story_corpus(size: int, seed: int = 0) -> list:
+    """Synthetic multi-paragraph stories mentioning every metric, some with thousands separators."""
+    rng = np.random.default_rng(seed)
+    stories = []
+    for _ in range(size):
+        paragraphs = [
+            template.format(
+                carbon=f"{rng.uniform(0.1, 2000):,.1f}",
+                water=f"{rng.uniform(50, 9000):,.0f}",
+                landfill=f"{rng.uniform(0.1, 900):.1f}",
+                recycle=f"{rng.uniform(5, 95):.0f}",
+            )
+            for template in STORY_TEMPLATES
+        ]
+        stories.append("\n\n".join(paragraphs * 2))
+    return stories
+
+
+def _time_each(fn, rows) -> Dict[str, float]:
+    latencies = []
+    started = time.perf_counter()
+    for row in rows:
+        t0 = time.perf_counter()
+        fn(*row)
+        latencies.append(time.perf_counter() - t0)
+    return summarize(latencies, time.perf_counter() - started)
+
+
+def run_micro(corpus_size: int = 100_000, story_count: int = 10_000, repeats: int = 5) -> Dict[str, Dict[str, float]]:
+    """Benchmark scalar scoring, vectorized scoring and story extraction."""
+    from ecolens.main import calculate_sustainability_score, calculate_environmental_impact_score
+    from ecolens.parsing import extract_metrics_from_story
+    from ecolens.scoring import score_sustainability, score_environmental_impact
+
+    corpus = make_metric_corpus(corpus_size)
+    rows = corpus.tolist()
+    results = {
+        "calculate_sustainability_score": _time_each(calculate_sustainability_score, rows),
+        "calculate_environmental_impact_score": _time_each(calculate_environmental_impact_score, rows),
+    }
+
+    for name, engine in (("score_sustainability[vector]", score_sustainability),
+                         ("score_environmental_impact[vector]", score_environmental_impact)):
+        latencies = []
+        for _ in range(repeats):
+            t0 = time.perf_counter()
+            engine(*corpus.T)
+            latencies.append(time.perf_counter() - t0)
+        # Throughput counts scored items; latencies are per whole-array call
+        results[name] = summarize(latencies, sum(latencies), ops=corpus_size * repeats)
+
+    stories = make_story_corpus(story_count)
+    results["extract_metrics_from_story"] = _time_each(extract_metrics_from_story, [(s,) for s in stories])
+    return results
@@ -0,0 +1,65 @@
+"""Latency summaries, report formatting and baseline comparison for EcoLens benchmarks."""
+
+import json
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+
+def summarize(latencies_s: Sequence[float], wall_s: float, ops: int = None) -> Dict[str, float]:
+    """Throughput and p50/p95/p99 (microseconds) for a list of per-operation latencies."""
+    samples = np.asarray(latencies_s, dtype=np.float64) * 1e6
+    p50, p95, p99 = np.percentile(samples, [50, 95, 99]) if samples.size else (0.0, 0.0, 0.0)
+    ops = len(samples) if ops is None else ops
+    return {
+        "ops": ops,
+        "ops_per_sec": ops / wall_s if wall_s else 0.0,
+        "p50_us": float(p50),
+        "p95_us": float(p95),
+        "p99_us": float(p99),
+    }
+
+
+def format_report(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]] = None) -> str:
+    """Render results as a table, with p99 change against a baseline when given."""
+    header = f"{'benchmark':<40} {'ops/s':>14} {'p50 us':>12} {'p95 us':>12} {'p99 us':>12}"
+    if baseline:
+        header += f" {'p99 vs base':>12}"
+    lines = [header, "-" * len(header)]
+    for name, r in results.items():
+        line = f"{name:<40} {r['ops_per_sec']:>14,.1f} {r['p50_us']:>12,.1f} {r['p95_us']:>12,.1f} {r['p99_us']:>12,.1f}"
+        if baseline:
+            base = baseline.get(name)
+            line += f" {_change(r['p99_us'], base['p99_us']) if base else 'new':>12}"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def _change(current: float, base: float) -> str:
+    if not base:
+        return "n/a"
+    return f"{(current - base) / base:+.1%}"
+
+
+def find_regressions(results, baseline, tolerance: float) -> List[str]:
+    """Names of benchmarks whose p99 grew or throughput dropped by more than tolerance."""
+    regressions = []
+    for name, r in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        if base["p99_us"] and r["p99_us"] > base["p99_us"] * (1 + tolerance):
+            regressions.append(f"{name}: p99 {base['p99_us']:.1f}us -> {r['p99_us']:.1f}us")
+        if base["ops_per_sec"] and r["ops_per_sec"] < base["ops_per_sec"] * (1 - tolerance):
+            regressions.append(f"{name}: ops/s {base['ops_per_sec']:.1f} -> {r['ops_per_sec']:.1f}")
+    return regressions
+
+
+def load_baseline(path: str) -> Dict[str, Dict[str, float]]:
+    with open(path) as f:
+        return json.load(f)["results"]
+
+
+def save_baseline(path: str, results: Dict[str, Dict[str, float]], config: Dict) -> None:
+    with open(path, "w") as f:
+        json.dump({"config": config, "results": results}, f, indent=2, sort_keys=True)
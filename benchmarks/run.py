@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+EcoLens benchmark suite
+
+Runs micro-benchmarks (scoring, story extraction) and an end-to-end
+in-process benchmark of /api/analyze-item against a local OpenAI stub,
+then reports throughput and p50/p95/p99. Results can be saved as a
+baseline and later runs compared against it:
+
+    python benchmarks/run.py --save-baseline benchmarks/baseline.json
+    python benchmarks/run.py --compare benchmarks/baseline.json --tolerance 0.15
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+
+# Add the src directory and this directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+# Isolate the benchmark from real credentials and the server's shared on-disk state
+os.environ["OPENAI_API_KEY"] = "sk-benchmark"
+STATE_DIR = tempfile.mkdtemp(prefix="ecolens-bench-")
+os.environ["ECOLENS_CACHE_PATH"] = os.path.join(STATE_DIR, "cache.sqlite3")
+os.environ["ECOLENS_ANALYTICS_PATH"] = os.path.join(STATE_DIR, "analytics")
+os.environ["ECOLENS_JOBS_PATH"] = os.path.join(STATE_DIR, "jobs.sqlite3")
+os.environ["ECOLENS_POPULARITY_SNAPSHOT_PATH"] = os.path.join(STATE_DIR, "popularity.json")
+
+from report import find_regressions, format_report, load_baseline, save_baseline
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the EcoLens benchmark suite")
+    parser.add_argument("--suite", choices=["all", "micro", "e2e"], default="all")
+    parser.add_argument("--corpus-size", type=int, default=100_000, help="metric rows for scoring benchmarks")
+    parser.add_argument("--stories", type=int, default=10_000, help="stories for the extraction benchmark")
+    parser.add_argument("--requests", type=int, default=500, help="end-to-end requests")
+    parser.add_argument("--concurrency", type=int, default=50, help="concurrent end-to-end requests")
+    parser.add_argument("--unique", type=int, default=None, help="distinct item names (default: all unique)")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="stub upstream latency")
+    parser.add_argument("--jitter-ms", type=float, default=20.0, help="stub upstream latency jitter (std dev)")
+    parser.add_argument("--save-baseline", metavar="PATH", help="write results as a baseline JSON file")
+    parser.add_argument("--compare", metavar="PATH", help="compare against a saved baseline")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="allowed regression before failing")
+    args = parser.parse_args()
+
+    results = {}
+    if args.suite in ("all", "micro"):
+        from micro import run_micro
+        print("Running micro-benchmarks...")
+        results.update(run_micro(args.corpus_size, args.stories))
+    if args.suite in ("all", "e2e"):
+        from e2e import run_e2e
+        print("Running end-to-end benchmark...")
+        results.update(asyncio.run(run_e2e(
+            args.requests, args.concurrency, args.latency_ms, args.jitter_ms, args.unique
+        )))
+
+    baseline = load_baseline(args.compare) if args.compare else None
+    print()
+    print(format_report(results, baseline))
+
+    if args.save_baseline:
+        save_baseline(args.save_baseline, results, vars(args))
+        print(f"\nBaseline saved to {args.save_baseline}")
+
+    if baseline:
+        regressions = find_regressions(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\nRegressions beyond {args.tolerance:.0%}:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print(f"\nNo regressions beyond {args.tolerance:.0%}")
+
+
+if __name__ == "__main__":
+    main()
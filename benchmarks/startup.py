@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+EcoLens cold-start budget check
+
+Imports ``ecolens.main`` the way the Vercel entry point does, in fresh
+interpreters with production settings, and fails if the median import time
+exceeds the budget or if modules that should load lazily were imported:
+
+    python benchmarks/startup.py --runs 7 --budget-ms 600
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+
+# Deferred until the first analysis (openai, httpx), catalog lookup or batch scoring (numpy),
+# or only loaded outside production (dotenv)
+LAZY_MODULES = ("openai", "httpx", "numpy", "dotenv")
+
+PROBE = """
+import json, sys, time
+sys.path.insert(0, {src!r})
+started = time.perf_counter()
+import ecolens.main
+elapsed = time.perf_counter() - started
+print(json.dumps({{"seconds": elapsed, "loaded": [m for m in {lazy!r} if m in sys.modules]}}))
+"""
+
+
+def measure_import(runs: int = 5):
+    """Import ecolens.main in ``runs`` fresh interpreters; return (seconds per run, eagerly loaded modules)."""
+    state_dir = tempfile.mkdtemp(prefix="ecolens-startup-")
+    env = dict(os.environ)
+    env.update({
+        "VERCEL_ENV": "production",
+        "OPENAI_API_KEY": "sk-startup",
+        "ECOLENS_CACHE_PATH": os.path.join(state_dir, "cache.sqlite3"),
+        "ECOLENS_ANALYTICS_PATH": os.path.join(state_dir, "analytics"),
+        "ECOLENS_JOBS_PATH": os.path.join(state_dir, "jobs.sqlite3"),
+        "ECOLENS_POPULARITY_SNAPSHOT_PATH": os.path.join(state_dir, "popularity.json"),
+    })
+    probe = PROBE.format(src=SRC_DIR, lazy=LAZY_MODULES)
+    timings, loaded = [], set()
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", probe], env=env, capture_output=True, text=True, check=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        timings.append(result["seconds"])
+        loaded.update(result["loaded"])
+    return timings, sorted(loaded)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the EcoLens cold-start import budget")
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters to time")
+    parser.add_argument("--budget-ms", type=float, default=float(os.getenv("ECOLENS_STARTUP_BUDGET_MS", "600")),
+                        help="maximum median import time of ecolens.main")
+    args = parser.parse_args()
+
+    timings, loaded = measure_import(args.runs)
+    median_ms = statistics.median(timings) * 1000
+    print(f"import ecolens.main: median {median_ms:.1f} ms, "
+          f"min {min(timings) * 1000:.1f} ms, max {max(timings) * 1000:.1f} ms over {args.runs} runs")
+
+    failed = False
+    if loaded:
+        print(f"Eagerly imported at startup: {', '.join(loaded)}")
+        failed = True
+    if median_ms > args.budget_ms:
+        print(f"Cold start over budget: {median_ms:.1f} ms > {args.budget_ms:g} ms")
+        failed = True
+    if failed:
+        sys.exit(1)
+    print(f"Within the {args.budget_ms:g} ms budget")
+
+
+if __name__ == "__main__":
+    main()
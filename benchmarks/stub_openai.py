@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Local stub of the OpenAI chat completions API for EcoLens benchmarks.
+
+Answers POST /v1/chat/completions with a valid lifecycle analysis after a
+configurable latency plus Gaussian jitter. With ``stream=True`` it answers
+in the streaming prompt's format instead: the story paragraphs, then a
+METRICS: line, sent as Server-Sent Events chunks after the same latency,
+with a final usage chunk when ``stream_options.include_usage`` is set.
+Reported usage estimates tokens
+as characters / 4 and simulates upstream prefix caching (prefixes of at
+least 1024 tokens, cached in 128-token blocks), so prompt layouts can be
+compared in /metrics. Use it in-process through an
+httpx ASGI transport, or run it as a server and point OPENAI_BASE_URL at it:
+
+    python benchmarks/stub_openai.py --port 9000 --latency-ms 800 --jitter-ms 200
+    OPENAI_BASE_URL=http://127.0.0.1:9000/v1 python run.py
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import Iterator, Optional
+
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+
+CHARS_PER_TOKEN = 4
+CACHE_MIN_TOKENS = 1024
+CACHE_BLOCK_TOKENS = 128
+STREAM_CHUNK_CHARS = 24
+# Must match ecolens.prompts.STREAM_METRICS_MARKER
+STREAM_METRICS_MARKER = "METRICS:"
+
+STORY = (
+    "Raw materials for {name} are extracted and refined, emitting about {carbon} kg CO2.\n\n"
+    "Production draws roughly {water} liters water across the supply chain.\n\n"
+    "Transportation moves it thousands of miles before it reaches a shelf.\n\n"
+    "Once discarded it can sit for {landfill} years landfill, and it is {recycle}% recyclable."
+)
+
+
+def create_stub_app(latency_ms: float = 0.0, jitter_ms: float = 0.0, seed: int = 0) -> FastAPI:
+    """Build the stub API; each completion waits latency_ms +/- jitter_ms (never negative)."""
+    app = FastAPI(title="OpenAI stub")
+    rng = random.Random(seed)
+    app.state.requests = 0
+    cached_prefixes = set()
+
+    def cached_tokens(prompt_text: str) -> int:
+        """Tokens of the longest previously seen cacheable prefix; remember this prompt's prefixes."""
+        cached, hit = 0, True
+        block = CACHE_BLOCK_TOKENS * CHARS_PER_TOKEN
+        for end in range(CACHE_MIN_TOKENS * CHARS_PER_TOKEN, len(prompt_text) + 1, block):
+            prefix = prompt_text[:end]
+            if hit and prefix in cached_prefixes:
+                cached = end // CHARS_PER_TOKEN
+            else:
+                hit = False
+                cached_prefixes.add(prefix)
+        return cached
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(body: dict):
+        app.state.requests += 1
+        delay = max(0.0, rng.gauss(latency_ms, jitter_ms)) if jitter_ms else latency_ms
+        if delay:
+            await asyncio.sleep(delay / 1000)
+
+        prompt = body["messages"][-1]["content"]
+        metrics = {
+            "carbon_footprint_kg": round(rng.uniform(0.1, 40), 2),
+            "water_usage_liters": round(rng.uniform(50, 5000), 1),
+            "landfill_years": round(rng.uniform(0.1, 800), 1),
+            "recyclability_percent": round(rng.uniform(5, 95), 1),
+        }
+        story = STORY.format(
+            name=prompt[:40].strip(),
+            carbon=metrics["carbon_footprint_kg"],
+            water=metrics["water_usage_liters"],
+            landfill=metrics["landfill_years"],
+            recycle=metrics["recyclability_percent"],
+        )
+        if body.get("stream"):
+            content = f"{story}\n\n{STREAM_METRICS_MARKER} {json.dumps(metrics)}"
+        else:
+            content = json.dumps({"story": story, **metrics})
+        prompt_text = "".join(message["content"] for message in body["messages"])
+        prompt_tokens = len(prompt_text) // CHARS_PER_TOKEN
+        completion_tokens = min(len(content) // CHARS_PER_TOKEN, body.get("max_tokens") or 2000)
+        completion = {
+            "id": f"chatcmpl-stub-{app.state.requests}",
+            "created": int(time.time()),
+            "model": body.get("model", "gpt-4o-mini"),
+        }
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "prompt_tokens_details": {"cached_tokens": cached_tokens(prompt_text)},
+        }
+        if body.get("stream"):
+            include_usage = (body.get("stream_options") or {}).get("include_usage", False)
+            return StreamingResponse(stream_chunks(completion, content, usage if include_usage else None),
+                                     media_type="text/event-stream")
+        return {
+            **completion,
+            "object": "chat.completion",
+            "choices": [{
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {"role": "assistant", "content": content},
+            }],
+            "usage": usage,
+        }
+
+    def stream_chunks(completion: dict, content: str, usage: Optional[dict]) -> Iterator[str]:
+        """The completion as chat.completion.chunk events, ending with the usage chunk and [DONE]."""
+        def event(choices: list, **extra) -> str:
+            return f"data: {json.dumps({**completion, 'object': 'chat.completion.chunk', 'choices': choices, **extra})}\n\n"
+
+        yield event([{"index": 0, "delta": {"role": "assistant", "content": ""}, "finish_reason": None}])
+        for start in range(0, len(content), STREAM_CHUNK_CHARS):
+            piece = content[start:start + STREAM_CHUNK_CHARS]
+            yield event([{"index": 0, "delta": {"content": piece}, "finish_reason": None}])
+        yield event([{"index": 0, "delta": {}, "finish_reason": "stop"}])
+        if usage is not None:
+            yield event([], usage=usage)
+        yield "data: [DONE]\n\n"
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the OpenAI API stub")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency-ms", type=float, default=800.0)
+    parser.add_argument("--jitter-ms", type=float, default=200.0)
+    args = parser.parse_args()
+
+    import uvicorn
+    print(f"OpenAI stub listening on http://{args.host}:{args.port}/v1")
+    uvicorn.run(create_stub_app(args.latency_ms, args.jitter_ms), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -16,7 +16,6 @@ from ecolens.main import app
 app.debug = False
 
 if __name__ == "__main__":
-    import uvicorn
-    print("Starting EcoLens API Server...")
-    print("Web interface: http://127.0.0.1:8000")
-    uvicorn.run(app, host="127.0.0.1", port=8000)
+    # Same options as `python -m ecolens.serve` (--host, --port, --workers, ...)
+    from ecolens.serve import main
+    main()
@@ -0,0 +1,147 @@
+"""Admission control for analysis requests.
+
+At most ``max_concurrent`` analyses run at once. Further requests wait in a
+bounded queue with two lanes: a freed slot always goes to the oldest
+"interactive" waiter before any "bulk" waiter. A request is rejected at
+once when the queue is full (AdmissionRejected with status 429), unless it
+is interactive and a bulk waiter can be shed to make room (that waiter gets
+503). A request that waits longer than ``queue_timeout`` seconds gives up
+with 503. Rejections carry a Retry-After estimate derived from recent slot
+hold times.
+"""
+
+import asyncio
+import math
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+INTERACTIVE, BULK = "interactive", "bulk"
+PRIORITIES = (INTERACTIVE, BULK)
+
+
+class AdmissionRejected(Exception):
+    """The request was not admitted; ``status_code`` is 429 or 503."""
+
+    def __init__(self, reason: str, status_code: int, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class AdmissionTicket:
+    """One admitted request's slot; release() is idempotent."""
+
+    def __init__(self, controller: "AdmissionController"):
+        self._controller = controller
+        self._started = time.perf_counter()
+        self._released = False
+
+    def release(self) -> None:
+        if not self._released:
+            self._released = True
+            self._controller._release(time.perf_counter() - self._started)
+
+
+class AdmissionController:
+    """Caps concurrent analyses with a bounded, deadline-limited, two-lane wait queue."""
+
+    def __init__(self, max_concurrent: int = 64, max_queue: int = 128, queue_timeout: float = 10.0):
+        self.enabled = max_concurrent > 0
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self._waiters: Dict[str, Deque[asyncio.Future]] = {priority: deque() for priority in PRIORITIES}
+        # Moving average of how long admitted requests hold a slot, for Retry-After
+        self._avg_hold = 1.0
+        self.admitted: Dict[str, int] = {priority: 0 for priority in PRIORITIES}
+        self.rejected: Dict[str, int] = {"queue_full": 0, "queue_timeout": 0, "shed": 0}
+        self.total_wait_seconds = 0.0
+
+    @property
+    def queued(self) -> int:
+        return sum(len(waiters) for waiters in self._waiters.values())
+
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely to be free for a new request."""
+        estimate = self._avg_hold * (self.queued + 1) / max(1, self.max_concurrent)
+        return min(60, max(1, math.ceil(estimate)))
+
+    def _reject(self, reason: str, status_code: int) -> AdmissionRejected:
+        self.rejected[reason] += 1
+        return AdmissionRejected(reason, status_code, self.retry_after())
+
+    async def acquire(self, priority: str = INTERACTIVE) -> AdmissionTicket:
+        """Wait for a slot in the priority's lane; raise AdmissionRejected when over capacity."""
+        if priority not in self._waiters:
+            raise ValueError(f"priority must be one of {', '.join(PRIORITIES)}")
+        if not self.enabled:
+            return AdmissionTicket(self)
+        if self.active < self.max_concurrent and not self.queued:
+            self.active += 1
+            self.admitted[priority] += 1
+            return AdmissionTicket(self)
+
+        if self.queued >= self.max_queue:
+            bulk = self._waiters[BULK]
+            if priority != INTERACTIVE or not bulk:
+                raise self._reject("queue_full", 429)
+            # Make room for the interactive request by shedding the newest bulk waiter
+            bulk.pop().set_exception(self._reject("shed", 503))
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters[priority].append(waiter)
+        started = time.perf_counter()
+        try:
+            async with asyncio.timeout(self.queue_timeout):
+                await waiter
+        except (TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled() and waiter.exception() is None:
+                # The slot was handed over just as the deadline passed or the caller went away
+                self._release(0.0)
+            elif waiter in self._waiters[priority]:
+                self._waiters[priority].remove(waiter)
+            if isinstance(e, TimeoutError):
+                raise self._reject("queue_timeout", 503) from None
+            raise
+        finally:
+            self.total_wait_seconds += time.perf_counter() - started
+        self.admitted[priority] += 1
+        return AdmissionTicket(self)
+
+    def _release(self, held: float) -> None:
+        """Hand the slot to the next waiter (interactive first) or free it."""
+        if not self.enabled:
+            return
+        if held:
+            self._avg_hold += 0.1 * (held - self._avg_hold)
+        for priority in PRIORITIES:
+            waiters = self._waiters[priority]
+            while waiters:
+                waiter = waiters.popleft()
+                if not waiter.done():
+                    waiter.set_result(None)
+                    return
+        self.active -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "active": self.active,
+            "max_concurrent": self.max_concurrent,
+            "queued": {priority: len(waiters) for priority, waiters in self._waiters.items()},
+            "max_queue": self.max_queue,
+            "queue_timeout_seconds": self.queue_timeout,
+            "admitted": dict(self.admitted),
+            "rejected": dict(self.rejected),
+            "total_wait_seconds": round(self.total_wait_seconds, 3),
+            "retry_after_seconds": self.retry_after(),
+        }
+
+
+def parse_priority(value: Optional[str], default: str = BULK) -> str:
+    """Normalize a client-supplied priority hint; unknown values fall back to default."""
+    value = (value or "").strip().lower()
+    return value if value in PRIORITIES else default
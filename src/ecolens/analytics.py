@@ -0,0 +1,267 @@
+"""Append-only analytics log of served analyses with incremental aggregates.
+
+Every analysis served is appended as one fixed-size little-endian record
+(timestamp, the four metrics, both scores, source and degraded flag) to
+``records.bin`` in the log directory. Appends are packed with ``struct``
+and buffered briefly, so the request path never imports NumPy. Several
+worker processes can append to the same file: each flush is a single
+``O_APPEND`` write of whole records.
+
+Aggregates are folded in incrementally. ``refresh()`` memory-maps only
+the records appended since the previous refresh, by any process, and adds
+them to per-band counts, sums and fixed-bucket histograms (bands are the
+sustainability scores 1-10). ``summary()`` then costs the same however
+long the history is: means come from sums, and approximate percentiles
+are interpolated within histogram buckets. The full log is only read
+once, when a process first refreshes.
+"""
+
+import os
+import struct
+import threading
+import time
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+if TYPE_CHECKING:
+    import numpy as np
+
+METRIC_FIELDS = ("carbon_footprint_kg", "water_usage_liters", "landfill_years", "recyclability")
+SOURCES = ("model", "catalog", "stale_cache", "fallback")
+BANDS = tuple(range(1, 11))
+PERCENTILES = (0.5, 0.9, 0.99)
+
+# timestamp, four metrics, sustainability and impact scores, source code, degraded flag
+_RECORD = struct.Struct("<d4f2bBB")
+_UNKNOWN_SOURCE = 255
+
+# Log-spaced buckets cover each metric's realistic range (see prompts.METRIC_GUIDANCE) with room on both sides
+_HISTOGRAM_RANGES = {
+    "carbon_footprint_kg": (0.01, 1000.0, 40, True),
+    "water_usage_liters": (1.0, 100000.0, 40, True),
+    "landfill_years": (0.01, 10000.0, 48, True),
+    "recyclability": (0.0, 100.0, 20, False),
+}
+
+
+@lru_cache(maxsize=None)
+def record_dtype() -> "np.dtype":
+    """NumPy view of one packed record (same layout as the struct used for appends)."""
+    import numpy as np
+    dtype = np.dtype([
+        ("timestamp", "<f8"),
+        *((field, "<f4") for field in METRIC_FIELDS),
+        ("sustainability_score", "i1"),
+        ("environmental_impact_score", "i1"),
+        ("source", "u1"),
+        ("degraded", "u1"),
+    ])
+    assert dtype.itemsize == _RECORD.size
+    return dtype
+
+
+@lru_cache(maxsize=None)
+def histogram_edges(field: str) -> "np.ndarray":
+    """Bucket edges for a metric; values below the first or above the last edge go to two outer buckets."""
+    import numpy as np
+    low, high, buckets, logarithmic = _HISTOGRAM_RANGES[field]
+    return np.geomspace(low, high, buckets + 1) if logarithmic else np.linspace(low, high, buckets + 1)
+
+
+class AnalyticsLog:
+    """Append-only record log of served analyses plus aggregates folded in incrementally."""
+
+    def __init__(self, path: Optional[str], flush_records: int = 256, flush_interval: float = 1.0):
+        self.path = path
+        self.enabled = bool(path)
+        self.flush_records = flush_records
+        self.flush_interval = flush_interval
+        self._buffer = bytearray()
+        self._buffer_lock = threading.Lock()
+        self._fold_lock = threading.Lock()
+        self._last_flush = time.time()
+        self._fd: Optional[int] = None
+        self.appended = 0
+        self.dropped = 0
+        # Aggregates, created on the first refresh
+        self._folded = 0
+        self._counts = None
+        self._sums = None
+        self._histograms = None
+        self._sources = None
+        self._degraded = 0
+        self._first_at: Optional[float] = None
+        self._last_at: Optional[float] = None
+
+    @property
+    def file(self) -> Optional[str]:
+        return os.path.join(self.path, "records.bin") if self.enabled else None
+
+    def append(self, data: Dict[str, Any], degraded: bool = False) -> None:
+        """Buffer one served analysis (the public response fields); flushed in batches."""
+        if not self.enabled:
+            return
+        source = data.get("source", "model")
+        record = _RECORD.pack(
+            time.time(),
+            *(float(data[field]) for field in METRIC_FIELDS),
+            int(data["sustainability_score"]),
+            int(data["environmental_impact_score"]),
+            SOURCES.index(source) if source in SOURCES else _UNKNOWN_SOURCE,
+            1 if degraded else 0,
+        )
+        with self._buffer_lock:
+            self._buffer += record
+            self.appended += 1
+            if len(self._buffer) >= self.flush_records * _RECORD.size or time.time() - self._last_flush >= self.flush_interval:
+                self._flush_locked()
+
+    def flush(self) -> None:
+        with self._buffer_lock:
+            self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        self._last_flush = time.time()
+        if not self._buffer:
+            return
+        data, self._buffer = bytes(self._buffer), bytearray()
+        try:
+            if self._fd is None:
+                os.makedirs(self.path, exist_ok=True)
+                self._fd = os.open(self.file, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            os.write(self._fd, data)
+        except OSError as e:
+            self.dropped += len(data) // _RECORD.size
+            print(f"Analytics log write failed ({self.path}): {e}")
+
+    def close(self) -> None:
+        self.flush()
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def refresh(self, chunk_records: int = 1 << 20) -> int:
+        """Fold records appended since the last refresh (by any process) into the aggregates."""
+        import numpy as np
+        self.flush()
+        with self._fold_lock:
+            if self._counts is None:
+                self._counts = np.zeros(len(BANDS), dtype=np.int64)
+                self._sums = {field: np.zeros(len(BANDS)) for field in METRIC_FIELDS}
+                self._histograms = {
+                    field: np.zeros((len(BANDS), len(histogram_edges(field)) + 1), dtype=np.int64)
+                    for field in METRIC_FIELDS
+                }
+                self._sources = np.zeros(256, dtype=np.int64)
+            if not self.enabled:
+                return 0
+            try:
+                available = os.path.getsize(self.file) // _RECORD.size
+            except OSError:
+                return 0
+            folded = 0
+            while self._folded < available:
+                count = min(chunk_records, available - self._folded)
+                records = np.memmap(self.file, dtype=record_dtype(), mode="r",
+                                    offset=self._folded * _RECORD.size, shape=(count,))
+                self._fold(records)
+                self._folded += count
+                folded += count
+            return folded
+
+    def _fold(self, records: "np.ndarray") -> None:
+        import numpy as np
+        bands = np.clip(records["sustainability_score"].astype(np.intp), 1, 10) - 1
+        np.add.at(self._counts, bands, 1)
+        for field in METRIC_FIELDS:
+            values = records[field].astype(np.float64)
+            finite = np.isfinite(values)
+            np.add.at(self._sums[field], bands[finite], values[finite])
+            buckets = np.searchsorted(histogram_edges(field), values[finite], side="right")
+            np.add.at(self._histograms[field], (bands[finite], buckets), 1)
+        self._sources += np.bincount(records["source"], minlength=256)
+        self._degraded += int(records["degraded"].sum())
+        timestamps = records["timestamp"]
+        if self._first_at is None:
+            self._first_at = float(timestamps[0])
+        self._last_at = float(timestamps[-1])
+
+    def _metric_summary(self, field: str, count: int, total: float, histogram: "np.ndarray",
+                        with_histogram: bool) -> Dict[str, Any]:
+        summary: Dict[str, Any] = {"mean": round(total / count, 4) if count else None}
+        for percentile in PERCENTILES:
+            summary[f"p{round(percentile * 100):d}"] = _histogram_percentile(
+                histogram_edges(field), histogram, percentile)
+        if with_histogram:
+            summary["histogram"] = {
+                "edges": [round(float(edge), 6) for edge in histogram_edges(field)],
+                # counts[0] is below the first edge and counts[-1] at or above the last
+                "counts": histogram.tolist(),
+            }
+        return summary
+
+    def summary(self) -> Dict[str, Any]:
+        """Counts, means, approximate percentiles and histograms, overall and per sustainability band."""
+        self.refresh()
+        with self._fold_lock:
+            counts = self._counts
+            overall_count = int(counts.sum())
+            bands = {}
+            for index, band in enumerate(BANDS):
+                band_count = int(counts[index])
+                if not band_count:
+                    continue
+                bands[str(band)] = {
+                    "count": band_count,
+                    "metrics": {
+                        field: self._metric_summary(field, band_count, float(self._sums[field][index]),
+                                                    self._histograms[field][index], False)
+                        for field in METRIC_FIELDS
+                    },
+                }
+            sources = {source: int(self._sources[code]) for code, source in enumerate(SOURCES)}
+            return {
+                "records": overall_count,
+                "first_recorded_at": self._first_at,
+                "last_recorded_at": self._last_at,
+                "sources": sources,
+                "degraded": self._degraded,
+                "overall": {
+                    "count": overall_count,
+                    "metrics": {
+                        field: self._metric_summary(field, overall_count, float(self._sums[field].sum()),
+                                                    self._histograms[field].sum(axis=0), True)
+                        for field in METRIC_FIELDS
+                    },
+                },
+                "bands": bands,
+            }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "path": self.file,
+            "appended": self.appended,
+            "buffered": len(self._buffer) // _RECORD.size,
+            "dropped": self.dropped,
+            "folded": self._folded,
+        }
+
+
+def _histogram_percentile(edges: "np.ndarray", histogram: "np.ndarray", percentile: float) -> Optional[float]:
+    """Approximate percentile by linear interpolation inside the bucket that contains it."""
+    import numpy as np
+    total = int(histogram.sum())
+    if not total:
+        return None
+    target = percentile * total
+    cumulative = np.cumsum(histogram)
+    bucket = int(np.searchsorted(cumulative, target, side="left"))
+    if bucket == 0:
+        return round(float(edges[0]), 4)
+    if bucket > len(edges) - 1:
+        return round(float(edges[-1]), 4)
+    low, high = float(edges[bucket - 1]), float(edges[bucket])
+    before = float(cumulative[bucket - 1])
+    fraction = (target - before) / float(histogram[bucket]) if histogram[bucket] else 0.0
+    return round(low + fraction * (high - low), 4)
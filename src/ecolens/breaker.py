@@ -0,0 +1,157 @@
+"""Circuit breaker for upstream analysis calls.
+
+Closed: calls go through, and their outcomes are tracked over a rolling
+window. The breaker opens when the failure rate over at least ``min_calls``
+recent calls reaches ``failure_threshold``, or after ``max_consecutive_failures``
+failures in a row.
+
+Open: calls are rejected immediately with CircuitOpenError, so callers can
+answer from a degraded source instead of waiting for the upstream timeout.
+
+Half-open: after ``open_seconds``, up to ``half_open_max_calls`` probe calls
+are let through. A successful probe closes the breaker and a failed one
+reopens it.
+"""
+
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Tuple
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+STATE_CODES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitOpenError(Exception):
+    """The upstream call was not attempted because the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """Rolling-window circuit breaker (closed -> open -> half-open -> closed); ``clock`` returns seconds."""
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        failure_threshold: float = 0.5,
+        min_calls: int = 10,
+        window_seconds: float = 30.0,
+        max_consecutive_failures: int = 5,
+        open_seconds: float = 15.0,
+        half_open_max_calls: int = 1,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.enabled = enabled
+        self.failure_threshold = failure_threshold
+        self.min_calls = min_calls
+        self.window_seconds = window_seconds
+        self.max_consecutive_failures = max_consecutive_failures
+        self.open_seconds = open_seconds
+        self.half_open_max_calls = half_open_max_calls
+        self.clock = clock
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self._outcomes: Deque[Tuple[float, str]] = deque()
+        self._consecutive_failures = 0
+        self._probes_in_flight = 0
+        self.times_opened = 0
+        self.rejected = 0
+        self.failures: Dict[str, int] = {}
+
+    def _prune(self, now: float) -> None:
+        while self._outcomes and self._outcomes[0][0] < now - self.window_seconds:
+            self._outcomes.popleft()
+
+    def _open(self, now: float) -> None:
+        if self.state != OPEN:
+            self.times_opened += 1
+            print(f"Upstream circuit breaker opened ({self.state} -> open)")
+        self.state = OPEN
+        self.opened_at = now
+        self._probes_in_flight = 0
+
+    def _close(self) -> None:
+        print("Upstream circuit breaker closed")
+        self.state = CLOSED
+        self._outcomes.clear()
+        self._consecutive_failures = 0
+        self._probes_in_flight = 0
+
+    def before_call(self) -> None:
+        """Raise CircuitOpenError unless a call may be attempted now; pair with record_success/record_failure."""
+        if not self.enabled:
+            return
+        if self.state == OPEN and self.clock() - self.opened_at >= self.open_seconds:
+            self.state = HALF_OPEN
+            self._probes_in_flight = 0
+        if self.state == HALF_OPEN:
+            if self._probes_in_flight >= self.half_open_max_calls:
+                self.rejected += 1
+                raise CircuitOpenError("Upstream circuit breaker is half-open and already probing")
+            self._probes_in_flight += 1
+        elif self.state == OPEN:
+            self.rejected += 1
+            raise CircuitOpenError("Upstream circuit breaker is open")
+
+    def record_success(self) -> None:
+        if not self.enabled:
+            return
+        if self.state == HALF_OPEN:
+            self._close()
+            return
+        now = self.clock()
+        self._consecutive_failures = 0
+        self._outcomes.append((now, "success"))
+        self._prune(now)
+
+    def release(self) -> None:
+        """A permitted call ended without an outcome (e.g. it was cancelled)."""
+        if self.state == HALF_OPEN and self._probes_in_flight > 0:
+            self._probes_in_flight -= 1
+
+    def record_failure(self, kind: str = "error") -> None:
+        """Record a failed call; kind is "error", "timeout" or "rate_limit"."""
+        self.failures[kind] = self.failures.get(kind, 0) + 1
+        if not self.enabled:
+            return
+        now = self.clock()
+        if self.state == HALF_OPEN:
+            self._open(now)
+            return
+        if self.state == OPEN:
+            return
+        self._consecutive_failures += 1
+        self._outcomes.append((now, kind))
+        self._prune(now)
+        failed = sum(1 for _, outcome in self._outcomes if outcome != "success")
+        if (self._consecutive_failures >= self.max_consecutive_failures
+                or (len(self._outcomes) >= self.min_calls and failed / len(self._outcomes) >= self.failure_threshold)):
+            self._open(now)
+
+    def stats(self) -> Dict[str, Any]:
+        now = self.clock()
+        self._prune(now)
+        failed = sum(1 for _, outcome in self._outcomes if outcome != "success")
+        return {
+            "enabled": self.enabled,
+            "state": self.state,
+            "retry_in_seconds": round(max(0.0, self.opened_at + self.open_seconds - now), 3) if self.state == OPEN else 0.0,
+            "window_calls": len(self._outcomes),
+            "window_failure_rate": round(failed / len(self._outcomes), 4) if self._outcomes else 0.0,
+            "consecutive_failures": self._consecutive_failures,
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+            "failures": dict(self.failures),
+            "failure_threshold": self.failure_threshold,
+            "min_calls": self.min_calls,
+            "window_seconds": self.window_seconds,
+            "open_seconds": self.open_seconds,
+        }
+
+
+def classify_failure(error: BaseException) -> str:
+    """Map an upstream exception to "timeout", "rate_limit" or "error" without importing the SDK."""
+    name = type(error).__name__
+    if isinstance(error, TimeoutError) or "Timeout" in name:
+        return "timeout"
+    if name == "RateLimitError" or getattr(error, "status_code", None) == 429:
+        return "rate_limit"
+    return "error"
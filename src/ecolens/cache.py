@@ -0,0 +1,354 @@
+"""Two-tier result cache for EcoLens product analyses.
+
+Tier one is an in-process LRU with TTL and size bounds; tier two is an
+on-disk SQLite store (WAL mode) that survives restarts and cold starts.
+
+Several processes (e.g. server workers) can share one store: a result
+written by any of them is a disk hit in the others. Invalidations are
+appended to a log table that every process polls at most once per
+``sync_interval`` seconds to drop the affected entries from its own
+in-process tier.
+
+Cache calls run on the event loop, so past the one-off setup the store
+waits at most ``busy_timeout`` seconds for another process's write lock.
+A read that times out is a miss and a write that times out is skipped;
+only invalidations report the failure, since other processes would keep
+serving the entry.
+
+Each in-process entry can also carry memos: values derived from the
+result (such as an already-serialized HTTP response) that are dropped
+together with the entry when it expires, is evicted, replaced or
+invalidated.
+"""
+
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Hashable, Optional, Tuple
+
+_PUNCTUATION_RE = re.compile(r"[^\w\s]+")
+
+# Invalidation log rows are kept this long, far beyond any worker's sync interval
+_INVALIDATION_RETENTION_SECONDS = 3600
+
+# Derived values (e.g. serialized responses) kept per in-process entry
+_MAX_MEMOS_PER_ENTRY = 16
+
+
+def _singularize(word: str) -> str:
+    """Fold a simple English plural onto its singular form."""
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 4 and word.endswith(("sses", "xes", "zes", "ches", "shes")):
+        return word[:-2]
+    if len(word) > 3 and word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        return word[:-1]
+    return word
+
+
+def normalize_item_name(item_name: str) -> str:
+    """Normalize an item name into a cache key (case, whitespace, plurals, punctuation)."""
+    words = _PUNCTUATION_RE.sub(" ", item_name.casefold()).split()
+    return " ".join(_singularize(word) for word in words)
+
+
+class ResultCache:
+    """LRU + TTL cache of analysis results backed by an optional SQLite store."""
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 7 * 24 * 3600, path: Optional[str] = None,
+                 sync_interval: float = 1.0, stale_seconds: float = 30 * 24 * 3600, busy_timeout: float = 0.05):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        # Expired entries stay on disk this long for get_stale() (degraded answers while upstream is down)
+        self.stale_seconds = stale_seconds
+        self.path = path
+        self.sync_interval = sync_interval
+        self.busy_timeout = busy_timeout
+        self._invalidation_seq = 0
+        self._last_sync = 0.0
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any], Dict[Hashable, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_failed = False
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.remote_invalidations = 0
+        self.stale_hits = 0
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        """Open the on-disk store lazily; disable it if it cannot be opened."""
+        if self._db is not None or self._db_failed or not self.path:
+            return self._db
+        try:
+            db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            # Setup may wait for other processes; see open()
+            db.execute("PRAGMA busy_timeout=5000")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS analyses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            # key NULL means "everything"
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS invalidations ("
+                "seq INTEGER PRIMARY KEY AUTOINCREMENT, key TEXT, created_at REAL NOT NULL)"
+            )
+            db.execute("DELETE FROM analyses WHERE expires_at <= ?", (time.time() - self.stale_seconds,))
+            # Only invalidations issued from now on concern this process's (empty) memory tier
+            self._invalidation_seq = db.execute("SELECT COALESCE(MAX(seq), 0) FROM invalidations").fetchone()[0]
+            self._last_sync = time.time()
+            # From here on the store is used from the event loop: never wait long for a lock
+            db.execute(f"PRAGMA busy_timeout={int(self.busy_timeout * 1000)}")
+            self._db = db
+        except sqlite3.Error as e:
+            print(f"Result cache disk store disabled ({self.path}): {e}")
+            self._db_failed = True
+        return self._db
+
+    def open(self) -> bool:
+        """Open the disk store now instead of on first use (its setup may wait for locks); return whether it is open."""
+        with self._lock:
+            return self._connect() is not None
+
+    def _remember(self, key: str, expires_at: float, value: Dict[str, Any]) -> None:
+        """Insert into the in-process tier, evicting the least recently used entries."""
+        self._entries[key] = (expires_at, value, {})
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _sync(self, db: sqlite3.Connection, now: float) -> None:
+        """Apply invalidations logged by other processes to the in-process tier."""
+        if now - self._last_sync < self.sync_interval:
+            return
+        self._last_sync = now
+        try:
+            rows = db.execute(
+                "SELECT seq, key FROM invalidations WHERE seq > ? ORDER BY seq", (self._invalidation_seq,)
+            ).fetchall()
+        except sqlite3.Error as e:
+            print(f"Result cache invalidation sync failed: {e}")
+            return
+        for seq, key in rows:
+            self._invalidation_seq = seq
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+            self.remote_invalidations += 1
+
+    def _log_invalidation(self, db: sqlite3.Connection, key: Optional[str]) -> None:
+        now = time.time()
+        db.execute("INSERT INTO invalidations (key, created_at) VALUES (?, ?)", (key, now))
+        db.execute("DELETE FROM invalidations WHERE created_at < ?", (now - _INVALIDATION_RETENTION_SECONDS,))
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached result for a normalized key, or None."""
+        now = time.time()
+        with self._lock:
+            db = self._connect()
+            if db is not None:
+                self._sync(db, now)
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self.memory_hits += 1
+                    return entry[1]
+                del self._entries[key]
+                self.expirations += 1
+
+            if db is not None:
+                try:
+                    row = db.execute(
+                        "SELECT value, expires_at FROM analyses WHERE key = ? AND expires_at > ?",
+                        (key, now),
+                    ).fetchone()
+                except sqlite3.Error as e:
+                    print(f"Result cache disk read failed: {e}")
+                    row = None
+                if row is not None:
+                    value = json.loads(row[0])
+                    self._remember(key, row[1], value)
+                    self.disk_hits += 1
+                    return value
+
+            self.misses += 1
+            return None
+
+    def get_stale(self, key: str, max_stale: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Return a result for key even if it has expired, or None.
+
+        Expired entries are returned up to max_stale seconds past their expiry
+        (at most stale_seconds, the default).
+        """
+        now = time.time()
+        max_stale = self.stale_seconds if max_stale is None else min(max_stale, self.stale_seconds)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now - max_stale:
+                self.stale_hits += 1
+                return entry[1]
+            db = self._connect()
+            if db is None:
+                return None
+            try:
+                row = db.execute(
+                    "SELECT value FROM analyses WHERE key = ? AND expires_at > ?", (key, now - max_stale)
+                ).fetchone()
+            except sqlite3.Error as e:
+                print(f"Result cache disk read failed: {e}")
+                return None
+            if row is None:
+                return None
+            self.stale_hits += 1
+            return json.loads(row[0])
+
+    def expires_in(self, key: str) -> Optional[float]:
+        """Seconds until the entry for key expires (negative once expired), or None if there is none.
+
+        The disk tier is consulted too, since another process may have stored a newer result.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            expires_at = entry[0] if entry is not None else None
+            db = self._connect()
+            if db is not None:
+                try:
+                    row = db.execute("SELECT expires_at FROM analyses WHERE key = ?", (key,)).fetchone()
+                except sqlite3.Error as e:
+                    print(f"Result cache disk read failed: {e}")
+                    row = None
+                if row is not None:
+                    expires_at = row[0] if expires_at is None else max(expires_at, row[0])
+            return None if expires_at is None else expires_at - now
+
+    def get_memo(self, key: str, tag: Hashable) -> Optional[Any]:
+        """Return the memo stored under tag for a live in-process entry, or None.
+
+        A returned memo counts as a memory hit, since it stands in for get().
+        """
+        now = time.time()
+        with self._lock:
+            db = self._connect()
+            if db is not None:
+                self._sync(db, now)
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                return None
+            memo = entry[2].get(tag)
+            if memo is not None:
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+            return memo
+
+    def set_memo(self, key: str, tag: Hashable, memo: Any) -> None:
+        """Attach a value derived from the in-process entry for key; a no-op if there is none."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            memos = entry[2]
+            if len(memos) >= _MAX_MEMOS_PER_ENTRY and tag not in memos:
+                memos.clear()
+            memos[tag] = memo
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        """Store a result under a normalized key in both tiers."""
+        expires_at = time.time() + self.ttl_seconds
+        with self._lock:
+            self._remember(key, expires_at, value)
+            db = self._connect()
+            if db is not None:
+                try:
+                    db.execute(
+                        "INSERT OR REPLACE INTO analyses (key, value, expires_at) VALUES (?, ?, ?)",
+                        (key, json.dumps(value), expires_at),
+                    )
+                except sqlite3.Error as e:
+                    print(f"Result cache disk write failed: {e}")
+
+    def invalidate(self, key: str) -> bool:
+        """Drop a single entry from both tiers; return whether anything was removed.
+
+        Raises sqlite3.Error if the disk store could not be updated (e.g. it
+        was busy); the in-process entry is dropped regardless.
+        """
+        with self._lock:
+            removed = self._entries.pop(key, None) is not None
+            db = self._connect()
+            if db is not None:
+                try:
+                    db.execute("BEGIN IMMEDIATE")
+                    removed = db.execute("DELETE FROM analyses WHERE key = ?", (key,)).rowcount > 0 or removed
+                    self._log_invalidation(db, key)
+                    db.execute("COMMIT")
+                except sqlite3.Error as e:
+                    if db.in_transaction:
+                        db.execute("ROLLBACK")
+                    print(f"Result cache disk delete failed: {e}")
+                    raise
+            return removed
+
+    def clear(self) -> int:
+        """Drop every entry from both tiers; return how many were removed.
+
+        Raises sqlite3.Error if the disk store could not be updated, like invalidate().
+        """
+        with self._lock:
+            removed = len(self._entries)
+            self._entries.clear()
+            db = self._connect()
+            if db is not None:
+                try:
+                    db.execute("BEGIN IMMEDIATE")
+                    removed = max(removed, db.execute("DELETE FROM analyses").rowcount)
+                    self._log_invalidation(db, None)
+                    db.execute("COMMIT")
+                except sqlite3.Error as e:
+                    if db.in_transaction:
+                        db.execute("ROLLBACK")
+                    print(f"Result cache disk clear failed: {e}")
+                    raise
+            return removed
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss/eviction counters and tier sizes."""
+        with self._lock:
+            disk_entries = None
+            db = self._connect()
+            if db is not None:
+                try:
+                    disk_entries = db.execute(
+                        "SELECT COUNT(*) FROM analyses WHERE expires_at > ?", (time.time(),)
+                    ).fetchone()[0]
+                except sqlite3.Error:
+                    pass
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                "hits": hits,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "remote_invalidations": self.remote_invalidations,
+                "stale_hits": self.stale_hits,
+                "memory_entries": len(self._entries),
+                "memos": sum(len(entry[2]) for entry in self._entries.values()),
+                "max_entries": self.max_entries,
+                "disk_entries": disk_entries,
+                "disk_path": self.path if self._db is not None else None,
+                "ttl_seconds": self.ttl_seconds,
+            }
@@ -0,0 +1,256 @@
+"""Precomputed product catalog with a character-trigram index.
+
+A catalog is a directory of NumPy ``.npy`` files, all memory-mapped on load:
+
+- ``entries.npy``: one fixed-size record per product (metrics, scores and
+  offsets into the text blob)
+- ``text.npy``: UTF-8 bytes of every product name and story
+- ``name_hashes.npy`` / ``name_ids.npy``: sorted hashes of normalized names,
+  for exact matches with one binary search
+- ``trigram_keys.npy`` / ``trigram_offsets.npy`` / ``trigram_postings.npy``:
+  a CSR-style inverted index from trigram code to entry ids
+
+Lookups first try an exact normalized-name match, then score candidates by
+Dice similarity of the trigram sets of the normalized names, so "Plastic
+water bottles" resolves to the "plastic water bottle" entry. Lookups that
+stand in for the model also require every word of the matched name to be
+covered by a (possibly misspelled) word of the query, so "plastic" does not
+resolve to "plastic bag" nor "water bottle" to "plastic water bottle".
+
+Build a catalog from a product list (one name per line) with:
+
+    python -m ecolens.catalog build products.txt catalog/
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import zlib
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .cache import normalize_item_name
+
+ENTRY_DTYPE = np.dtype([
+    ("name_offset", "<u8"),
+    ("name_length", "<u4"),
+    ("story_offset", "<u8"),
+    ("story_length", "<u4"),
+    ("trigram_count", "<u4"),
+    ("carbon_footprint_kg", "<f8"),
+    ("water_usage_liters", "<f8"),
+    ("landfill_years", "<f8"),
+    ("recyclability", "<f8"),
+    ("sustainability_score", "<i1"),
+    ("environmental_impact_score", "<i1"),
+])
+
+METRIC_FIELDS = ("carbon_footprint_kg", "water_usage_liters", "landfill_years", "recyclability")
+SCORE_FIELDS = ("sustainability_score", "environmental_impact_score")
+
+# Per-word similarity that still counts as the same word ("plastik" ~ "plastic" is 0.75)
+WORD_SIMILARITY = 0.6
+
+
+def name_hash(item_name: str) -> int:
+    """64-bit hash of a normalized item name."""
+    data = normalize_item_name(item_name).encode("utf-8")
+    return (zlib.crc32(data) << 32) | zlib.adler32(data)
+
+
+def trigram_codes(item_name: str) -> np.ndarray:
+    """Sorted unique trigram codes of a normalized item name (words padded like pg_trgm)."""
+    codes = set()
+    for word in normalize_item_name(item_name).split():
+        padded = f"  {word} "
+        for i in range(len(padded) - 2):
+            codes.add(zlib.crc32(padded[i:i + 3].encode("utf-8")))
+    return np.array(sorted(codes), dtype=np.uint32)
+
+
+def _word_trigrams(word: str) -> set:
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def covers_words(query: str, name: str, min_similarity: float = WORD_SIMILARITY) -> bool:
+    """Whether every word of name has a word in query at least min_similarity alike (Dice of trigrams)."""
+    query_words = [_word_trigrams(word) for word in normalize_item_name(query).split()]
+    for word in normalize_item_name(name).split():
+        trigrams = _word_trigrams(word)
+        if not any(2 * len(trigrams & other) / (len(trigrams) + len(other)) >= min_similarity
+                   for other in query_words):
+            return False
+    return True
+
+
+def write_catalog(path: str, analyses: Iterable[Dict[str, Any]]) -> int:
+    """Write analyses (dicts shaped like get_product_analysis results) as a catalog; return the entry count."""
+    analyses = list(analyses)
+    entries = np.zeros(len(analyses), dtype=ENTRY_DTYPE)
+    text = bytearray()
+    postings: Dict[int, List[int]] = {}
+
+    for i, analysis in enumerate(analyses):
+        name = analysis["item_name"].encode("utf-8")
+        story = analysis["story"].encode("utf-8")
+        entries[i]["name_offset"], entries[i]["name_length"] = len(text), len(name)
+        text += name
+        entries[i]["story_offset"], entries[i]["story_length"] = len(text), len(story)
+        text += story
+        for field in METRIC_FIELDS + SCORE_FIELDS:
+            entries[i][field] = analysis[field]
+        codes = trigram_codes(analysis["item_name"])
+        entries[i]["trigram_count"] = len(codes)
+        for code in codes.tolist():
+            postings.setdefault(code, []).append(i)
+
+    keys = np.array(sorted(postings), dtype=np.uint32)
+    offsets = np.zeros(len(keys) + 1, dtype=np.uint32)
+    offsets[1:] = np.cumsum([len(postings[key]) for key in keys.tolist()])
+    flat = np.array([i for key in keys.tolist() for i in postings[key]], dtype=np.uint32)
+
+    hashes = np.array([name_hash(analysis["item_name"]) for analysis in analyses], dtype=np.uint64)
+    hash_order = np.argsort(hashes, kind="stable")
+
+    os.makedirs(path, exist_ok=True)
+    np.save(os.path.join(path, "entries.npy"), entries)
+    np.save(os.path.join(path, "name_hashes.npy"), hashes[hash_order])
+    np.save(os.path.join(path, "name_ids.npy"), hash_order.astype(np.uint32))
+    np.save(os.path.join(path, "text.npy"), np.frombuffer(bytes(text), dtype=np.uint8))
+    np.save(os.path.join(path, "trigram_keys.npy"), keys)
+    np.save(os.path.join(path, "trigram_offsets.npy"), offsets)
+    np.save(os.path.join(path, "trigram_postings.npy"), flat)
+    return len(entries)
+
+
+class Catalog:
+    """Read-only, memory-mapped catalog of precomputed analyses."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries = self._load("entries.npy")
+        self.text = self._load("text.npy")
+        self.name_hashes = self._load("name_hashes.npy")
+        self.name_ids = self._load("name_ids.npy")
+        self.trigram_keys = self._load("trigram_keys.npy")
+        self.trigram_offsets = self._load("trigram_offsets.npy")
+        self.trigram_postings = self._load("trigram_postings.npy")
+        # Contiguous copy of the per-entry trigram counts used by every fuzzy lookup
+        self.trigram_counts = np.ascontiguousarray(self.entries["trigram_count"])
+
+    def _load(self, name: str) -> np.ndarray:
+        # Plain ndarray views of the mapping slice much faster than np.memmap objects
+        return np.load(os.path.join(self.path, name), mmap_mode="r").view(np.ndarray)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def _text(self, offset: int, length: int) -> str:
+        return bytes(self.text[offset:offset + length]).decode("utf-8")
+
+    def entry(self, index: int) -> Dict[str, Any]:
+        """Return one entry as an analysis dict."""
+        record = self.entries[index]
+        analysis = {"item_name": self._text(int(record["name_offset"]), int(record["name_length"]))}
+        for field in SCORE_FIELDS:
+            analysis[field] = int(record[field])
+        for field in METRIC_FIELDS:
+            analysis[field] = float(record[field])
+        analysis["story"] = self._text(int(record["story_offset"]), int(record["story_length"]))
+        return analysis
+
+    def search(self, item_name: str) -> Optional[Tuple[int, float]]:
+        """Return (entry index, Dice similarity) of the closest entry, or None if nothing shares a trigram."""
+        if len(self.name_hashes):
+            key = np.uint64(name_hash(item_name))
+            position = int(np.searchsorted(self.name_hashes, key))
+            if position < len(self.name_hashes) and self.name_hashes[position] == key:
+                return int(self.name_ids[position]), 1.0
+
+        codes = trigram_codes(item_name)
+        if not len(codes) or not len(self.trigram_keys):
+            return None
+        positions = np.minimum(np.searchsorted(self.trigram_keys, codes), len(self.trigram_keys) - 1)
+        positions = positions[self.trigram_keys[positions] == codes]
+        if not len(positions):
+            return None
+
+        candidates = np.concatenate([
+            self.trigram_postings[self.trigram_offsets[p]:self.trigram_offsets[p + 1]] for p in positions.tolist()
+        ])
+        shared = np.bincount(candidates, minlength=len(self.entries))
+        ids = np.flatnonzero(shared)
+        shared = shared[ids]
+        similarity = 2.0 * shared / (len(codes) + self.trigram_counts[ids])
+        best = int(np.argmax(similarity))
+        return int(ids[best]), float(similarity[best])
+
+    def lookup(self, item_name: str, threshold: float,
+               cover_words: bool = False) -> Optional[Tuple[Dict[str, Any], float]]:
+        """Return (analysis, similarity) for the closest entry at or above threshold, else None.
+
+        With cover_words, the entry must also pass covers_words(item_name, entry name).
+        """
+        match = self.search(item_name)
+        if match is None or match[1] < threshold:
+            return None
+        analysis = self.entry(match[0])
+        if cover_words and match[1] < 1.0 and not covers_words(item_name, analysis["item_name"]):
+            return None
+        return analysis, match[1]
+
+
+async def build_catalog(product_names: List[str], path: str, concurrency: int = 8) -> Tuple[int, List[str]]:
+    """Analyze every product with the model and write the catalog; return (entries, skipped names)."""
+    from .main import fetch_product_analysis
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def analyze(product_name: str) -> Optional[Dict[str, Any]]:
+        async with semaphore:
+            try:
+                return await fetch_product_analysis(product_name)
+            except Exception as e:
+                print(f"Skipping {product_name}: {e}")
+                return None
+
+    results = await asyncio.gather(*(analyze(name) for name in product_names))
+    analyses = [result for result in results if result is not None]
+    skipped = [name for name, result in zip(product_names, results) if result is None]
+    return write_catalog(path, analyses), skipped
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Build or query an EcoLens product catalog")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="analyze a product list and write a catalog")
+    build.add_argument("products", help="text file with one product name per line")
+    build.add_argument("path", help="catalog directory to write")
+    build.add_argument("--concurrency", type=int, default=8)
+    query = commands.add_parser("query", help="look up an item in a catalog")
+    query.add_argument("path")
+    query.add_argument("item_name")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        with open(args.products, encoding="utf-8") as f:
+            names = list(dict.fromkeys(line.strip() for line in f if line.strip()))
+        count, skipped = asyncio.run(build_catalog(names, args.path, args.concurrency))
+        print(f"Wrote {count} entries to {args.path} ({len(skipped)} skipped)")
+        if skipped:
+            sys.exit(1)
+    else:
+        catalog = Catalog(args.path)
+        match = catalog.search(args.item_name)
+        if match is None:
+            print("No match")
+        else:
+            entry = catalog.entry(match[0])
+            print(f"{entry['item_name']} (similarity {match[1]:.3f})")
+
+
+if __name__ == "__main__":
+    main()
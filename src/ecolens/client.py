@@ -0,0 +1,105 @@
+"""Application-lifetime OpenAI client with a pooled HTTP connection and an upstream concurrency limit."""
+
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional
+
+
+class OpenAIClientManager:
+    """Owns one pooled AsyncOpenAI client per worker and caps in-flight upstream requests.
+
+    The client is built on first use and closed by the FastAPI lifespan on
+    shutdown. Tests can point it at a fake OpenAI-compatible server with
+    base_url, or serve it in-process by passing an httpx transport.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        max_in_flight: int = 32,
+        base_url: Optional[str] = None,
+        transport: Any = None,
+    ):
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.max_in_flight = max_in_flight
+        self.base_url = base_url
+        self.transport = transport
+        self._client = None
+        self._http_client = None
+        self._semaphore = asyncio.Semaphore(max_in_flight)
+        self.in_flight = 0
+        self.waiting = 0
+        self.acquired = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def get_client(self):
+        """Return the shared AsyncOpenAI client, creating it on first use."""
+        if self._client is None:
+            api_key = os.getenv("OPENAI_API_KEY")
+            if not api_key:
+                raise ValueError("OPENAI_API_KEY environment variable is required")
+
+            import httpx
+            from openai import AsyncOpenAI
+
+            self._http_client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_keepalive_connections,
+                    keepalive_expiry=self.keepalive_expiry,
+                ),
+                transport=self.transport,
+            )
+            self._client = AsyncOpenAI(api_key=api_key, base_url=self.base_url, http_client=self._http_client)
+        return self._client
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Hold one of the max_in_flight upstream slots, recording how long the caller queued."""
+        semaphore = self._semaphore
+        started = time.perf_counter()
+        self.waiting += 1
+        try:
+            await semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        waited = time.perf_counter() - started
+        self.acquired += 1
+        self.total_wait_seconds += waited
+        self.max_wait_seconds = max(self.max_wait_seconds, waited)
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            semaphore.release()
+
+    async def aclose(self) -> None:
+        """Close the pooled connections; the next use builds a fresh client."""
+        if self._http_client is not None:
+            await self._http_client.aclose()
+        self._client = None
+        self._http_client = None
+        self._semaphore = asyncio.Semaphore(self.max_in_flight)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return pool settings and upstream queueing counters."""
+        return {
+            "connected": self._client is not None,
+            "max_connections": self.max_connections,
+            "max_keepalive_connections": self.max_keepalive_connections,
+            "keepalive_expiry": self.keepalive_expiry,
+            "max_in_flight": self.max_in_flight,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "acquired": self.acquired,
+            "avg_wait_seconds": round(self.total_wait_seconds / self.acquired, 6) if self.acquired else 0.0,
+            "max_wait_seconds": round(self.max_wait_seconds, 6),
+        }
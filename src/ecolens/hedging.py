@@ -0,0 +1,124 @@
+"""Hedged requests for upstream calls with a long latency tail.
+
+If a call has not finished after a rolling percentile of recent call
+latencies, an identical second call is started; whichever succeeds first
+wins and the other is cancelled. Hedges are paid for from a token bucket
+refilled by every call, which caps them at ``max_ratio`` of all calls.
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class Hedger:
+    """Runs calls with an optional hedge after the rolling ``percentile`` of recent latencies."""
+
+    def __init__(
+        self,
+        enabled: bool = False,
+        percentile: float = 0.9,
+        window: int = 200,
+        min_samples: int = 20,
+        min_delay: float = 0.5,
+        max_ratio: float = 0.1,
+        burst: float = 10.0,
+    ):
+        self.enabled = enabled
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.max_ratio = max_ratio
+        self.burst = burst
+        self._latencies = deque(maxlen=window)
+        self._tokens = burst
+        self.calls = 0
+        self.hedges_issued = 0
+        self.hedges_won = 0
+        self.skipped_budget = 0
+        self.skipped_saturated = 0
+
+    def hedge_delay(self) -> Optional[float]:
+        """Seconds to wait before hedging, or None until enough latencies have been observed."""
+        if len(self._latencies) < self.min_samples:
+            return None
+        ordered = sorted(self._latencies)
+        index = min(len(ordered) - 1, int(self.percentile * len(ordered)))
+        return max(self.min_delay, ordered[index])
+
+    def _timed(self, fn: Callable[[], Awaitable[T]]) -> "asyncio.Task[T]":
+        async def call() -> T:
+            started = time.perf_counter()
+            try:
+                result = await fn()
+            except asyncio.CancelledError:
+                # A cancelled loser was the slow call; leaving it out would bias the window
+                # low, so its elapsed time goes in as a lower bound of its latency
+                self._latencies.append(time.perf_counter() - started)
+                raise
+            self._latencies.append(time.perf_counter() - started)
+            return result
+        return asyncio.ensure_future(call())
+
+    async def run(self, fn: Callable[[], Awaitable[T]], can_hedge: Callable[[], bool] = lambda: True) -> T:
+        """Await fn(), hedging it with a second fn() if it is slow and the budget allows.
+
+        ``can_hedge`` is checked when the hedge would fire, so callers can
+        refuse hedges while the upstream is saturated. A failed call never
+        wins over one still in flight; if both fail, the first error is raised.
+        """
+        self.calls += 1
+        self._tokens = min(self.burst, self._tokens + self.max_ratio)
+        delay = self.hedge_delay() if self.enabled else None
+
+        primary = self._timed(fn)
+        if delay is None:
+            return await primary
+
+        pending = {primary}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=delay)
+            if done:
+                return primary.result()
+
+            if self._tokens < 1:
+                self.skipped_budget += 1
+                return await primary
+            if not can_hedge():
+                self.skipped_saturated += 1
+                return await primary
+            self._tokens -= 1
+            self.hedges_issued += 1
+            hedge = self._timed(fn)
+            pending = {primary, hedge}
+
+            first_error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self.hedges_won += 1
+                        return task.result()
+                    first_error = first_error or task.exception()
+            raise first_error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        delay = self.hedge_delay()
+        return {
+            "enabled": self.enabled,
+            "percentile": self.percentile,
+            "hedge_delay_seconds": round(delay, 4) if delay is not None else None,
+            "max_ratio": self.max_ratio,
+            "calls": self.calls,
+            "hedges_issued": self.hedges_issued,
+            "hedges_won": self.hedges_won,
+            "skipped_budget": self.skipped_budget,
+            "skipped_saturated": self.skipped_saturated,
+        }
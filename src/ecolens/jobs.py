@@ -0,0 +1,338 @@
+"""Durable job queue for asynchronous analyses.
+
+Jobs and their items live in a SQLite database (WAL mode), so queued work
+survives restarts. Workers claim one item at a time in an immediate
+transaction and hold it under a lease; an item whose worker died (or whose
+process restarted) becomes claimable again once its lease expires.
+Completions are conditional on the claim they belong to, so a late or
+duplicate completion from a lost worker cannot overwrite a newer attempt.
+"""
+
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+# Item states; success, fallback and failed are terminal
+QUEUED, RUNNING, SUCCESS, FALLBACK, FAILED = "queued", "running", "success", "fallback", "failed"
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS jobs ("
+    "id TEXT PRIMARY KEY, idempotency_key TEXT UNIQUE, request_hash TEXT NOT NULL, created_at REAL NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS job_items ("
+    "seq INTEGER PRIMARY KEY AUTOINCREMENT, job_id TEXT NOT NULL, position INTEGER NOT NULL, "
+    "item_name TEXT NOT NULL, status TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0, "
+    "available_at REAL NOT NULL, lease_expires_at REAL, result TEXT, error TEXT, updated_at REAL NOT NULL, "
+    "UNIQUE (job_id, position))",
+    "CREATE INDEX IF NOT EXISTS job_items_claimable ON job_items (status, available_at)",
+)
+
+
+class IdempotencyConflict(Exception):
+    """An idempotency key was reused with a different request."""
+
+
+class JobStore:
+    """SQLite-backed store of jobs and their per-item work."""
+
+    def __init__(self, path: str, lease_seconds: float = 120.0, retention_seconds: float = 7 * 24 * 3600):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.retention_seconds = retention_seconds
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._db is None:
+            db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute("PRAGMA busy_timeout=5000")
+            for statement in _SCHEMA:
+                db.execute(statement)
+            self._db = db
+        return self._db
+
+    def _transaction(self, fn: Callable[[sqlite3.Connection], Any]) -> Any:
+        """Run fn inside BEGIN IMMEDIATE, so concurrent claimers (even in other processes) serialize."""
+        with self._lock:
+            db = self._connect()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn(db)
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            db.execute("COMMIT")
+            return result
+
+    def enqueue(self, item_names: List[str], idempotency_key: Optional[str] = None) -> Tuple[str, bool]:
+        """Create a job for item_names; return (job id, created).
+
+        Repeating a request with the same idempotency key returns the original
+        job instead of creating a new one; reusing the key for different items
+        raises IdempotencyConflict.
+        """
+        request_hash = hashlib.sha256(json.dumps(item_names).encode("utf-8")).hexdigest()
+
+        def create(db: sqlite3.Connection) -> Tuple[str, bool]:
+            if idempotency_key is not None:
+                row = db.execute(
+                    "SELECT id, request_hash FROM jobs WHERE idempotency_key = ?", (idempotency_key,)
+                ).fetchone()
+                if row is not None:
+                    if row[1] != request_hash:
+                        raise IdempotencyConflict(f"Idempotency key {idempotency_key!r} was used for a different job")
+                    return row[0], False
+            job_id = uuid.uuid4().hex
+            now = time.time()
+            db.execute(
+                "INSERT INTO jobs (id, idempotency_key, request_hash, created_at) VALUES (?, ?, ?, ?)",
+                (job_id, idempotency_key, request_hash, now),
+            )
+            db.executemany(
+                "INSERT INTO job_items (job_id, position, item_name, status, available_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(job_id, position, name, QUEUED, now, now) for position, name in enumerate(item_names)],
+            )
+            return job_id, True
+
+        return self._transaction(create)
+
+    def claim(self, max_attempts: int) -> Optional[Tuple[int, str, int]]:
+        """Lease the oldest available item; return (seq, item name, attempt) or None.
+
+        Items whose lease expired are claimable again, and fail for good once
+        they have used up max_attempts.
+        """
+        def claim_next(db: sqlite3.Connection) -> Optional[Tuple[int, str, int]]:
+            now = time.time()
+            db.execute(
+                "UPDATE job_items SET status = ?, error = ?, lease_expires_at = NULL, updated_at = ? "
+                "WHERE status = ? AND lease_expires_at <= ? AND attempts >= ?",
+                (FAILED, "Worker lost while processing the item", now, RUNNING, now, max_attempts),
+            )
+            row = db.execute(
+                "SELECT seq, item_name, attempts FROM job_items "
+                "WHERE (status = ? AND available_at <= ?) OR (status = ? AND lease_expires_at <= ?) "
+                "ORDER BY seq LIMIT 1",
+                (QUEUED, now, RUNNING, now),
+            ).fetchone()
+            if row is None:
+                return None
+            seq, item_name, attempt = row[0], row[1], row[2] + 1
+            db.execute(
+                "UPDATE job_items SET status = ?, attempts = ?, lease_expires_at = ?, updated_at = ? WHERE seq = ?",
+                (RUNNING, attempt, now + self.lease_seconds, now, seq),
+            )
+            return seq, item_name, attempt
+
+        return self._transaction(claim_next)
+
+    def complete(self, seq: int, attempt: int, status: str, data: Optional[Dict[str, Any]] = None,
+                 error: Optional[str] = None) -> bool:
+        """Record the terminal outcome of a claimed item; False if the claim was superseded."""
+        with self._lock:
+            return self._connect().execute(
+                "UPDATE job_items SET status = ?, result = ?, error = ?, lease_expires_at = NULL, updated_at = ? "
+                "WHERE seq = ? AND status = ? AND attempts = ?",
+                (status, json.dumps(data) if data is not None else None, error, time.time(), seq, RUNNING, attempt),
+            ).rowcount > 0
+
+    def retry(self, seq: int, attempt: int, delay: float, error: Optional[str] = None) -> bool:
+        """Put a claimed item back in the queue after delay seconds; False if the claim was superseded."""
+        now = time.time()
+        with self._lock:
+            return self._connect().execute(
+                "UPDATE job_items SET status = ?, error = ?, available_at = ?, lease_expires_at = NULL, updated_at = ? "
+                "WHERE seq = ? AND status = ? AND attempts = ?",
+                (QUEUED, error, now + delay, now, seq, RUNNING, attempt),
+            ).rowcount > 0
+
+    def release(self, seq: int, attempt: int) -> bool:
+        """Return a claimed item to the queue without counting the attempt (graceful shutdown)."""
+        with self._lock:
+            return self._connect().execute(
+                "UPDATE job_items SET status = ?, attempts = attempts - 1, lease_expires_at = NULL, updated_at = ? "
+                "WHERE seq = ? AND status = ? AND attempts = ?",
+                (QUEUED, time.time(), seq, RUNNING, attempt),
+            ).rowcount > 0
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return a job with its progress and per-item results, or None."""
+        with self._lock:
+            db = self._connect()
+            job = db.execute("SELECT created_at FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if job is None:
+                return None
+            rows = db.execute(
+                "SELECT item_name, status, attempts, result, error FROM job_items WHERE job_id = ? ORDER BY position",
+                (job_id,),
+            ).fetchall()
+
+        progress = {"total": len(rows), "completed": 0, QUEUED: 0, RUNNING: 0, SUCCESS: 0, FALLBACK: 0, FAILED: 0}
+        results = []
+        for item_name, status, attempts, result, error in rows:
+            progress[status] += 1
+            results.append({
+                "item_name": item_name,
+                "status": status,
+                "attempts": attempts,
+                "data": json.loads(result) if result is not None else None,
+                "error": error,
+            })
+        progress["completed"] = progress[SUCCESS] + progress[FALLBACK] + progress[FAILED]
+
+        if progress["completed"] == progress["total"]:
+            status = "completed"
+        elif progress[QUEUED] == progress["total"]:
+            status = QUEUED
+        else:
+            status = RUNNING
+        return {"job_id": job_id, "status": status, "created_at": job[0], "progress": progress, "results": results}
+
+    def purge(self) -> int:
+        """Delete finished jobs older than the retention period; return how many were removed."""
+        cutoff = time.time() - self.retention_seconds
+
+        def delete_old(db: sqlite3.Connection) -> int:
+            old_jobs = "SELECT id FROM jobs WHERE created_at < ? AND id NOT IN " \
+                       "(SELECT job_id FROM job_items WHERE status IN (?, ?))"
+            params = (cutoff, QUEUED, RUNNING)
+            db.execute(f"DELETE FROM job_items WHERE job_id IN ({old_jobs})", params)
+            return db.execute(f"DELETE FROM jobs WHERE id IN ({old_jobs})", params).rowcount
+
+        return self._transaction(delete_old)
+
+    def counts(self) -> Dict[str, int]:
+        """Number of job items in each state."""
+        with self._lock:
+            rows = self._connect().execute("SELECT status, COUNT(*) FROM job_items GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+    def stats(self) -> Dict[str, Any]:
+        """Item counts by state plus queue settings."""
+        with self._lock:
+            jobs = self._connect().execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+        return {
+            "jobs": jobs,
+            "items": self.counts(),
+            "path": self.path,
+            "lease_seconds": self.lease_seconds,
+            "retention_seconds": self.retention_seconds,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+# A handler analyzes one item name and returns (terminal status, result data)
+JobHandler = Callable[[str], Awaitable[Tuple[str, Dict[str, Any]]]]
+
+
+class JobWorkers:
+    """Pool of asyncio workers draining a JobStore.
+
+    A handler outcome of "fallback" (the upstream analysis failed and generic
+    data was substituted) and handler exceptions are retried after
+    ``retry_delay`` seconds until ``max_attempts`` is reached; the last outcome
+    is then recorded as final. ``on_complete(status, data)`` is called once
+    per item, when its final outcome with data has been stored.
+    """
+
+    def __init__(self, store: JobStore, handler: JobHandler, concurrency: int = 4, poll_interval: float = 1.0,
+                 item_timeout: float = 60.0, max_attempts: int = 3, retry_delay: float = 5.0,
+                 on_complete: Optional[Callable[[str, Dict[str, Any]], None]] = None):
+        self.store = store
+        self.handler = handler
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.item_timeout = item_timeout
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.on_complete = on_complete
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self.processed = 0
+        self.retried = 0
+
+    def start(self) -> None:
+        """Start the workers on the running event loop."""
+        if self._tasks:
+            return
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.concurrency)]
+
+    async def stop(self) -> None:
+        """Cancel the workers and return the items they held to the queue."""
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def notify(self) -> None:
+        """Wake idle workers after new items were enqueued."""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _work(self) -> None:
+        while True:
+            try:
+                # SQLite may wait on other processes' locks (busy_timeout); keep that off the event loop
+                claim = await asyncio.to_thread(self.store.claim, self.max_attempts)
+            except sqlite3.Error as e:
+                print(f"Job queue claim failed: {e}")
+                claim = None
+            if claim is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._process(*claim)
+
+    async def _process(self, seq: int, item_name: str, attempt: int) -> None:
+        try:
+            status, data = await asyncio.wait_for(self.handler(item_name), timeout=self.item_timeout)
+            error = None
+        except asyncio.TimeoutError:
+            status, data, error = FAILED, None, "Timed out"
+        except asyncio.CancelledError:
+            try:
+                await asyncio.to_thread(self.store.release, seq, attempt)
+            except sqlite3.Error:
+                pass  # the lease expires and another worker retries the item
+            raise
+        except Exception as e:
+            status, data, error = FAILED, None, str(e)
+
+        try:
+            if status != SUCCESS and attempt < self.max_attempts:
+                await asyncio.to_thread(self.store.retry, seq, attempt, self.retry_delay * attempt, error)
+                self.retried += 1
+            else:
+                stored = await asyncio.to_thread(self.store.complete, seq, attempt, status, data, error)
+                self.processed += 1
+                # A superseded attempt's outcome was not stored, so it is not reported either
+                if stored and data is not None and self.on_complete is not None:
+                    self.on_complete(status, data)
+        except sqlite3.Error as e:
+            # The lease expires and another attempt picks the item up
+            print(f"Job queue update failed for {item_name}: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": len(self._tasks),
+            "processed": self.processed,
+            "retried": self.retried,
+            "max_attempts": self.max_attempts,
+            "item_timeout": self.item_timeout,
+        }
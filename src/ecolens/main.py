@@ -3,357 +3,468 @@
 
 import os
 import json
-import re
-from typing import Dict, Any, Optional
-from fastapi import FastAPI, HTTPException
+import asyncio
+import hashlib
+import sqlite3
+import tempfile
+import time
+import weakref
+from contextlib import asynccontextmanager
+from typing import Annotated, AsyncIterator, Dict, Any, List, Optional, Tuple
+from fastapi import APIRouter, FastAPI, HTTPException, Depends, Header, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
-from pydantic import BaseModel
-from openai import AsyncOpenAI
-from dotenv import load_dotenv
-
-# Load environment variables from .env file
-load_dotenv()
-
-app = FastAPI(
-    title="EcoLens API",
-    description="AI-powered Sustainability Lifecycle Tracker API",
-    version="1.0.0"
+from fastapi.responses import FileResponse, PlainTextResponse, Response, StreamingResponse
+from pydantic import BaseModel, StringConstraints
+
+if __name__ == "__main__" and not __package__:
+    # Run as a file path, the package-relative imports below cannot resolve
+    raise SystemExit("ecolens.main is part of the ecolens package; run it as a module: "
+                     "python -m ecolens.main or python -m ecolens.serve (with src on PYTHONPATH), or python run.py")
+
+from .admission import BULK, AdmissionController, AdmissionRejected, AdmissionTicket, parse_priority
+from .analytics import AnalyticsLog
+from .breaker import CLOSED, STATE_CODES, CircuitBreaker, CircuitOpenError, classify_failure
+from .cache import ResultCache, normalize_item_name
+from .client import OpenAIClientManager
+from .hedging import Hedger
+from .jobs import FALLBACK, IdempotencyConflict, JobStore, JobWorkers
+from .metrics import (
+    analysis_fallbacks, catalog_lookups, degraded_responses, event_loop_lag, http_in_flight, http_request_duration,
+    http_requests, record_usage, registry, stage, upstream_request_duration, upstream_requests
+)
+from .parsing import (
+    ANALYSIS_RESPONSE_FORMAT, decode_first_object, parse_analysis_response, parse_reported_metrics, parse_stats,
+    resolve_metrics
 )
+from .responses import FastJSONResponse
+from .popularity import PopularityTracker, PopularRefresher
+from .profiling import LoopLagMonitor, SlowRequestProfiler
+from .prompts import PROMPT_VARIANTS, STORY_MAX_TOKENS, STREAM_METRICS_MARKER, build_messages
+from .scoring import environmental_impact_score, sustainability_score
+from .singleflight import SingleFlight
+from .timing import record_phase, server_timing_header, start_request
 
-# Configure CORS
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+def is_production() -> bool:
+    """Whether we are running as a production deployment (Vercel or ECOLENS_ENV)."""
+    return "production" in (os.getenv("VERCEL_ENV"), os.getenv("ECOLENS_ENV"))
+
+# Load environment variables from .env file (production reads its environment directly)
+if not is_production():
+    from dotenv import load_dotenv
+    load_dotenv()
+
+# Pooled OpenAI client shared by every request in this worker
+openai_clients = OpenAIClientManager(
+    max_connections=int(os.getenv("ECOLENS_OPENAI_MAX_CONNECTIONS", "100")),
+    max_keepalive_connections=int(os.getenv("ECOLENS_OPENAI_MAX_KEEPALIVE", "20")),
+    keepalive_expiry=float(os.getenv("ECOLENS_OPENAI_KEEPALIVE_SECONDS", "30")),
+    max_in_flight=int(os.getenv("ECOLENS_OPENAI_MAX_IN_FLIGHT", "32")),
+    base_url=os.getenv("OPENAI_BASE_URL") or None,
 )
 
-# Mount static files
-import os
-static_dir = os.path.join(os.path.dirname(__file__), "static")
-app.mount("/static", StaticFiles(directory=static_dir), name="static")
+# Optional hedging of slow upstream analyses after the rolling percentile of recent latencies
+upstream_hedger = Hedger(
+    enabled=os.getenv("ECOLENS_HEDGE_ENABLED", "false").lower() in ("1", "true", "yes"),
+    percentile=float(os.getenv("ECOLENS_HEDGE_PERCENTILE", "0.9")),
+    window=int(os.getenv("ECOLENS_HEDGE_WINDOW", "200")),
+    min_delay=float(os.getenv("ECOLENS_HEDGE_MIN_DELAY_SECONDS", "0.5")),
+    max_ratio=float(os.getenv("ECOLENS_HEDGE_MAX_RATIO", "0.1")),
+)
+
+# Circuit breaker around upstream calls; while open, analyses are answered from degraded sources at once
+upstream_breaker = CircuitBreaker(
+    enabled=os.getenv("ECOLENS_BREAKER_ENABLED", "true").lower() in ("1", "true", "yes"),
+    failure_threshold=float(os.getenv("ECOLENS_BREAKER_FAILURE_RATE", "0.5")),
+    min_calls=int(os.getenv("ECOLENS_BREAKER_MIN_CALLS", "10")),
+    window_seconds=float(os.getenv("ECOLENS_BREAKER_WINDOW_SECONDS", "30")),
+    max_consecutive_failures=int(os.getenv("ECOLENS_BREAKER_CONSECUTIVE_FAILURES", "5")),
+    open_seconds=float(os.getenv("ECOLENS_BREAKER_OPEN_SECONDS", "15")),
+)
+
+# Prompt layout and story length: "split" keeps the instructions in a static system prefix (too
+# short for upstream caching so far); "legacy" is the original single user message. "short"
+# stories use a smaller token budget, the one setting here that reduces cost.
+PROMPT_VARIANT = os.getenv("ECOLENS_PROMPT_VARIANT", "split")
+STORY_MODE = os.getenv("ECOLENS_STORY_MODE", "full")
+if PROMPT_VARIANT not in PROMPT_VARIANTS:
+    raise ValueError(f"ECOLENS_PROMPT_VARIANT must be one of {', '.join(PROMPT_VARIANTS)}")
+if STORY_MODE not in STORY_MAX_TOKENS:
+    raise ValueError(f"ECOLENS_STORY_MODE must be one of {', '.join(STORY_MAX_TOKENS)}")
+MAX_TOKENS = int(os.getenv("ECOLENS_MAX_TOKENS", str(STORY_MAX_TOKENS[STORY_MODE])))
+
+# Append-only log of every served analysis, aggregated for GET /api/stats (empty path disables it)
+analytics_log = AnalyticsLog(
+    path=os.getenv("ECOLENS_ANALYTICS_PATH", os.path.join(tempfile.gettempdir(), "ecolens_analytics")) or None,
+    flush_interval=float(os.getenv("ECOLENS_ANALYTICS_FLUSH_SECONDS", "1")),
+)
 
-# Initialize OpenAI client
+# Admission control for analysis requests: concurrency cap, bounded two-lane queue, queue deadline
+analysis_admission = AdmissionController(
+    max_concurrent=int(os.getenv("ECOLENS_ADMISSION_MAX_CONCURRENT", "64")),
+    max_queue=int(os.getenv("ECOLENS_ADMISSION_MAX_QUEUE", "128")),
+    queue_timeout=float(os.getenv("ECOLENS_ADMISSION_QUEUE_TIMEOUT_SECONDS", "10")),
+)
+# Lane for requests without a priority hint; the bundled UI marks its requests interactive
+DEFAULT_PRIORITY = parse_priority(os.getenv("ECOLENS_ADMISSION_DEFAULT_PRIORITY"), BULK)
+
+# Request diagnostics: Server-Timing phases, opt-in profiles of slow requests, event-loop lag
+SERVER_TIMING = os.getenv("ECOLENS_SERVER_TIMING", "true").lower() in ("1", "true", "yes")
+slow_request_profiler = SlowRequestProfiler(
+    directory=os.getenv("ECOLENS_PROFILE_DIR") or None,
+    threshold=float(os.getenv("ECOLENS_PROFILE_THRESHOLD_MS", "1000")) / 1000,
+    interval=float(os.getenv("ECOLENS_PROFILE_INTERVAL_MS", "5")) / 1000,
+    max_files=int(os.getenv("ECOLENS_PROFILE_MAX_FILES", "100")),
+)
+loop_lag_monitor = LoopLagMonitor(
+    interval=float(os.getenv("ECOLENS_LOOP_LAG_INTERVAL_MS", "100")) / 1000,
+    threshold=float(os.getenv("ECOLENS_LOOP_LAG_THRESHOLD_MS", "100")) / 1000,
+    on_lag=event_loop_lag.observe,
+)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Own application-lifetime resources: job workers, diagnostics, the popular item refresher and the upstream pool."""
+    loop_lag_monitor.start()
+    slow_request_profiler.start()
+    # The store's setup may wait on other workers' locks; do it before requests arrive, off the loop
+    await asyncio.to_thread(result_cache.open)
+    if JOB_WORKERS > 0:
+        try:
+            purged = await asyncio.to_thread(job_store.purge)
+            if purged:
+                print(f"Purged {purged} finished jobs past retention")
+            job_workers.start()
+        except sqlite3.Error as e:
+            print(f"Job workers disabled ({job_store.path}): {e}")
+    popular_refresher.start()
+    yield
+    await popular_refresher.stop()
+    await job_workers.stop()
+    await loop_lag_monitor.stop()
+    slow_request_profiler.stop()
+    analytics_log.close()
+    await openai_clients.aclose()
+
+# Shared OpenAI client
 def get_openai_client():
-    """Initialize OpenAI client with API key."""
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        raise ValueError("OPENAI_API_KEY environment variable is required")
-    return AsyncOpenAI(api_key=api_key)
+    """Return the pooled OpenAI client for this worker."""
+    return openai_clients.get_client()
+
+# Result cache (in-process LRU backed by an on-disk SQLite store shared by every worker process)
+result_cache = ResultCache(
+    max_entries=int(os.getenv("ECOLENS_CACHE_MAX_ENTRIES", "1024")),
+    ttl_seconds=float(os.getenv("ECOLENS_CACHE_TTL_SECONDS", str(7 * 24 * 3600))),
+    path=os.getenv("ECOLENS_CACHE_PATH", os.path.join(tempfile.gettempdir(), "ecolens_cache.sqlite3")) or None,
+    sync_interval=float(os.getenv("ECOLENS_CACHE_SYNC_SECONDS", "1")),
+    stale_seconds=float(os.getenv("ECOLENS_CACHE_STALE_SECONDS", str(30 * 24 * 3600))),
+    # Longest wait on another worker's write lock before a lookup counts as a miss
+    busy_timeout=float(os.getenv("ECOLENS_CACHE_BUSY_TIMEOUT_SECONDS", "0.05")),
+)
+
+# Registry of in-flight upstream analyses, so identical concurrent requests share one call
+inflight_analyses = SingleFlight()
+
+# Expired results are served this long past expiry while a background refresh runs (0 disables)
+CACHE_SWR_SECONDS = float(os.getenv("ECOLENS_CACHE_SWR_SECONDS", "86400"))
+
+# Decayed request counts per item; the refresher keeps the top items' cached results fresh
+popularity = PopularityTracker(
+    half_life_seconds=float(os.getenv("ECOLENS_POPULARITY_HALF_LIFE_SECONDS", "3600")),
+    max_items=int(os.getenv("ECOLENS_POPULARITY_MAX_ITEMS", "10000")),
+)
+
+# Bounded fan-out for batch analyses, shared by every batch request
+BATCH_MAX_ITEMS = int(os.getenv("ECOLENS_BATCH_MAX_ITEMS", "1000"))
+BATCH_ITEM_TIMEOUT_SECONDS = float(os.getenv("ECOLENS_BATCH_ITEM_TIMEOUT_SECONDS", "60"))
+batch_semaphore = asyncio.Semaphore(int(os.getenv("ECOLENS_BATCH_CONCURRENCY", "8")))
+
+# Export the subsystem counters at /metrics, read at scrape time
+registry.gauge(
+    "ecolens_upstream_in_flight", "Upstream OpenAI calls currently holding a slot."
+).set_function(lambda: openai_clients.in_flight)
+registry.gauge(
+    "ecolens_upstream_queue_waiting", "Calls waiting for an upstream slot."
+).set_function(lambda: openai_clients.waiting)
+registry.counter(
+    "ecolens_upstream_queue_wait_seconds_total", "Total time spent waiting for upstream slots."
+).set_function(lambda: openai_clients.total_wait_seconds)
+registry.counter(
+    "ecolens_cache_lookups_total", "Result cache lookups by outcome.", ("result",)
+).set_function(lambda: {
+    ("memory_hit",): result_cache.memory_hits,
+    ("disk_hit",): result_cache.disk_hits,
+    ("miss",): result_cache.misses
+})
+registry.counter(
+    "ecolens_cache_evictions_total", "Entries dropped from the in-process cache by reason.", ("reason",)
+).set_function(lambda: {("capacity",): result_cache.evictions, ("expired",): result_cache.expirations})
+registry.counter(
+    "ecolens_coalesced_requests_total", "Analyses that joined an identical in-flight upstream call."
+).set_function(lambda: inflight_analyses.coalesced)
+registry.counter(
+    "ecolens_upstream_hedges_total", "Hedged (duplicate) upstream calls issued after the latency percentile."
+).set_function(lambda: upstream_hedger.hedges_issued)
+registry.counter(
+    "ecolens_upstream_hedge_wins_total", "Hedged upstream calls that answered before the original call."
+).set_function(lambda: upstream_hedger.hedges_won)
+registry.counter(
+    "ecolens_upstream_hedges_skipped_total", "Hedges not issued, by reason.", ("reason",)
+).set_function(lambda: {("budget",): upstream_hedger.skipped_budget, ("saturated",): upstream_hedger.skipped_saturated})
+registry.gauge(
+    "ecolens_upstream_hedge_delay_seconds", "Current hedge delay (rolling latency percentile)."
+).set_function(upstream_hedger.hedge_delay)
+registry.gauge(
+    "ecolens_upstream_breaker_state", "Upstream circuit breaker state (0 closed, 1 half-open, 2 open)."
+).set_function(lambda: STATE_CODES[upstream_breaker.state])
+registry.counter(
+    "ecolens_upstream_breaker_opened_total", "Times the upstream circuit breaker opened."
+).set_function(lambda: upstream_breaker.times_opened)
+registry.counter(
+    "ecolens_upstream_breaker_rejected_total", "Upstream calls rejected by the open circuit breaker."
+).set_function(lambda: upstream_breaker.rejected)
+registry.gauge(
+    "ecolens_admission_active", "Analysis requests holding an admission slot."
+).set_function(lambda: analysis_admission.active)
+registry.gauge(
+    "ecolens_admission_queued", "Analysis requests waiting for admission by priority lane.", ("priority",)
+).set_function(lambda: {(priority,): count for priority, count in analysis_admission.stats()["queued"].items()})
+registry.counter(
+    "ecolens_admission_rejected_total", "Analysis requests turned away by reason (queue_full, queue_timeout, shed).", ("reason",)
+).set_function(lambda: {(reason,): count for reason, count in analysis_admission.rejected.items()})
+registry.counter(
+    "ecolens_cache_refreshes_total", "Background re-analyses by trigger (warmup, popular, stale).", ("trigger",)
+).set_function(lambda: {(trigger,): count for trigger, count in popular_refresher.refreshed.items()})
+registry.gauge(
+    "ecolens_popularity_tracked_items", "Item names with a decayed popularity count."
+).set_function(lambda: len(popularity))
+registry.counter(
+    "ecolens_analytics_records_total", "Served analyses appended to the analytics log by this process."
+).set_function(lambda: analytics_log.appended)
+registry.counter(
+    "ecolens_event_loop_stalls_total", "Event loop wake-ups later than ECOLENS_LOOP_LAG_THRESHOLD_MS."
+).set_function(lambda: loop_lag_monitor.stalls)
+registry.counter(
+    "ecolens_slow_request_profiles_total", "Stack profiles written for requests over the profiling threshold."
+).set_function(lambda: slow_request_profiler.profiles_written)
+registry.counter(
+    "ecolens_parse_events_total", "Completion parsing outcomes and metric recoveries.", ("event",)
+).set_function(lambda: {(event,): count for event, count in parse_stats.stats().items()})
+
+# Durable job queue (POST /api/jobs), drained by workers started in the lifespan
+JOB_WORKERS = int(os.getenv("ECOLENS_JOBS_WORKERS", "4"))
+job_store = JobStore(
+    path=os.getenv("ECOLENS_JOBS_PATH", os.path.join(tempfile.gettempdir(), "ecolens_jobs.sqlite3")),
+    lease_seconds=float(os.getenv("ECOLENS_JOBS_LEASE_SECONDS", "120")),
+    retention_seconds=float(os.getenv("ECOLENS_JOBS_RETENTION_SECONDS", str(7 * 24 * 3600))),
+)
+def job_item_counts() -> Dict[Tuple[str], int]:
+    """Job items by status for the gauge; nothing while the job database is unavailable."""
+    try:
+        return {(status,): count for status, count in job_store.counts().items()}
+    except sqlite3.Error:
+        return {}
+
+registry.gauge(
+    "ecolens_job_items", "Queued job items by status.", ("status",)
+).set_function(job_item_counts)
+
+# HTTP caching of GET /api/items/{item_name} by browsers, CDNs and reverse proxies
+HTTP_CACHE_MAX_AGE = int(os.getenv("ECOLENS_HTTP_CACHE_MAX_AGE", "3600"))
+HTTP_CACHE_STALE_SECONDS = int(os.getenv("ECOLENS_HTTP_CACHE_STALE_SECONDS", "86400"))
+
+# Precomputed product catalog, consulted before the model when ECOLENS_CATALOG_PATH is set
+CATALOG_PATH = os.getenv("ECOLENS_CATALOG_PATH")
+CATALOG_THRESHOLD = float(os.getenv("ECOLENS_CATALOG_THRESHOLD", "0.8"))
+# Looser match accepted when the upstream is unavailable, before resorting to generic fallback data
+DEGRADED_CATALOG_THRESHOLD = float(os.getenv("ECOLENS_DEGRADED_CATALOG_THRESHOLD", "0.75"))
+_catalog = None
+_catalog_failed = False
+
+def get_catalog():
+    """Memory-map the product catalog on first use; None when not configured or unreadable."""
+    global _catalog, _catalog_failed
+    if _catalog is None and CATALOG_PATH and not _catalog_failed:
+        try:
+            from .catalog import Catalog
+            _catalog = Catalog(CATALOG_PATH)
+            print(f"Loaded product catalog with {len(_catalog)} entries from {CATALOG_PATH}")
+        except (OSError, ValueError) as e:
+            print(f"Product catalog disabled ({CATALOG_PATH}): {e}")
+            _catalog_failed = True
+    return _catalog
+
+router = APIRouter()
+
+async def record_request_metrics(request: Request, call_next):
+    """Count requests, observe latency per route template and report phase timings."""
+    http_in_flight.inc()
+    started = slow_request_profiler.request_started()
+    # Phases recorded by the handler (and tasks it starts) land in this dict
+    phases = start_request()
+    status = "500"
+    try:
+        response = await call_next(request)
+        status = str(response.status_code)
+        if SERVER_TIMING:
+            # Streaming responses only report the phases finished before their headers are sent
+            response.headers["Server-Timing"] = server_timing_header(phases, time.perf_counter() - started)
+        return response
+    finally:
+        http_in_flight.dec()
+        route = getattr(request.scope.get("route"), "path", "unmatched")
+        http_requests.inc(1, request.method, route, status)
+        http_request_duration.observe(time.perf_counter() - started, request.method, route)
+        slow_request_profiler.request_finished(started, f"{request.method} {request.url.path}", phases)
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Guard admin endpoints with the ECOLENS_ADMIN_TOKEN shared secret."""
+    admin_token = os.getenv("ECOLENS_ADMIN_TOKEN")
+    if not admin_token:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled (ECOLENS_ADMIN_TOKEN not set)")
+    if x_admin_token != admin_token:
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+def request_priority(request: Request) -> str:
+    """Admission lane from the X-EcoLens-Priority header or ?priority= (EventSource cannot set headers)."""
+    hint = request.headers.get("x-ecolens-priority") or request.query_params.get("priority")
+    return parse_priority(hint, DEFAULT_PRIORITY)
+
+async def admit_analysis(priority: str) -> AdmissionTicket:
+    """Wait for an analysis slot; over capacity, fail fast with 429/503 and Retry-After."""
+    started = time.perf_counter()
+    try:
+        return await analysis_admission.acquire(priority)
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=f"Server is busy ({e.reason.replace('_', ' ')}), please retry later",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    finally:
+        record_phase("admission_wait", time.perf_counter() - started)
 
 class ItemAnalysisRequest(BaseModel):
     item_name: str
 
+class AnalysisData(BaseModel):
+    item_name: str
+    sustainability_score: int  # 1-10, higher is better
+    environmental_impact_score: int  # 1-10, higher is better for the environment
+    carbon_footprint_kg: float
+    water_usage_liters: float
+    landfill_years: float
+    recyclability: float  # percent
+    story: str
+    source: str = "model"  # "model", "catalog", "stale_cache" or "fallback"
+    matched_item: Optional[str] = None  # catalog entry a "catalog" answer was taken from
+
 class ItemAnalysisResponse(BaseModel):
     success: bool
     message: str
-    data: Dict[str, Any]
+    data: AnalysisData
+    degraded: bool = False  # answered without the model (stale cache, looser catalog match or fallback data)
 
-def extract_metrics_from_story(story_text: str) -> Dict[str, Any]:
-    """Extract environmental metrics from the AI-generated story."""
-    metrics = {
-        "carbon_footprint_kg": 5.0,
-        "water_usage_liters": 500.0,
-        "landfill_years": 50.0,
-        "recyclability": 50.0
-    }
-    
-    # Extract carbon footprint
-    carbon_match = re.search(r'(\d+(?:\.\d+)?)\s*kg\s*CO2', story_text, re.IGNORECASE)
-    if carbon_match:
-        metrics["carbon_footprint_kg"] = float(carbon_match.group(1))
-    
-    # Extract water usage
-    water_match = re.search(r'(\d+(?:,\d+)?)\s*liters?\s*water', story_text, re.IGNORECASE)
-    if water_match:
-        water_str = water_match.group(1).replace(',', '')
-        metrics["water_usage_liters"] = float(water_str)
-    
-    # Extract landfill time
-    landfill_match = re.search(r'(\d+(?:\.\d+)?)\s*years?\s*landfill', story_text, re.IGNORECASE)
-    if landfill_match:
-        metrics["landfill_years"] = float(landfill_match.group(1))
-    
-    # Extract recyclability
-    recycle_match = re.search(r'(\d+(?:\.\d+)?)%\s*recyclable', story_text, re.IGNORECASE)
-    if recycle_match:
-        metrics["recyclability"] = float(recycle_match.group(1))
-    
-    return metrics
+# Blank names would still cost an upstream call each; reject them with the rest of the request (422)
+BatchItemName = Annotated[str, StringConstraints(strip_whitespace=True, min_length=1)]
 
-def calculate_sustainability_score(carbon_footprint: float, water_usage: float, landfill_years: float, recyclability: float) -> int:
-    """Calculate sustainability score (1-10) based on environmental metrics - REALISTIC & BALANCED SCORING."""
-    
-    # Carbon footprint scoring (lower is better) - REALISTIC RANGES
-    # Based on real-world data: organic produce (0.1-0.5), processed foods (0.5-2), electronics (10-50+)
-    if carbon_footprint <= 0.1:
-        carbon_score = 10  # Excellent: organic local produce
-    elif carbon_footprint <= 0.3:
-        carbon_score = 9   # Very good: most fruits/vegetables
-    elif carbon_footprint <= 0.8:
-        carbon_score = 8   # Good: grains, legumes
-    elif carbon_footprint <= 2.0:
-        carbon_score = 7   # Above average: dairy, eggs
-    elif carbon_footprint <= 5.0:
-        carbon_score = 6   # Average: meat, processed foods
-    elif carbon_footprint <= 10.0:
-        carbon_score = 5   # Below average: electronics, plastics
-    elif carbon_footprint <= 20.0:
-        carbon_score = 4   # Poor: heavy manufacturing
-    elif carbon_footprint <= 50.0:
-        carbon_score = 3   # Very poor: luxury items, cars
-    else:
-        carbon_score = 2   # Extremely poor: high-impact items
-    
-    # Water usage scoring (lower is better) - REALISTIC RANGES
-    # Based on real data: fruits (50-200L), vegetables (100-500L), meat (1000-5000L)
-    if water_usage <= 50:
-        water_score = 10   # Excellent: low-water crops
-    elif water_usage <= 150:
-        water_score = 9    # Very good: most fruits
-    elif water_usage <= 300:
-        water_score = 8    # Good: vegetables, grains
-    elif water_usage <= 600:
-        water_score = 7    # Above average: dairy
-    elif water_usage <= 1200:
-        water_score = 6    # Average: eggs, some meats
-    elif water_usage <= 3000:
-        water_score = 5    # Below average: beef, cotton
-    elif water_usage <= 8000:
-        water_score = 4    # Poor: high-water manufacturing
-    else:
-        water_score = 3    # Very poor: extremely water-intensive
-    
-    # Landfill time scoring (lower is better) - REALISTIC RANGES
-    # Organic waste (weeks-months), paper (months-years), plastic (decades-centuries)
-    if landfill_years <= 0.1:
-        landfill_score = 10  # Excellent: compostable, weeks
-    elif landfill_years <= 0.5:
-        landfill_score = 9   # Very good: paper, cardboard
-    elif landfill_years <= 2:
-        landfill_score = 8   # Good: wood, natural fibers
-    elif landfill_years <= 10:
-        landfill_score = 7   # Above average: some plastics
-    elif landfill_years <= 50:
-        landfill_score = 6   # Average: most plastics
-    elif landfill_years <= 200:
-        landfill_score = 5   # Below average: styrofoam, some plastics
-    elif landfill_years <= 500:
-        landfill_score = 4   # Poor: long-lasting plastics
-    else:
-        landfill_score = 3   # Very poor: centuries to decompose
-    
-    # Recyclability scoring (higher is better) - REALISTIC RANGES
-    # Glass/metal (90-95%), paper (70-80%), plastics (varies widely)
-    if recyclability >= 90:
-        recycle_score = 10  # Excellent: glass, aluminum
-    elif recyclability >= 80:
-        recycle_score = 9   # Very good: paper, cardboard
-    elif recyclability >= 70:
-        recycle_score = 8   # Good: steel, some plastics
-    elif recyclability >= 60:
-        recycle_score = 7   # Above average: PET plastics
-    elif recyclability >= 50:
-        recycle_score = 6   # Average: mixed plastics
-    elif recyclability >= 40:
-        recycle_score = 5   # Below average: some plastics
-    elif recyclability >= 30:
-        recycle_score = 4   # Poor: hard-to-recycle plastics
-    elif recyclability >= 20:
-        recycle_score = 3   # Very poor: composite materials
-    else:
-        recycle_score = 2   # Extremely poor: non-recyclable
-    
-    # Calculate weighted average with balanced weighting
-    weighted_score = (
-        carbon_score * 0.35 +    # Carbon footprint is most important
-        water_score * 0.25 +     # Water usage is significant
-        landfill_score * 0.25 +  # Waste impact matters
-        recycle_score * 0.15     # Recyclability is a bonus
-    )
-    
-    # Apply realistic bonuses for truly sustainable items
-    if carbon_footprint <= 0.3 and water_usage <= 200 and landfill_years <= 1:
-        weighted_score += 0.5  # Bonus for excellent overall sustainability
-    
-    # Apply realistic penalties for extremely harmful items
-    if carbon_footprint > 50 or water_usage > 10000 or landfill_years > 1000:
-        weighted_score *= 0.8  # 20% penalty for extremely bad items
-    
-    return max(1, min(10, round(weighted_score)))
+class BatchAnalysisRequest(BaseModel):
+    item_names: List[BatchItemName]
 
-def calculate_environmental_impact_score(carbon_footprint: float, water_usage: float, landfill_years: float, recyclability: float) -> int:
-    """Calculate environmental impact score (1-10) - REALISTIC scale where 10 = very good for environment, 1 = very bad."""
-    
-    # Realistic environmental impact calculation
-    # Based on real-world sustainability data and consumer expectations
-    
-    # Base score starts at 5 (neutral)
-    base_score = 5.0
-    
-    # Carbon impact (heavily weighted) - REALISTIC RANGES
-    if carbon_footprint <= 0.1:
-        carbon_impact = 2.5  # Excellent: organic produce
-    elif carbon_footprint <= 0.3:
-        carbon_impact = 2.0  # Very good: fruits/vegetables
-    elif carbon_footprint <= 0.8:
-        carbon_impact = 1.5  # Good: grains, legumes
-    elif carbon_footprint <= 2.0:
-        carbon_impact = 1.0  # Above average: dairy, eggs
-    elif carbon_footprint <= 5.0:
-        carbon_impact = 0.0  # Average: meat, processed foods
-    elif carbon_footprint <= 10.0:
-        carbon_impact = -1.0 # Below average: electronics, plastics
-    elif carbon_footprint <= 20.0:
-        carbon_impact = -2.0 # Poor: heavy manufacturing
-    elif carbon_footprint <= 50.0:
-        carbon_impact = -3.0 # Very poor: luxury items
-    else:
-        carbon_impact = -4.0 # Extremely poor: high-impact items
-    
-    # Water impact - REALISTIC RANGES
-    if water_usage <= 50:
-        water_impact = 1.5   # Excellent: low-water crops
-    elif water_usage <= 150:
-        water_impact = 1.0   # Very good: most fruits
-    elif water_usage <= 300:
-        water_impact = 0.5   # Good: vegetables, grains
-    elif water_usage <= 600:
-        water_impact = 0.0   # Above average: dairy
-    elif water_usage <= 1200:
-        water_impact = -0.5  # Average: eggs, some meats
-    elif water_usage <= 3000:
-        water_impact = -1.0  # Below average: beef, cotton
-    elif water_usage <= 8000:
-        water_impact = -1.5  # Poor: high-water manufacturing
-    else:
-        water_impact = -2.0  # Very poor: extremely water-intensive
-    
-    # Landfill impact - REALISTIC RANGES
-    if landfill_years <= 0.1:
-        landfill_impact = 1.0  # Excellent: compostable
-    elif landfill_years <= 0.5:
-        landfill_impact = 0.5  # Very good: paper, cardboard
-    elif landfill_years <= 2:
-        landfill_impact = 0.0  # Good: wood, natural fibers
-    elif landfill_years <= 10:
-        landfill_impact = -0.5 # Above average: some plastics
-    elif landfill_years <= 50:
-        landfill_impact = -1.0 # Average: most plastics
-    elif landfill_years <= 200:
-        landfill_impact = -1.5 # Below average: styrofoam
-    elif landfill_years <= 500:
-        landfill_impact = -2.0 # Poor: long-lasting plastics
-    else:
-        landfill_impact = -2.5 # Very poor: centuries to decompose
-    
-    # Recyclability impact - REALISTIC RANGES
-    if recyclability >= 90:
-        recycle_impact = 1.0  # Excellent: glass, aluminum
-    elif recyclability >= 80:
-        recycle_impact = 0.8  # Very good: paper, cardboard
-    elif recyclability >= 70:
-        recycle_impact = 0.5  # Good: steel, some plastics
-    elif recyclability >= 60:
-        recycle_impact = 0.2  # Above average: PET plastics
-    elif recyclability >= 50:
-        recycle_impact = 0.0  # Average: mixed plastics
-    elif recyclability >= 40:
-        recycle_impact = -0.2 # Below average: some plastics
-    elif recyclability >= 30:
-        recycle_impact = -0.5 # Poor: hard-to-recycle plastics
-    elif recyclability >= 20:
-        recycle_impact = -0.8 # Very poor: composite materials
-    else:
-        recycle_impact = -1.0 # Extremely poor: non-recyclable
-    
-    # Calculate total impact with balanced weighting
-    total_impact = base_score + (carbon_impact * 0.4) + (water_impact * 0.25) + (landfill_impact * 0.25) + (recycle_impact * 0.1)
-    
-    # Apply realistic scaling for meaningful differences
-    if total_impact >= 8.5:
-        return 10  # Excellent for environment
-    elif total_impact >= 7.5:
-        return 9   # Very good
-    elif total_impact >= 6.5:
-        return 8   # Good
-    elif total_impact >= 5.5:
-        return 7   # Above average
-    elif total_impact >= 4.5:
-        return 6   # Average
-    elif total_impact >= 3.5:
-        return 5   # Below average
-    elif total_impact >= 2.5:
-        return 4   # Poor
-    elif total_impact >= 1.5:
-        return 3   # Very poor
-    elif total_impact >= 0.5:
-        return 2   # Terrible
-    else:
-        return 1   # Extremely harmful
+class BatchItemResult(BaseModel):
+    item_name: str
+    status: str  # "success", "fallback" (degraded answer) or "failed"
+    data: Optional[AnalysisData] = None
+    error: Optional[str] = None
 
-async def get_product_analysis(product_name: str) -> Dict[str, Any]:
-    """Get product analysis using ChatGPT API."""
-    
-    prompt = f"""You are an expert environmental scientist with deep knowledge of lifecycle assessment. Analyze the environmental impact of "{product_name}".
+class BatchAnalysisResponse(BaseModel):
+    success: bool
+    message: str
+    results: List[BatchItemResult]
+    summary: Dict[str, int]
 
-Write a comprehensive lifecycle story that includes:
+class JobSubmitResponse(BaseModel):
+    job_id: str
+    status_url: str
+    created: bool  # False when an Idempotency-Key matched an existing job
 
-1. Raw Materials: Describe where the materials come from and their environmental extraction impact
-2. Production: Detail the manufacturing process and energy/water requirements
-3. Transportation: Explain the supply chain and distribution environmental costs
-4. Usage: Describe how people use it and any ongoing environmental impact
-5. Disposal: Detail what happens when it's thrown away and waste management
+class JobItemResult(BaseModel):
+    item_name: str
+    status: str  # "queued", "running", "success", "fallback" or "failed"
+    attempts: int
+    data: Optional[AnalysisData] = None
+    error: Optional[str] = None
 
-IMPORTANT: Use REALISTIC, RESEARCH-BASED metrics. Here are typical ranges:
-- Organic produce: 0.1-0.5 kg CO2, 50-300L water, 0.1-1 year landfill, 90-95% recyclable
-- Processed foods: 0.5-2 kg CO2, 300-1000L water, 1-10 years landfill, 70-90% recyclable
-- Plastics: 2-10 kg CO2, 500-2000L water, 50-500 years landfill, 20-60% recyclable
-- Electronics: 10-50 kg CO2, 1000-5000L water, 100-1000 years landfill, 30-70% recyclable
+class JobStatusResponse(BaseModel):
+    job_id: str
+    status: str  # "queued", "running" or "completed"
+    created_at: float
+    progress: Dict[str, int]
+    results: List[JobItemResult]
 
-Format your story with clear paragraphs separated by double line breaks. Make it engaging and educational. Focus on the hidden environmental impacts that most people don't see.
+def calculate_sustainability_score(carbon_footprint: float, water_usage: float, landfill_years: float, recyclability: float) -> int:
+    """Calculate sustainability score (1-10) based on environmental metrics (see scoring.SUSTAINABILITY_TABLES)."""
+    return sustainability_score(carbon_footprint, water_usage, landfill_years, recyclability)
 
-Return ONLY a JSON response with:
-{{
-    "story": "Your complete lifecycle story here with proper paragraph breaks",
-    "carbon_footprint_kg": <realistic_number>,
-    "water_usage_liters": <realistic_number>,
-    "landfill_years": <realistic_number>,
-    "recyclability_percent": <realistic_number>
-}}"""
+def calculate_environmental_impact_score(carbon_footprint: float, water_usage: float, landfill_years: float, recyclability: float) -> int:
+    """Calculate environmental impact score (1-10) where 10 = very good for environment (see scoring.ENVIRONMENTAL_IMPACT_TABLES)."""
+    return environmental_impact_score(carbon_footprint, water_usage, landfill_years, recyclability)
+
+async def fetch_product_analysis(product_name: str) -> Dict[str, Any]:
+    """Get product analysis using ChatGPT API; raises if no real answer was produced."""
+    
+    with stage("prompt_build"):
+        messages = build_messages(product_name, "json", STORY_MODE, PROMPT_VARIANT)
 
+    client = get_openai_client()
+    
+    async def create_completion():
+        async with openai_clients.slot():
+            with upstream_request_duration.time(PROMPT_VARIANT, STORY_MODE):
+                return await client.chat.completions.create(
+                    model="gpt-4o-mini",
+                    messages=messages,
+                    temperature=0.7,
+                    max_tokens=MAX_TOKENS,
+                    timeout=30.0,
+                    response_format=ANALYSIS_RESPONSE_FORMAT
+                )
+    
+    upstream_breaker.before_call()
     try:
-        client = get_openai_client()
-        response = await client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.7,
-            max_tokens=2000,
-            timeout=30.0
-        )
-        
-        result_text = response.choices[0].message.content
-        
-        # Parse JSON response
-        json_match = re.search(r'\{.*\}', result_text, re.DOTALL)
-        if json_match:
-            result = json.loads(json_match.group())
-        else:
-            raise Exception("Invalid JSON response")
-        
-        # Extract metrics from story as backup
-        story = result.get("story", "")
-        extracted_metrics = extract_metrics_from_story(story)
-        
-        # Use provided metrics or extracted ones
-        carbon_footprint = result.get("carbon_footprint_kg", extracted_metrics["carbon_footprint_kg"])
-        water_usage = result.get("water_usage_liters", extracted_metrics["water_usage_liters"])
-        landfill_years = result.get("landfill_years", extracted_metrics["landfill_years"])
-        recyclability = result.get("recyclability_percent", extracted_metrics["recyclability"])
-        
+        with stage("upstream_wait"):
+            # Never hedge while calls are already queueing for an upstream slot
+            response = await upstream_hedger.run(create_completion, can_hedge=lambda: openai_clients.waiting == 0)
+    except asyncio.CancelledError:
+        upstream_breaker.release()
+        raise
+    except Exception as e:
+        upstream_breaker.record_failure(classify_failure(e))
+        upstream_requests.inc(1, "error")
+        raise
+    upstream_breaker.record_success()
+    upstream_requests.inc(1, "success")
+    record_usage(getattr(response, "usage", None), PROMPT_VARIANT, STORY_MODE)
+    
+    result_text = response.choices[0].message.content or ""
+    
+    # Structured output matches LifecycleAnalysis; malformed completions are counted and recovered
+    with stage("json_parse"):
+        result = parse_analysis_response(result_text)
+    
+    return build_analysis_result(product_name, result["story"], result)
+
+def build_analysis_result(product_name: str, story: str, reported: Dict[str, Any]) -> Dict[str, Any]:
+    """Score an analysis from the reported metrics, falling back to ones extracted from the story."""
+    # Use provided metrics, or extract missing ones from the story as backup
+    with stage("story_extraction"):
+        metrics = resolve_metrics(story, reported)
+    carbon_footprint = metrics["carbon_footprint_kg"]
+    water_usage = metrics["water_usage_liters"]
+    landfill_years = metrics["landfill_years"]
+    recyclability = metrics["recyclability"]
+    
+    with stage("scoring"):
         # Calculate sustainability score
         sustainability_score = calculate_sustainability_score(
             carbon_footprint, water_usage, landfill_years, recyclability
@@ -363,39 +474,157 @@ Return ONLY a JSON response with:
         environmental_impact_score = calculate_environmental_impact_score(
             carbon_footprint, water_usage, landfill_years, recyclability
         )
-        
-        return {
-            "item_name": product_name,
-            "sustainability_score": sustainability_score,
-            "environmental_impact_score": environmental_impact_score,
-            "carbon_footprint_kg": carbon_footprint,
-            "water_usage_liters": water_usage,
-            "landfill_years": landfill_years,
-            "recyclability": recyclability,
-            "story": story
-        }
-        
+    
+    return {
+        "item_name": product_name,
+        "sustainability_score": sustainability_score,
+        "environmental_impact_score": environmental_impact_score,
+        "carbon_footprint_kg": carbon_footprint,
+        "water_usage_liters": water_usage,
+        "landfill_years": landfill_years,
+        "recyclability": recyclability,
+        "story": story,
+        "source": "model"
+    }
+
+def fallback_analysis(product_name: str) -> Dict[str, Any]:
+    """Generic analysis returned when the AI analysis is unavailable."""
+    return {
+        "item_name": product_name,
+        "sustainability_score": 5,
+        "environmental_impact_score": 5,
+        "carbon_footprint_kg": 5.0,
+        "water_usage_liters": 500.0,
+        "landfill_years": 50.0,
+        "recyclability": 50.0,
+        "story": f"Analysis of {product_name} based on general environmental impact data.",
+        "source": "fallback",
+        "fallback": True,
+        "degraded": True
+    }
+
+def build_response_data(product_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Select the public fields of an analysis result."""
+    return {
+        "item_name": product_data["item_name"],
+        "sustainability_score": product_data["sustainability_score"],
+        "environmental_impact_score": product_data["environmental_impact_score"],
+        "carbon_footprint_kg": product_data["carbon_footprint_kg"],
+        "water_usage_liters": product_data["water_usage_liters"],
+        "landfill_years": product_data["landfill_years"],
+        "recyclability": product_data["recyclability"],
+        "story": product_data["story"],
+        "source": product_data.get("source", "model"),
+        "matched_item": product_data.get("matched_item")
+    }
+
+def lookup_catalog(product_name: str) -> Optional[Dict[str, Any]]:
+    """Return the catalog analysis closest to product_name if it clears the similarity threshold."""
+    catalog = get_catalog()
+    if catalog is None:
+        return None
+    # A non-degraded answer skips the model, so the entry must name the same product, not a near miss
+    match = catalog.lookup(product_name, CATALOG_THRESHOLD, cover_words=True)
+    catalog_lookups.inc(1, "miss" if match is None else "hit")
+    if match is None:
+        return None
+    analysis, similarity = match
+    print(f"Catalog match for {product_name}: {analysis['item_name']} ({similarity:.2f})")
+    return {**analysis, "item_name": product_name, "source": "catalog", "matched_item": analysis["item_name"]}
+
+async def resolve_product_analysis(product_name: str) -> Dict[str, Any]:
+    """Answer from the precomputed catalog when it has a close match, otherwise from the model."""
+    return lookup_catalog(product_name) or await get_product_analysis(product_name)
+
+async def refresh_analysis(cache_key: str, product_name: str) -> Dict[str, Any]:
+    """Analyze product_name upstream and cache the result, sharing any in-flight call for the key."""
+    async def analyze_and_cache() -> Dict[str, Any]:
+        result = await fetch_product_analysis(product_name)
+        result_cache.set(cache_key, result)
+        return result
+    
+    return await inflight_analyses.do(cache_key, analyze_and_cache)
+
+popular_refresher = PopularRefresher(
+    popularity,
+    expires_in=result_cache.expires_in,
+    refresh=refresh_analysis,
+    top_n=int(os.getenv("ECOLENS_PREFETCH_TOP_N", "50")),
+    interval=float(os.getenv("ECOLENS_PREFETCH_INTERVAL_SECONDS", "60")),
+    refresh_ahead=float(os.getenv("ECOLENS_PREFETCH_AHEAD_SECONDS", "3600")),
+    concurrency=int(os.getenv("ECOLENS_PREFETCH_CONCURRENCY", "2")),
+    min_score=float(os.getenv("ECOLENS_PREFETCH_MIN_SCORE", "2")),
+    failure_backoff=float(os.getenv("ECOLENS_PREFETCH_FAILURE_BACKOFF_SECONDS", "300")),
+    max_failures=int(os.getenv("ECOLENS_PREFETCH_MAX_FAILURES", "5")),
+    # An open breaker says nothing about the item, so it neither backs off nor forgets it
+    item_failure=lambda e: not isinstance(e, CircuitOpenError),
+    # Background refreshes give way to user requests and never probe a tripped breaker
+    can_refresh=lambda: upstream_breaker.state == CLOSED and openai_clients.waiting == 0,
+    snapshot_path=os.getenv(
+        "ECOLENS_POPULARITY_SNAPSHOT_PATH", os.path.join(tempfile.gettempdir(), "ecolens_popularity.json")
+    ) or None,
+)
+
+def stale_while_revalidate(cache_key: str, product_name: str) -> Optional[Dict[str, Any]]:
+    """A recently expired result to answer with now, with a background refresh scheduled, or None."""
+    if CACHE_SWR_SECONDS <= 0:
+        return None
+    stale = result_cache.get_stale(cache_key, CACHE_SWR_SECONDS)
+    if stale is None:
+        return None
+    popular_refresher.refresh_soon(cache_key, product_name)
+    # Marked so HTTP responses are not cached downstream for as long as fresh ones
+    return {**stale, "stale": True}
+
+async def get_product_analysis(product_name: str) -> Dict[str, Any]:
+    """Get product analysis, served from the result cache when possible."""
+    cache_key = normalize_item_name(product_name)
+    if cache_key:
+        cached = result_cache.get(cache_key) or stale_while_revalidate(cache_key, product_name)
+        if cached is not None:
+            return {**cached, "item_name": product_name}
+    
+    try:
+        if cache_key:
+            result = await refresh_analysis(cache_key, product_name)
+        else:
+            result = await fetch_product_analysis(product_name)
+    except CircuitOpenError:
+        return degraded_analysis(product_name, "standard")
     except Exception as e:
         print(f"Error analyzing {product_name}: {e}")
-        # Return fallback data
-        return {
-            "item_name": product_name,
-            "sustainability_score": 5,
-            "environmental_impact_score": 5,
-            "carbon_footprint_kg": 5.0,
-            "water_usage_liters": 500.0,
-            "landfill_years": 50.0,
-            "recyclability": 50.0,
-            "story": f"Analysis of {product_name} based on general environmental impact data."
-        }
-
-@app.get("/")
+        # Degraded answers are never cached so the next request retries upstream
+        return degraded_analysis(product_name, "standard")
+    
+    return {**result, "item_name": product_name}
+
+def degraded_analysis(product_name: str, mode: str) -> Dict[str, Any]:
+    """Best answer available without the upstream: expired cache entry, looser catalog match, generic fallback."""
+    cache_key = normalize_item_name(product_name)
+    stale = result_cache.get_stale(cache_key) if cache_key else None
+    if stale is not None:
+        degraded_responses.inc(1, "stale_cache")
+        return {**stale, "item_name": product_name, "source": "stale_cache", "degraded": True}
+    
+    catalog = get_catalog()
+    match = catalog.lookup(product_name, DEGRADED_CATALOG_THRESHOLD) if catalog is not None else None
+    if match is not None:
+        degraded_responses.inc(1, "catalog")
+        # A looser match may be a different product; matched_item says which one answered
+        return {**match[0], "item_name": product_name, "source": "catalog", "matched_item": match[0]["item_name"],
+                "degraded": True}
+    
+    degraded_responses.inc(1, "fallback")
+    analysis_fallbacks.inc(1, mode)
+    return fallback_analysis(product_name)
+
+@router.get("/")
 async def root():
     """Serve the main HTML interface."""
     static_file = os.path.join(os.path.dirname(__file__), "static", "index.html")
     return FileResponse(static_file)
 
-@app.get("/api")
+@router.get("/api")
 async def api_root():
     """API root endpoint."""
     return {
@@ -404,40 +633,462 @@ async def api_root():
         "status": "running"
     }
 
-@app.post("/api/analyze-item", response_model=ItemAnalysisResponse)
-async def analyze_item(request: ItemAnalysisRequest):
+def content_etag(body: bytes) -> str:
+    """Strong ETag derived from the response body."""
+    return f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header matches etag (weak comparison, as RFC 9110 requires)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return etag in (tag[2:] if tag.startswith("W/") else tag for tag in candidates)
+
+def item_cache_control(product_data: Dict[str, Any]) -> str:
+    """Cache-Control for a GET /api/items/... response carrying product_data."""
+    if product_data.get("degraded", False):
+        # Degraded answers stand in for a failed analysis; never let them be cached downstream
+        return "no-store"
+    if product_data.get("stale", False):
+        # An expired answer already being refreshed; caches must revalidate before reusing it
+        return "no-cache"
+    return f"public, max-age={HTTP_CACHE_MAX_AGE}, stale-while-revalidate={HTTP_CACHE_STALE_SECONDS}"
+
+async def item_response_payload(item_name: str, priority: str = BULK) -> Tuple[bytes, str, str]:
+    """Serialized ItemAnalysisResponse for item_name, with its ETag and Cache-Control header.
+    
+    Model answers are memoized on their result cache entry (per spelling of
+    the name), so a repeated request skips validation and encoding and is
+    dropped whenever the entry expires or is invalidated. Only requests
+    that miss both the catalog and the memo go through admission control.
+    Every answer, memoized or not, is appended to the analytics log.
+    """
+    # The catalog takes precedence over cached model answers, as in resolve_product_analysis
+    product_data = lookup_catalog(item_name)
+    cache_key = normalize_item_name(item_name)
+    memo_tag = ("item_response", item_name)
+    if product_data is None:
+        if cache_key:
+            # Only single-item requests count towards popularity, not batches or jobs
+            popularity.record(cache_key, item_name)
+            memo = result_cache.get_memo(cache_key, memo_tag)
+            if memo is not None:
+                payload, data = memo
+                analytics_log.append(data)
+                return payload
+        ticket = await admit_analysis(priority)
+        try:
+            product_data = await get_product_analysis(item_name)
+        finally:
+            ticket.release()
+    
+    degraded = product_data.get("degraded", False)
+    data = build_response_data(product_data)
+    analytics_log.append(data, degraded)
+    body = ItemAnalysisResponse(
+        success=True,
+        message="Item analyzed successfully",
+        data=AnalysisData(**data),
+        degraded=degraded
+    ).model_dump_json().encode("utf-8")
+    payload = (body, content_etag(body), item_cache_control(product_data))
+    if (cache_key and product_data.get("source", "model") == "model" and not degraded
+            and not product_data.get("stale", False)):
+        result_cache.set_memo(cache_key, memo_tag, (payload, data))
+    return payload
+
+@router.post("/api/analyze-item", response_model=ItemAnalysisResponse)
+async def analyze_item(request: ItemAnalysisRequest, priority: str = Depends(request_priority)):
     """Analyze an item and generate its sustainability lifecycle story."""
     try:
         print(f"Analyzing item: {request.item_name}")
         
-        # Get AI analysis
-        product_data = await get_product_analysis(request.item_name)
-        
-        response_data = {
-            "item_name": product_data["item_name"],
-            "sustainability_score": product_data["sustainability_score"],
-            "environmental_impact_score": product_data["environmental_impact_score"],
-            "carbon_footprint_kg": product_data["carbon_footprint_kg"],
-            "water_usage_liters": product_data["water_usage_liters"],
-            "landfill_years": product_data["landfill_years"],
-            "recyclability": product_data["recyclability"],
-            "story": product_data["story"]
-        }
+        # Get catalog or AI analysis, already serialized
+        body, _, _ = await item_response_payload(request.item_name, priority)
         
         print(f"Analysis complete for {request.item_name}")
-        return ItemAnalysisResponse(
-            success=True,
-            message="Item analyzed successfully",
-            data=response_data
-        )
+        return FastJSONResponse(body)
         
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error analyzing item {request.item_name}: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
+@router.get("/api/items/{item_name}", response_model=ItemAnalysisResponse)
+async def get_item(item_name: str, if_none_match: Optional[str] = Header(None),
+                   priority: str = Depends(request_priority)):
+    """Cacheable GET form of /api/analyze-item with a content ETag and conditional responses."""
+    try:
+        body, etag, cache_control = await item_response_payload(item_name, priority)
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error analyzing item {item_name}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
+    
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return FastJSONResponse(body, headers=headers)
+
+def split_paragraphs(text: str) -> List[str]:
+    """Split a story into its non-empty paragraphs."""
+    return [paragraph.strip() for paragraph in text.split("\n\n") if paragraph.strip()]
+
+def stored_analysis(product_name: str) -> Optional[Dict[str, Any]]:
+    """The catalog entry or cached model answer for product_name, or None; a cache lookup counts towards popularity."""
+    product_data = lookup_catalog(product_name)
+    cache_key = normalize_item_name(product_name)
+    if product_data is None and cache_key:
+        popularity.record(cache_key, product_name)
+        product_data = result_cache.get(cache_key) or stale_while_revalidate(cache_key, product_name)
+    return product_data
+
+async def stream_product_analysis(product_name: str,
+                                  stored: Optional[Dict[str, Any]] = None) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """Yield ("paragraph", ...) events as the story is generated, then one ("result", analysis) event.
+    
+    A ``stored`` answer from stored_analysis is replayed without the upstream.
+    """
+    cache_key = normalize_item_name(product_name)
+    # Without one, another request may have cached the answer while this one waited for admission
+    cached = stored or (result_cache.get(cache_key) if cache_key else None)
+    if cached is not None:
+        for paragraph in split_paragraphs(cached["story"]):
+            yield "paragraph", {"text": paragraph}
+        yield "result", {**cached, "item_name": product_name}
+        return
+    
+    messages = build_messages(product_name, "stream", STORY_MODE, PROMPT_VARIANT)
+    
+    paragraphs: List[str] = []
+    buffer = ""
+    metrics_text: Optional[str] = None
+    # Whether the breaker let this call through, and whether its outcome has been recorded
+    permitted = settled = False
+    try:
+        upstream_breaker.before_call()
+        permitted = True
+        client = get_openai_client()
+        async with openai_clients.slot():
+            started = time.perf_counter()
+            stream = await client.chat.completions.create(
+                model="gpt-4o-mini",
+                messages=messages,
+                temperature=0.7,
+                max_tokens=MAX_TOKENS,
+                timeout=30.0,
+                stream=True,
+                stream_options={"include_usage": True}
+            )
+            async for chunk in stream:
+                # The final chunk carries token usage and no choices
+                record_usage(getattr(chunk, "usage", None), PROMPT_VARIANT, STORY_MODE)
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content or ""
+                if metrics_text is not None:
+                    metrics_text += delta
+                    continue
+            
+                buffer += delta
+                if STREAM_METRICS_MARKER in buffer:
+                    buffer, metrics_text = buffer.split(STREAM_METRICS_MARKER, 1)
+                    complete, buffer = split_paragraphs(buffer), ""
+                else:
+                    # Keep the trailing, possibly unfinished paragraph in the buffer
+                    *finished, buffer = buffer.split("\n\n")
+                    complete = split_paragraphs("\n\n".join(finished))
+                for paragraph in complete:
+                    paragraphs.append(paragraph)
+                    yield "paragraph", {"text": paragraph}
+        upstream_breaker.record_success()
+        settled = True
+        
+        for paragraph in split_paragraphs(buffer):
+            paragraphs.append(paragraph)
+            yield "paragraph", {"text": paragraph}
+        upstream_requests.inc(1, "success")
+        upstream_request_duration.observe(time.perf_counter() - started, PROMPT_VARIANT, STORY_MODE)
+        if not paragraphs:
+            raise Exception("Empty story in streamed response")
+        
+        reported: Dict[str, Any] = {}
+        if metrics_text is not None:
+            try:
+                reported = parse_reported_metrics(decode_first_object(metrics_text))
+            except ValueError:
+                parse_stats.unparseable += 1
+        result = build_analysis_result(product_name, "\n\n".join(paragraphs), reported)
+    except Exception as e:
+        print(f"Error streaming analysis of {product_name}: {e}")
+        if permitted and not settled:
+            upstream_breaker.record_failure(classify_failure(e))
+            settled = True
+        if permitted and not paragraphs:
+            upstream_requests.inc(1, "error")
+        degraded = degraded_analysis(product_name, "stream")
+        if not paragraphs:
+            for paragraph in split_paragraphs(degraded["story"]):
+                yield "paragraph", {"text": paragraph}
+        yield "result", degraded
+        return
+    finally:
+        # The client went away mid-stream: free the half-open probe slot without an outcome
+        if permitted and not settled:
+            upstream_breaker.release()
+    
+    # Only cache when the model reported its metrics, not when they were guessed from the story
+    if cache_key and reported:
+        result_cache.set(cache_key, result)
+    yield "result", result
+
+def format_sse(event: str, data: Dict[str, Any]) -> str:
+    """Format one Server-Sent Events message."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@router.get("/api/analyze-item/stream")
+async def analyze_item_stream(item_name: str, priority: str = Depends(request_priority)):
+    """Stream an item's lifecycle story over Server-Sent Events, ending with the scored result."""
+    # Catalog and cache hits are replayed without the upstream, so only misses go through admission.
+    # Admit before the stream starts, so an overloaded server can still answer 429/503
+    stored = stored_analysis(item_name)
+    ticket = await admit_analysis(priority) if stored is None else None
+    print(f"Streaming analysis of item: {item_name}")
+    
+    async def event_stream():
+        try:
+            async for event, data in stream_product_analysis(item_name, stored):
+                if event == "result":
+                    data = {
+                        "success": True,
+                        "message": "Item analyzed successfully",
+                        "data": build_response_data(data),
+                        "degraded": data.get("degraded", False)
+                    }
+                    analytics_log.append(data["data"], data["degraded"])
+                yield format_sse(event, data)
+        finally:
+            if ticket is not None:
+                ticket.release()
+    
+    stream = event_stream()
+    if ticket is not None:
+        # A stream abandoned before its first chunk never runs its finally block
+        weakref.finalize(stream, ticket.release)
+    return StreamingResponse(
+        stream,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def analyze_batch_item(product_name: str) -> Dict[str, Any]:
+    """Analyze one batch item under the shared batch semaphore and per-item timeout."""
+    async with batch_semaphore:
+        return await asyncio.wait_for(resolve_product_analysis(product_name), timeout=BATCH_ITEM_TIMEOUT_SECONDS)
+
+@router.post("/api/analyze-items", response_model=BatchAnalysisResponse)
+async def analyze_items(request: BatchAnalysisRequest):
+    """Analyze many items at once with bounded concurrency; results keep input order."""
+    if len(request.item_names) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Batch too large (max {BATCH_MAX_ITEMS} items)")
+    
+    # De-duplicate by normalized name so "Apple" and "apples" cost one analysis
+    unique_names: Dict[str, str] = {}
+    for item_name in request.item_names:
+        unique_names.setdefault(normalize_item_name(item_name) or item_name, item_name)
+    print(f"Analyzing batch of {len(request.item_names)} items ({len(unique_names)} unique)")
+    
+    # The whole batch takes one bulk admission slot; batch_semaphore bounds its fan-out
+    ticket = await admit_analysis(BULK)
+    try:
+        outcomes = await asyncio.gather(
+            *(analyze_batch_item(item_name) for item_name in unique_names.values()),
+            return_exceptions=True
+        )
+    finally:
+        ticket.release()
+    outcome_by_key = dict(zip(unique_names.keys(), outcomes))
+    
+    results = []
+    for item_name in request.item_names:
+        outcome = outcome_by_key[normalize_item_name(item_name) or item_name]
+        if isinstance(outcome, BaseException):
+            error = "Timed out" if isinstance(outcome, asyncio.TimeoutError) else str(outcome)
+            results.append(BatchItemResult(item_name=item_name, status="failed", error=error))
+        else:
+            data = build_response_data({**outcome, "item_name": item_name})
+            status = "fallback" if outcome.get("degraded") else "success"
+            analytics_log.append(data, outcome.get("degraded", False))
+            results.append(BatchItemResult(item_name=item_name, status=status, data=data))
+    
+    summary = {
+        "total": len(results),
+        "unique": len(unique_names),
+        "succeeded": sum(1 for r in results if r.status == "success"),
+        "fallback": sum(1 for r in results if r.status == "fallback"),
+        "failed": sum(1 for r in results if r.status == "failed")
+    }
+    complete = summary["succeeded"] == summary["total"]
+    print(f"Batch complete: {summary}")
+    return BatchAnalysisResponse(
+        success=complete,
+        message="All items analyzed successfully" if complete else (
+            f"{summary['fallback']} items used fallback data and {summary['failed']} items failed"
+        ),
+        results=results,
+        summary=summary
+    )
+
+async def run_job_item(item_name: str) -> Tuple[str, Dict[str, Any]]:
+    """Job handler: analyze one queued item, reporting degraded answers so the queue can retry them."""
+    product_data = await resolve_product_analysis(item_name)
+    data = build_response_data(product_data)
+    return ("fallback" if product_data.get("degraded") else "success"), data
+
+job_workers = JobWorkers(
+    job_store,
+    run_job_item,
+    concurrency=JOB_WORKERS,
+    poll_interval=float(os.getenv("ECOLENS_JOBS_POLL_SECONDS", "1")),
+    item_timeout=BATCH_ITEM_TIMEOUT_SECONDS,
+    max_attempts=int(os.getenv("ECOLENS_JOBS_MAX_ATTEMPTS", "3")),
+    retry_delay=float(os.getenv("ECOLENS_JOBS_RETRY_DELAY_SECONDS", "5")),
+    # Retried attempts are not served to anyone; only the stored final outcome is logged
+    on_complete=lambda status, data: analytics_log.append(data, status == FALLBACK),
+)
+
+@router.post("/api/jobs", response_model=JobSubmitResponse, status_code=202)
+async def submit_job(request: BatchAnalysisRequest, idempotency_key: Optional[str] = Header(None)):
+    """Queue items for background analysis and return a job id immediately."""
+    if not request.item_names:
+        raise HTTPException(status_code=400, detail="item_names must not be empty")
+    if len(request.item_names) > BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many items: {len(request.item_names)} (maximum {BATCH_MAX_ITEMS})"
+        )
+    
+    try:
+        job_id, created = await asyncio.to_thread(job_store.enqueue, request.item_names, idempotency_key)
+    except IdempotencyConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except sqlite3.Error as e:
+        print(f"Error queueing job: {e}")
+        raise HTTPException(status_code=503, detail="Job queue unavailable")
+    
+    if created:
+        print(f"Queued job {job_id} with {len(request.item_names)} items")
+        job_workers.notify()
+    return JobSubmitResponse(job_id=job_id, status_url=f"/api/jobs/{job_id}", created=created)
+
+@router.get("/api/jobs/{job_id}", response_model=JobStatusResponse)
+async def get_job(job_id: str):
+    """Report a job's progress and the results of its finished items."""
+    try:
+        job = await asyncio.to_thread(job_store.get, job_id)
+    except sqlite3.Error as e:
+        print(f"Error reading job {job_id}: {e}")
+        raise HTTPException(status_code=503, detail="Job queue unavailable")
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@router.get("/api/stats")
+def analytics_stats():
+    """Aggregates over every analysis served: counts, means, approximate percentiles and histograms per score band."""
+    # A plain def runs in the threadpool, so the one-time replay of the log never blocks the event loop
+    return analytics_log.summary()
+
+@router.get("/api/upstream/breaker")
+async def breaker_state():
+    """Report the upstream circuit breaker state and its rolling failure window."""
+    return upstream_breaker.stats()
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus metrics: per-route request counts and latency, per-stage timings, tokens, fallbacks."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+def job_queue_stats() -> Optional[Dict[str, Any]]:
+    """Job store and worker counters, or None while the job database is unavailable."""
+    try:
+        return {**job_store.stats(), **job_workers.stats()}
+    except sqlite3.Error as e:
+        print(f"Job queue stats unavailable: {e}")
+        return None
+
+@router.get("/api/admin/stats", dependencies=[Depends(require_admin)])
+async def admin_stats():
+    """Report result cache, request coalescing, upstream client, parsing, job queue, admission and runtime counters."""
+    return {
+        "cache": result_cache.stats(),
+        "coalescing": inflight_analyses.stats(),
+        "upstream": openai_clients.stats(),
+        "hedging": upstream_hedger.stats(),
+        "breaker": upstream_breaker.stats(),
+        "parsing": parse_stats.stats(),
+        "jobs": job_queue_stats(),
+        "admission": analysis_admission.stats(),
+        "analytics": analytics_log.stats(),
+        "popularity": {**popularity.stats(), "refresher": popular_refresher.stats()},
+        "event_loop": loop_lag_monitor.stats(),
+        "profiler": slow_request_profiler.stats()
+    }
+
+@router.delete("/api/admin/cache", dependencies=[Depends(require_admin)])
+async def admin_clear_cache():
+    """Invalidate every cached analysis."""
+    try:
+        removed = result_cache.clear()
+    except sqlite3.Error:
+        raise HTTPException(status_code=503, detail="Result cache store busy; other workers may still serve cached analyses, retry")
+    return {"success": True, "removed": removed}
+
+@router.delete("/api/admin/cache/{item_name}", dependencies=[Depends(require_admin)])
+async def admin_invalidate_item(item_name: str):
+    """Invalidate the cached analysis for one item (matched by normalized name)."""
+    cache_key = normalize_item_name(item_name)
+    try:
+        removed = result_cache.invalidate(cache_key)
+    except sqlite3.Error:
+        raise HTTPException(status_code=503, detail="Result cache store busy; other workers may still serve this analysis, retry")
+    return {"success": True, "key": cache_key, "removed": removed}
+
+def create_app() -> FastAPI:
+    """Build the EcoLens FastAPI application."""
+    app = FastAPI(
+        title="EcoLens API",
+        description="AI-powered Sustainability Lifecycle Tracker API",
+        version="1.0.0",
+        lifespan=lifespan,
+        default_response_class=FastJSONResponse
+    )
+    
+    # Configure CORS
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+    app.middleware("http")(record_request_metrics)
+    
+    # Mount static files
+    static_dir = os.path.join(os.path.dirname(__file__), "static")
+    app.mount("/static", StaticFiles(directory=static_dir), name="static")
+    
+    app.include_router(router)
+    return app
+
+app = create_app()
+
 if __name__ == "__main__":
-    import uvicorn
-    print("Starting EcoLens API Server...")
-    print("Web interface: http://127.0.0.1:8000")
-    uvicorn.run(app, host="127.0.0.1", port=8000)
+    from .serve import main
+    main()
 
@@ -0,0 +1,243 @@
+"""Minimal Prometheus-style metrics for EcoLens.
+
+Counters, gauges and histograms with labels, rendered in the Prometheus
+text exposition format by ``registry.render()``. Gauges and counters can
+also be backed by a callback that is read at scrape time, which is how the
+cache, coalescing and upstream client counters are exported.
+"""
+
+import bisect
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .timing import record_phase
+
+# Request and stage latencies range from sub-millisecond cache hits to 30 s upstream timeouts
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0)
+
+# Tokens per upstream request, from a one-line prompt to a full story completion
+TOKEN_BUCKETS = (16, 32, 64, 128, 256, 512, 768, 1024, 1536, 2048, 3072, 4096)
+
+Labels = Tuple[str, ...]
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._callback: Optional[Callable[[], object]] = None
+
+    def set_function(self, fn: Callable[[], object]) -> None:
+        """Read the value at scrape time: a number, or a dict of label tuple -> number."""
+        self._callback = fn
+
+    def _samples(self) -> List[Tuple[str, Labels, str, float]]:
+        raise NotImplementedError
+
+    def _callback_samples(self) -> List[Tuple[str, Labels, str, float]]:
+        value = self._callback()
+        if isinstance(value, dict):
+            return [(self.name, labels, "", v) for labels, v in value.items() if v is not None]
+        return [] if value is None else [(self.name, (), "", value)]
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        samples = self._callback_samples() if self._callback else self._samples()
+        for name, labels, extra, value in samples:
+            lines.append(f"{name}{_format_labels(self.labelnames, labels, extra)} {_format_value(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, amount: float = 1, *labels: str) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def get(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def _samples(self):
+        return [(self.name, labels, "", value) for labels, value in self._values.items()]
+
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Labels, float] = {}
+
+    def set(self, value: float, *labels: str) -> None:
+        self._values[labels] = value
+
+    def inc(self, amount: float = 1, *labels: str) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, amount: float = 1, *labels: str) -> None:
+        self.inc(-amount, *labels)
+
+    def _samples(self):
+        return [(self.name, labels, "", value) for labels, value in self._values.items()]
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._counts: Dict[Labels, List[int]] = {}
+        self._sums: Dict[Labels, float] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        counts = self._counts.get(labels)
+        if counts is None:
+            counts = self._counts[labels] = [0] * (len(self.buckets) + 1)
+            self._sums[labels] = 0.0
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        self._sums[labels] += value
+
+    @contextmanager
+    def time(self, *labels: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *labels)
+
+    def _samples(self):
+        samples = []
+        for labels, counts in self._counts.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                samples.append((f"{self.name}_bucket", labels, f'le="{_format_value(float(bound))}"', cumulative))
+            samples.append((f"{self.name}_sum", labels, "", self._sums[labels]))
+            samples.append((f"{self.name}_count", labels, "", cumulative))
+        return samples
+
+
+class Registry:
+    """Collection of metrics rendered together at /metrics."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Duplicate metric {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+# HTTP layer
+http_requests = registry.counter(
+    "ecolens_http_requests_total", "HTTP requests by method, route and status.", ("method", "route", "status"))
+http_request_duration = registry.histogram(
+    "ecolens_http_request_duration_seconds", "HTTP request latency by method and route.", ("method", "route"))
+http_in_flight = registry.gauge(
+    "ecolens_http_requests_in_flight", "HTTP requests currently being handled.")
+
+# Analysis pipeline
+analysis_stage_duration = registry.histogram(
+    "ecolens_analysis_stage_seconds",
+    "Time spent in each analysis stage (prompt_build, upstream_wait, json_parse, story_extraction, scoring).",
+    ("stage",))
+upstream_requests = registry.counter(
+    "ecolens_upstream_requests_total", "Upstream OpenAI calls by outcome.", ("outcome",))
+upstream_tokens = registry.counter(
+    "ecolens_upstream_tokens_total",
+    "Upstream token usage reported in response.usage (prompt, cached_prompt, completion) by prompt variant and story mode.",
+    ("type", "prompt", "story_mode"))
+upstream_request_tokens = registry.histogram(
+    "ecolens_upstream_request_tokens", "Tokens per upstream request by type, prompt variant and story mode.",
+    ("type", "prompt", "story_mode"), buckets=TOKEN_BUCKETS)
+upstream_request_duration = registry.histogram(
+    "ecolens_upstream_request_seconds", "Upstream completion latency by prompt variant and story mode.",
+    ("prompt", "story_mode"))
+catalog_lookups = registry.counter(
+    "ecolens_catalog_lookups_total", "Precomputed catalog lookups by result.", ("result",))
+analysis_fallbacks = registry.counter(
+    "ecolens_analysis_fallbacks_total", "Analyses answered with generic fallback data.", ("mode",))
+degraded_responses = registry.counter(
+    "ecolens_degraded_responses_total",
+    "Analyses answered without the model by degraded source (stale_cache, catalog, fallback).", ("source",))
+
+
+# Runtime
+event_loop_lag = registry.histogram(
+    "ecolens_event_loop_lag_seconds", "How late the event loop woke a periodic monitor task (blocking work on the loop).")
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time one analysis stage: ``with stage("scoring"): ...``.
+
+    The duration is also added to the current request's Server-Timing phases.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        analysis_stage_duration.observe(elapsed, name)
+        record_phase(name, elapsed)
+
+
+def record_usage(usage, prompt: str, story_mode: str) -> None:
+    """Record token counts from an OpenAI ``response.usage`` object, if present, for one request."""
+    if usage is None:
+        return
+    details = getattr(usage, "prompt_tokens_details", None)
+    counts = {
+        "prompt": getattr(usage, "prompt_tokens", 0) or 0,
+        # Prompt tokens served from the upstream prefix cache (billed at a discount)
+        "cached_prompt": getattr(details, "cached_tokens", 0) or 0,
+        "completion": getattr(usage, "completion_tokens", 0) or 0,
+    }
+    for token_type, count in counts.items():
+        upstream_tokens.inc(count, token_type, prompt, story_mode)
+        upstream_request_tokens.observe(count, token_type, prompt, story_mode)
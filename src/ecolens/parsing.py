@@ -0,0 +1,184 @@
+"""Parsing of model completions into stories and environmental metrics.
+
+The primary path is OpenAI structured output validated against
+``LifecycleAnalysis``. When a completion does not match the schema, the
+first JSON object in the text is decoded instead. Metrics missing from it
+are recovered from the story with a single precompiled, one-pass regex.
+Every degraded path is counted in ``parse_stats``.
+"""
+
+import json
+import re
+from typing import Any, Dict
+
+from pydantic import BaseModel, ConfigDict, ValidationError
+
+
+class LifecycleAnalysis(BaseModel):
+    """Typed schema of the structured analysis the model is asked to return."""
+
+    model_config = ConfigDict(extra="forbid")
+
+    story: str
+    carbon_footprint_kg: float
+    water_usage_liters: float
+    landfill_years: float
+    recyclability_percent: float
+
+
+# OpenAI structured-output request parameter generated from the schema
+ANALYSIS_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "lifecycle_analysis",
+        "strict": True,
+        "schema": LifecycleAnalysis.model_json_schema(),
+    },
+}
+
+# Reported metric field -> key used by extract_metrics_from_story
+METRIC_FIELDS = {
+    "carbon_footprint_kg": "carbon_footprint_kg",
+    "water_usage_liters": "water_usage_liters",
+    "landfill_years": "landfill_years",
+    "recyclability_percent": "recyclability",
+}
+
+DEFAULT_METRICS = {
+    "carbon_footprint_kg": 5.0,
+    "water_usage_liters": 500.0,
+    "landfill_years": 50.0,
+    "recyclability": 50.0,
+}
+
+# One pass over the story finds all four metrics. Numbers may use thousands
+# separators ("1,200.5"), which are tried before plain digits.
+_NUMBER = r"(?P<number>\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:\.\d+)?)"
+METRIC_PATTERN = re.compile(
+    _NUMBER + r"\s*(?:"
+    r"(?P<carbon_footprint_kg>kg\s*CO2)"
+    r"|(?P<water_usage_liters>liters?\s*water)"
+    r"|(?P<landfill_years>years?\s*landfill)"
+    r"|(?P<recyclability>%\s*recyclable))",
+    re.IGNORECASE,
+)
+
+
+class ParseStats:
+    """Counters for completions that did not parse cleanly."""
+
+    def __init__(self):
+        self.structured = 0
+        self.schema_failures = 0
+        self.unparseable = 0
+        self.metrics_from_story = 0
+        self.metrics_defaulted = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "structured": self.structured,
+            "schema_failures": self.schema_failures,
+            "unparseable": self.unparseable,
+            "metrics_from_story": self.metrics_from_story,
+            "metrics_defaulted": self.metrics_defaulted,
+        }
+
+
+parse_stats = ParseStats()
+
+
+def find_metrics_in_story(story_text: str) -> Dict[str, float]:
+    """Return the first value of each metric mentioned in the story (only those found)."""
+    found: Dict[str, float] = {}
+    for match in METRIC_PATTERN.finditer(story_text):
+        key = match.lastgroup
+        if key not in found:
+            found[key] = float(match.group("number").replace(",", ""))
+            if len(found) == len(DEFAULT_METRICS):
+                break
+    return found
+
+
+def extract_metrics_from_story(story_text: str) -> Dict[str, Any]:
+    """Extract environmental metrics from the AI-generated story."""
+    return {**DEFAULT_METRICS, **find_metrics_in_story(story_text)}
+
+
+def _coerce_number(value: Any):
+    """Return value as a float if it is numeric (or a numeric string), else None."""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return float(value.replace(",", "").strip())
+        except ValueError:
+            return None
+    return None
+
+
+def decode_first_object(text: str) -> Dict[str, Any]:
+    """Decode the first JSON object in text, ignoring anything around it."""
+    start = text.find("{")
+    if start < 0:
+        raise ValueError("No JSON object in response")
+    try:
+        data, _ = json.JSONDecoder().raw_decode(text, start)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Invalid JSON response: {e}") from e
+    if not isinstance(data, dict):
+        raise ValueError("JSON response is not an object")
+    return data
+
+
+def parse_reported_metrics(data: Dict[str, Any]) -> Dict[str, float]:
+    """Keep the numeric metric fields of a decoded response."""
+    reported = {}
+    for field in METRIC_FIELDS:
+        value = _coerce_number(data.get(field))
+        if value is not None:
+            reported[field] = value
+    return reported
+
+
+def parse_analysis_response(text: str) -> Dict[str, Any]:
+    """Parse a completion into {"story": ..., <reported metric fields>}.
+
+    Raises ValueError if the completion holds no usable JSON object.
+    """
+    try:
+        analysis = LifecycleAnalysis.model_validate_json(text)
+        parse_stats.structured += 1
+        return analysis.model_dump()
+    except ValidationError:
+        parse_stats.schema_failures += 1
+
+    try:
+        data = decode_first_object(text)
+    except ValueError:
+        parse_stats.unparseable += 1
+        raise
+    story = data.get("story")
+    return {"story": story if isinstance(story, str) else "", **parse_reported_metrics(data)}
+
+
+def resolve_metrics(story: str, reported: Dict[str, Any]) -> Dict[str, float]:
+    """Combine reported metrics with ones recovered from the story, then defaults.
+
+    Returns a dict keyed like extract_metrics_from_story. The story is only
+    scanned when the model left a metric out.
+    """
+    metrics = {key: reported[field] for field, key in METRIC_FIELDS.items() if field in reported}
+    if len(metrics) == len(METRIC_FIELDS):
+        return metrics
+
+    for key, value in find_metrics_in_story(story).items():
+        if key not in metrics:
+            metrics[key] = value
+            parse_stats.metrics_from_story += 1
+    for key, value in DEFAULT_METRICS.items():
+        if key not in metrics:
+            metrics[key] = value
+            parse_stats.metrics_defaulted += 1
+    return metrics
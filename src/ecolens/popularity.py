@@ -0,0 +1,342 @@
+"""Item popularity and background refresh of the most popular analyses.
+
+``PopularityTracker`` keeps exponentially decayed request counts per
+normalized item name, so an item requested often an hour ago ranks below
+one requested often in the last minutes (``half_life_seconds``). Counts use
+forward decay: each request adds ``exp(t / tau)`` relative to a fixed
+origin, so the ranking never needs a pass over every counter. The tracker
+is bounded to ``max_items`` names and can be saved to and loaded from a
+JSON snapshot, so a restarted process knows what was popular.
+
+``PopularRefresher`` periodically re-analyzes the top items whose cached
+results are missing or expire within ``refresh_ahead`` seconds, so hot
+items are refreshed in the background instead of by the next unlucky user.
+Items whose decayed count is below ``min_score`` are never refreshed. An
+item whose refresh fails is retried after ``failure_backoff`` seconds,
+doubling with each consecutive failure, and after ``max_failures`` in a row
+it is forgotten (so it leaves the snapshot too) until it is requested again.
+Its first pass runs at startup (the warm-up) from the loaded snapshot.
+``refresh_soon`` refreshes a single entry in the background, for requests
+that were answered with a stale result (stale-while-revalidate).
+"""
+
+import asyncio
+import contextvars
+import json
+import math
+import os
+import random
+import tempfile
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+# Rebase the forward-decay origin before weights overflow a float
+_MAX_EXPONENT = 600.0
+
+
+class PopularityTracker:
+    """Exponentially decayed request counters per normalized item name; ``clock`` returns seconds."""
+
+    def __init__(self, half_life_seconds: float = 3600.0, max_items: int = 10000,
+                 clock: Callable[[], float] = time.time):
+        self.half_life_seconds = half_life_seconds
+        self.max_items = max_items
+        self.clock = clock
+        self._tau = half_life_seconds / math.log(2)
+        self._origin = clock()
+        # key -> [weight relative to origin, most recent spelling]
+        self._items: Dict[str, List[Any]] = {}
+        self.requests = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._items
+
+    def _rebase(self, now: float) -> None:
+        factor = math.exp(-(now - self._origin) / self._tau)
+        for entry in self._items.values():
+            entry[0] *= factor
+        self._origin = now
+
+    def record(self, key: str, item_name: str, count: float = 1.0) -> None:
+        """Count one request for key (a normalized item name)."""
+        if not key:
+            return
+        now = self.clock()
+        exponent = (now - self._origin) / self._tau
+        if exponent > _MAX_EXPONENT:
+            self._rebase(now)
+            exponent = 0.0
+        self.requests += 1
+        weight = count * math.exp(exponent)
+        entry = self._items.get(key)
+        if entry is None:
+            self._items[key] = [weight, item_name]
+            if len(self._items) > self.max_items:
+                self._prune()
+        else:
+            entry[0] += weight
+            entry[1] = item_name
+
+    def _prune(self) -> None:
+        """Drop the least popular tenth of the names."""
+        ranked = sorted(self._items.items(), key=lambda item: item[1][0])
+        for key, _ in ranked[:max(1, len(ranked) // 10)]:
+            del self._items[key]
+
+    def forget(self, key: str) -> None:
+        """Drop key's count; it starts from zero if requested again."""
+        self._items.pop(key, None)
+
+    def score(self, key: str) -> float:
+        """Decayed request count for key as of now."""
+        entry = self._items.get(key)
+        if entry is None:
+            return 0.0
+        return entry[0] * math.exp(-(self.clock() - self._origin) / self._tau)
+
+    def top(self, n: int) -> List[Tuple[str, str, float]]:
+        """The n most popular (key, item name, decayed count), most popular first."""
+        decay = math.exp(-(self.clock() - self._origin) / self._tau)
+        ranked = sorted(self._items.items(), key=lambda item: item[1][0], reverse=True)[:n]
+        return [(key, entry[1], entry[0] * decay) for key, entry in ranked]
+
+    def save(self, path: str, n: Optional[int] = None) -> None:
+        """Write the top n items (all by default) with their decayed counts to a JSON snapshot."""
+        items = self.top(n or len(self._items))
+        snapshot = {
+            "saved_at": self.clock(),
+            "half_life_seconds": self.half_life_seconds,
+            "items": [{"key": key, "item_name": name, "score": round(score, 6)} for key, name, score in items],
+        }
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".popularity-", suffix=".json")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def load(self, path: str) -> int:
+        """Merge a snapshot, decaying its counts for the time since it was saved; return the items loaded."""
+        with open(path, encoding="utf-8") as f:
+            snapshot = json.load(f)
+        decay = math.exp(-max(0.0, self.clock() - snapshot.get("saved_at", self.clock())) / self._tau)
+        loaded = 0
+        for item in snapshot.get("items", []):
+            score = float(item.get("score", 0)) * decay
+            if item.get("key") and score > 0:
+                self.record(item["key"], item.get("item_name") or item["key"], score)
+                loaded += 1
+        # Loading is not a request
+        self.requests -= loaded
+        return loaded
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "tracked_items": len(self),
+            "max_items": self.max_items,
+            "half_life_seconds": self.half_life_seconds,
+            "requests": self.requests,
+            "top": [{"item_name": name, "score": round(score, 3)} for _, name, score in self.top(10)],
+        }
+
+
+class PopularRefresher:
+    """Keeps the cached analyses of the top-N popular items fresh from a background task."""
+
+    def __init__(
+        self,
+        tracker: PopularityTracker,
+        expires_in: Callable[[str], Optional[float]],
+        refresh: Callable[[str, str], Awaitable[Any]],
+        top_n: int = 50,
+        interval: float = 60.0,
+        refresh_ahead: float = 3600.0,
+        concurrency: int = 2,
+        can_refresh: Callable[[], bool] = lambda: True,
+        snapshot_path: Optional[str] = None,
+        min_score: float = 0.0,
+        failure_backoff: float = 300.0,
+        max_failure_backoff: float = 86400.0,
+        max_failures: int = 5,
+        item_failure: Callable[[BaseException], bool] = lambda e: True,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.tracker = tracker
+        self.expires_in = expires_in
+        self.refresh = refresh
+        self.top_n = top_n
+        self.enabled = top_n > 0
+        self.interval = interval
+        self.refresh_ahead = refresh_ahead
+        self.concurrency = concurrency
+        self.can_refresh = can_refresh
+        self.snapshot_path = snapshot_path
+        self.min_score = min_score
+        self.failure_backoff = failure_backoff
+        self.max_failure_backoff = max_failure_backoff
+        self.max_failures = max_failures
+        self.item_failure = item_failure
+        self.clock = clock
+        # key -> (consecutive failures, time before which it is not retried)
+        self._failures: Dict[str, Tuple[int, float]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._pending: Dict[str, asyncio.Task] = {}
+        self.passes = 0
+        self.refreshed: Dict[str, int] = {"warmup": 0, "popular": 0, "stale": 0}
+        self.failed = 0
+        self.skipped = 0
+        self.forgotten = 0
+
+    def load_snapshot(self) -> None:
+        if not self.snapshot_path or not os.path.exists(self.snapshot_path):
+            return
+        try:
+            loaded = self.tracker.load(self.snapshot_path)
+            print(f"Loaded popularity snapshot with {loaded} items from {self.snapshot_path}")
+        except (OSError, ValueError) as e:
+            print(f"Popularity snapshot not loaded ({self.snapshot_path}): {e}")
+
+    def save_snapshot(self) -> None:
+        if not self.snapshot_path:
+            return
+        try:
+            # Keep well beyond top_n so the next run still has a useful ranking
+            self.tracker.save(self.snapshot_path, max(1000, self.top_n * 10))
+        except OSError as e:
+            print(f"Popularity snapshot not saved ({self.snapshot_path}): {e}")
+
+    def start(self) -> None:
+        """Load the snapshot and start refreshing; the first pass (the warm-up) runs at once."""
+        self.load_snapshot()
+        if self.enabled and self._task is None:
+            # A fresh context keeps background analyses out of whichever request started the app
+            self._task = asyncio.get_running_loop().create_task(self._run(), context=contextvars.Context())
+
+    def refresh_soon(self, key: str, item_name: str) -> None:
+        """Refresh one entry in the background; at most one refresh per key is pending."""
+        if key in self._pending or self._backing_off(key):
+            return
+        task = asyncio.get_running_loop().create_task(
+            self._refresh_stale(key, item_name), context=contextvars.Context())
+        self._pending[key] = task
+        task.add_done_callback(lambda _, key=key: self._pending.pop(key, None))
+
+    async def _refresh_stale(self, key: str, item_name: str) -> None:
+        if await self._refresh(key, item_name):
+            self.refreshed["stale"] += 1
+
+    def _backing_off(self, key: str) -> bool:
+        failure = self._failures.get(key)
+        return failure is not None and self.clock() < failure[1]
+
+    async def _refresh(self, key: str, item_name: str) -> bool:
+        """Refresh one entry, tracking consecutive failures for the backoff; return whether it succeeded."""
+        try:
+            await self.refresh(key, item_name)
+        except Exception as e:
+            if not self.item_failure(e):
+                # Rejected without trying the item (e.g. the breaker is open); no backoff
+                self.skipped += 1
+                return False
+            self.failed += 1
+            failures = self._failures.get(key, (0, 0.0))[0] + 1
+            if failures >= self.max_failures:
+                # Stop refreshing (and persisting) an item that cannot be analyzed until users ask again
+                self._failures.pop(key, None)
+                self.tracker.forget(key)
+                self.forgotten += 1
+                print(f"Background refresh of {item_name} failed {failures} times in a row, forgetting it: {e}")
+            else:
+                delay = min(self.max_failure_backoff, self.failure_backoff * 2 ** (failures - 1))
+                self._failures[key] = (failures, self.clock() + delay)
+                print(f"Background refresh of {item_name} failed, retrying in {delay:.0f} s: {e}")
+            return False
+        self._failures.pop(key, None)
+        return True
+
+    async def stop(self) -> None:
+        for task in list(self._pending.values()):
+            task.cancel()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.save_snapshot()
+
+    async def _run(self) -> None:
+        trigger = "warmup"
+        while True:
+            try:
+                await self.refresh_due(trigger)
+            except Exception as e:
+                print(f"Popular item refresh pass failed: {e}")
+            self.save_snapshot()
+            trigger = "popular"
+            # Jitter spreads the passes of several worker processes apart
+            await asyncio.sleep(self.interval * random.uniform(0.8, 1.2))
+
+    async def refresh_due(self, trigger: str = "popular") -> int:
+        """Refresh top items whose results are missing or expire within refresh_ahead; return how many."""
+        self.passes += 1
+        # Failures of items no longer tracked need no backoff
+        for key in [key for key in self._failures if key not in self.tracker]:
+            del self._failures[key]
+        due = []
+        for key, item_name, score in self.tracker.top(self.top_n):
+            # Ranked by score, so every later item is below the threshold too
+            if score < self.min_score:
+                break
+            if self._backing_off(key):
+                continue
+            remaining = self.expires_in(key)
+            if remaining is None or remaining < self.refresh_ahead:
+                due.append((key, item_name))
+        if not due:
+            return 0
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        refreshed: Set[str] = set()
+
+        async def refresh_one(key: str, item_name: str) -> None:
+            async with semaphore:
+                remaining = self.expires_in(key)
+                # Another worker may have refreshed it in the meantime
+                if remaining is not None and remaining >= self.refresh_ahead:
+                    return
+                if not self.can_refresh():
+                    self.skipped += 1
+                    return
+                if await self._refresh(key, item_name):
+                    refreshed.add(key)
+
+        await asyncio.gather(*(refresh_one(key, item_name) for key, item_name in due))
+        self.refreshed[trigger] += len(refreshed)
+        if refreshed:
+            print(f"Refreshed {len(refreshed)} popular items ({trigger})")
+        return len(refreshed)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "top_n": self.top_n,
+            "interval_seconds": self.interval,
+            "refresh_ahead_seconds": self.refresh_ahead,
+            "min_score": self.min_score,
+            "passes": self.passes,
+            "refreshed": dict(self.refreshed),
+            "failed": self.failed,
+            "skipped": self.skipped,
+            "backing_off": len(self._failures),
+            "forgotten": self.forgotten,
+            "pending": len(self._pending),
+            "snapshot_path": self.snapshot_path,
+        }
@@ -0,0 +1,241 @@
+"""Sampled profiles of slow requests and an event-loop lag monitor.
+
+SlowRequestProfiler: while requests are in flight, a background thread
+samples the event-loop thread's stack every ``interval`` seconds into a
+ring buffer. When a request takes at least ``threshold`` seconds, the
+samples taken while it was open are written to ``directory`` in collapsed
+stack format (``frame;frame;frame count`` per line, readable by
+flamegraph.pl and speedscope). Samples ending in ``select`` mean the loop
+was idle waiting for I/O such as the upstream; anything else is Python
+work that held the loop while the request was open, possibly on behalf of
+another request.
+
+LoopLagMonitor: a task sleeps ``interval`` seconds and measures how late
+it wakes up. A watchdog thread notices when the loop has not woken the
+task ``threshold`` seconds past its deadline and logs the loop thread's
+stack at that moment, which names the blocking call.
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+_MAX_STACK_DEPTH = 64
+
+
+def _frames(frame) -> List[Any]:
+    """Frames from the outermost call down to frame."""
+    frames = []
+    while frame is not None and len(frames) < _MAX_STACK_DEPTH:
+        frames.append(frame)
+        frame = frame.f_back
+    frames.reverse()
+    return frames
+
+
+def _collapsed_stack(frame) -> str:
+    return ";".join(
+        f"{f.f_code.co_name} ({os.path.basename(f.f_code.co_filename)}:{f.f_lineno})".replace(";", ":")
+        for f in _frames(frame)
+    )
+
+
+def _format_stack(frame) -> str:
+    return "\n".join(f'  File "{f.f_code.co_filename}", line {f.f_lineno}, in {f.f_code.co_name}' for f in _frames(frame))
+
+
+class SlowRequestProfiler:
+    """Writes a sampled stack profile of every request slower than ``threshold`` seconds."""
+
+    def __init__(self, directory: Optional[str] = None, threshold: float = 1.0, interval: float = 0.005,
+                 max_files: int = 100, max_samples: int = 20000):
+        self.directory = directory
+        self.enabled = bool(directory)
+        self.threshold = threshold
+        self.interval = interval
+        self.max_files = max_files
+        self._samples: Deque[Tuple[float, str]] = deque(maxlen=max_samples)
+        self._lock = threading.Lock()
+        self._active = 0
+        self._loop_thread_id: Optional[int] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.profiles_written = 0
+        self.write_errors = 0
+
+    def start(self) -> None:
+        """Start sampling the calling (event-loop) thread; a no-op unless a directory is configured."""
+        if not self.enabled or self._thread is not None:
+            return
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+        except OSError as e:
+            print(f"Slow request profiler disabled ({self.directory}): {e}")
+            self.enabled = False
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="ecolens-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout=1)
+        self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            if self._active == 0:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is not None:
+                stack = _collapsed_stack(frame)
+                with self._lock:
+                    self._samples.append((time.perf_counter(), stack))
+
+    def request_started(self) -> float:
+        """Mark a request as in flight; pass the returned start time to request_finished."""
+        if self.enabled:
+            self._active += 1
+        return time.perf_counter()
+
+    def request_finished(self, started: float, label: str, phases: Optional[Dict[str, float]] = None) -> None:
+        """Write a profile in the background if the request took at least ``threshold`` seconds."""
+        if not self.enabled:
+            return
+        self._active -= 1
+        elapsed = time.perf_counter() - started
+        if elapsed < self.threshold:
+            return
+        with self._lock:
+            stacks = [stack for at, stack in self._samples if at >= started]
+        asyncio.get_running_loop().run_in_executor(None, self._write, label, elapsed, dict(phases or {}), stacks)
+
+    def _write(self, label: str, elapsed: float, phases: Dict[str, float], stacks: List[str]) -> None:
+        name = "".join(c if c.isalnum() else "_" for c in label).strip("_")[:80]
+        path = os.path.join(
+            self.directory, f"{time.strftime('%Y%m%dT%H%M%S')}-{int(elapsed * 1000)}ms-{name}.folded"
+        )
+        lines = [
+            f"# {label}",
+            f"# duration_ms={elapsed * 1000:.1f} samples={len(stacks)} interval_ms={self.interval * 1000:g}",
+        ]
+        if phases:
+            lines.append("# phases " + " ".join(f"{phase}={seconds * 1000:.1f}ms" for phase, seconds in phases.items()))
+        lines.extend(f"{stack} {count}" for stack, count in Counter(stacks).most_common())
+        try:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+            self.profiles_written += 1
+            self._prune()
+        except OSError as e:
+            self.write_errors += 1
+            print(f"Slow request profile not written ({path}): {e}")
+
+    def _prune(self) -> None:
+        """Keep only the newest max_files profiles."""
+        profiles = sorted(
+            (entry for entry in os.scandir(self.directory) if entry.name.endswith(".folded")),
+            key=lambda entry: entry.stat().st_mtime,
+        )
+        for entry in profiles[:max(0, len(profiles) - self.max_files)]:
+            os.remove(entry.path)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "directory": self.directory if self.enabled else None,
+            "threshold_seconds": self.threshold,
+            "interval_seconds": self.interval,
+            "profiles_written": self.profiles_written,
+            "write_errors": self.write_errors,
+        }
+
+
+class LoopLagMonitor:
+    """Measures event-loop scheduling lag and logs the stack of blocking work."""
+
+    def __init__(self, interval: float = 0.1, threshold: float = 0.1,
+                 on_lag: Optional[Callable[[float], None]] = None):
+        self.enabled = interval > 0
+        self.interval = interval
+        self.threshold = threshold
+        self.on_lag = on_lag
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.stalls = 0
+        self.blocking_reports = 0
+        self._beat = 0.0
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def start(self) -> None:
+        """Start monitoring the running event loop; call from the loop thread."""
+        if not self.enabled or self._task is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._beat = time.perf_counter()
+        self._stop.clear()
+        self._task = asyncio.ensure_future(self._run())
+        self._watchdog = threading.Thread(target=self._watch, name="ecolens-loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._stop.set()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self._watchdog.join(timeout=1)
+        self._watchdog = None
+
+    async def _run(self) -> None:
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.perf_counter()
+            self._beat = now
+            lag = max(0.0, now - expected)
+            self.last_lag = lag
+            self.max_lag = max(self.max_lag, lag)
+            if self.on_lag is not None:
+                self.on_lag(lag)
+            if lag >= self.threshold:
+                self.stalls += 1
+                print(f"Event loop lag {lag * 1000:.0f} ms (threshold {self.threshold * 1000:.0f} ms)")
+
+    def _watch(self) -> None:
+        reported_beat = None
+        while not self._stop.wait(self.threshold / 2):
+            beat = self._beat
+            if beat == reported_beat or time.perf_counter() - beat < self.interval + self.threshold:
+                continue
+            reported_beat = beat
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            self.blocking_reports += 1
+            print(f"Event loop blocked for over {self.threshold * 1000:.0f} ms in:\n{_format_stack(frame)}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "interval_seconds": self.interval,
+            "threshold_seconds": self.threshold,
+            "last_lag_seconds": round(self.last_lag, 6),
+            "max_lag_seconds": round(self.max_lag, 6),
+            "stalls": self.stalls,
+            "blocking_reports": self.blocking_reports,
+        }
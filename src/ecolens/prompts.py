@@ -0,0 +1,96 @@
+"""Prompts for the lifecycle analysis.
+
+The default "split" variant sends all instructions as a system message that
+is identical for every product, followed by a one-line user message naming
+the product. Upstream prompt caching matches on the longest identical
+prefix, but only from 1024 tokens on; the instructions are about 380 tokens,
+so they are not cached today and the layout saves nothing yet. The "legacy"
+variant reproduces the original single user message, with the product name
+interpolated near the top, so the two can be compared.
+
+Story modes trade story length for latency and cost: "full" asks for the
+five-part lifecycle story, "short" for a few brief paragraphs under a much
+smaller token budget.
+"""
+
+from functools import lru_cache
+from typing import Dict, List
+
+PROMPT_VARIANTS = ("split", "legacy")
+
+# Default max_tokens per story mode
+STORY_MAX_TOKENS = {"full": 2000, "short": 700}
+
+# The streaming prompt asks for plain-text paragraphs first and the metrics last,
+# so paragraphs can be forwarded to the browser while the completion is generated
+STREAM_METRICS_MARKER = "METRICS:"
+
+ROLE = "You are an expert environmental scientist with deep knowledge of lifecycle assessment."
+
+STORY_INSTRUCTIONS = {
+    "full": """Write a comprehensive lifecycle story that includes:
+
+1. Raw Materials: Describe where the materials come from and their environmental extraction impact
+2. Production: Detail the manufacturing process and energy/water requirements
+3. Transportation: Explain the supply chain and distribution environmental costs
+4. Usage: Describe how people use it and any ongoing environmental impact
+5. Disposal: Detail what happens when it's thrown away and waste management""",
+    "short": """Write a concise lifecycle story of three or four short paragraphs (about 200 words in total) covering:
+
+1. Raw Materials and Production: where the materials come from and how it is made
+2. Transportation and Usage: how it reaches people and how they use it
+3. Disposal: what happens when it's thrown away""",
+}
+
+METRIC_GUIDANCE = """IMPORTANT: Use REALISTIC, RESEARCH-BASED metrics. Here are typical ranges:
+- Organic produce: 0.1-0.5 kg CO2, 50-300L water, 0.1-1 year landfill, 90-95% recyclable
+- Processed foods: 0.5-2 kg CO2, 300-1000L water, 1-10 years landfill, 70-90% recyclable
+- Plastics: 2-10 kg CO2, 500-2000L water, 50-500 years landfill, 20-60% recyclable
+- Electronics: 10-50 kg CO2, 1000-5000L water, 100-1000 years landfill, 30-70% recyclable
+
+Format your story with clear paragraphs separated by double line breaks. Make it engaging and educational. Focus on the hidden environmental impacts that most people don't see."""
+
+OUTPUT_FORMATS = {
+    "json": """Return ONLY a JSON response with:
+{
+    "story": "Your complete lifecycle story here with proper paragraph breaks",
+    "carbon_footprint_kg": <realistic_number>,
+    "water_usage_liters": <realistic_number>,
+    "landfill_years": <realistic_number>,
+    "recyclability_percent": <realistic_number>
+}""",
+    "stream": f"""Write the story as plain text paragraphs (no JSON, no headings markup). After the story, on its own line, write {STREAM_METRICS_MARKER} followed by a single-line JSON object:
+{{"carbon_footprint_kg": <realistic_number>, "water_usage_liters": <realistic_number>, "landfill_years": <realistic_number>, "recyclability_percent": <realistic_number>}}""",
+}
+
+
+@lru_cache(maxsize=None)
+def system_prompt(output_format: str, story_mode: str) -> str:
+    """Static instructions for the split variant; the product is named in the user message."""
+    return (
+        f"{ROLE} Analyze the environmental impact of the product named by the user.\n\n"
+        f"{STORY_INSTRUCTIONS[story_mode]}\n\n{METRIC_GUIDANCE}\n\n{OUTPUT_FORMATS[output_format]}"
+    )
+
+
+def legacy_prompt(product_name: str, output_format: str, story_mode: str) -> str:
+    """The original single-message prompt, with the product name near the top."""
+    return (
+        f'{ROLE} Analyze the environmental impact of "{product_name}".\n\n'
+        f"{STORY_INSTRUCTIONS[story_mode]}\n\n{METRIC_GUIDANCE}\n\n{OUTPUT_FORMATS[output_format]}"
+    )
+
+
+def build_messages(product_name: str, output_format: str, story_mode: str = "full",
+                   variant: str = "split") -> List[Dict[str, str]]:
+    """Chat messages asking for a lifecycle analysis of product_name.
+
+    ``output_format`` is "json" (structured output) or "stream" (plain-text
+    paragraphs followed by the metrics line).
+    """
+    if variant == "legacy":
+        return [{"role": "user", "content": legacy_prompt(product_name, output_format, story_mode)}]
+    return [
+        {"role": "system", "content": system_prompt(output_format, story_mode)},
+        {"role": "user", "content": f'Product: "{product_name}"'},
+    ]
@@ -0,0 +1,33 @@
+"""Fast JSON responses for EcoLens.
+
+``FastJSONResponse`` encodes with orjson when it is installed and with a
+compact standard-library encoding otherwise. It also accepts content that
+is already serialized (``bytes``) and sends it unchanged, which is how
+memoized analysis payloads skip validation and encoding entirely.
+"""
+
+import json
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # optional speedup
+    orjson = None
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize content to compact UTF-8 JSON."""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse that uses orjson when available and passes pre-serialized bytes through."""
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return dumps(content)
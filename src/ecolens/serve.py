@@ -0,0 +1,66 @@
+"""Production server for EcoLens.
+
+Runs the app under uvicorn with several worker processes:
+
+    python -m ecolens.serve --host 0.0.0.0 --port 8000 --workers 4
+
+Workers share analysis results through the on-disk result cache
+(``ECOLENS_CACHE_PATH``, SQLite in WAL mode) and the job queue database.
+On SIGTERM or Ctrl+C each worker stops accepting connections and waits up
+to ``--graceful-timeout`` seconds for in-flight requests. Sending SIGHUP
+to the supervisor restarts the workers one at a time to pick up new code
+or configuration.
+"""
+
+import argparse
+import os
+from typing import List, Optional
+
+APP = "ecolens.main:app"
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Run the EcoLens API server")
+    parser.add_argument("--host", default=os.getenv("ECOLENS_HOST", "127.0.0.1"),
+                        help="bind address (0.0.0.0 for all interfaces)")
+    parser.add_argument("--port", type=int, default=int(os.getenv("ECOLENS_PORT", os.getenv("PORT", "8000"))))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", "1")),
+                        help="worker processes (0 for one per CPU)")
+    parser.add_argument("--graceful-timeout", type=float,
+                        default=float(os.getenv("ECOLENS_GRACEFUL_TIMEOUT_SECONDS", "30")),
+                        help="seconds to let in-flight requests finish on shutdown")
+    parser.add_argument("--keep-alive", type=int, default=5, help="HTTP keep-alive timeout in seconds")
+    parser.add_argument("--forwarded-allow-ips", default=os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1"),
+                        help="proxies trusted for X-Forwarded-* headers")
+    parser.add_argument("--reload", action="store_true", help="restart on code changes (development, single process)")
+    parser.add_argument("--log-level", default="info")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None):
+    args = build_parser().parse_args(argv)
+    workers = args.workers or os.cpu_count() or 1
+    if args.reload and workers > 1:
+        print("--reload runs a single process; ignoring --workers")
+        workers = 1
+    if workers > 1 and os.getenv("ECOLENS_CACHE_PATH") == "":
+        print("ECOLENS_CACHE_PATH is empty: each worker keeps its own cache and results are not shared")
+
+    import uvicorn
+    print(f"Starting EcoLens API Server on http://{args.host}:{args.port} with {workers} worker(s)...")
+    uvicorn.run(
+        APP,
+        host=args.host,
+        port=args.port,
+        workers=workers,
+        reload=args.reload,
+        timeout_graceful_shutdown=args.graceful_timeout,
+        timeout_keep_alive=args.keep_alive,
+        proxy_headers=True,
+        forwarded_allow_ips=args.forwarded_allow_ips,
+        log_level=args.log_level,
+    )
+
+
+if __name__ == "__main__":
+    main()
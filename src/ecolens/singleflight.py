@@ -0,0 +1,74 @@
+"""Single-flight coalescing of concurrent identical requests.
+
+The first caller for a key owns the underlying call; later callers for the
+same key await the same task and receive the same result or exception.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+
+
+class SingleFlight:
+    """Registry of in-flight calls keyed by a normalized name."""
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._waiters: Dict[str, int] = {}
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run fn once per key at a time; concurrent callers share its outcome.
+
+        Each caller awaits the shared task through a shield, so cancelling one
+        waiter does not cancel the call for the others. The shared task is
+        only cancelled once every waiter has gone away. Exceptions (including
+        cancellation of the shared task itself) propagate to every waiter.
+        """
+        self.calls += 1
+        task = self._inflight.get(key)
+        if task is None:
+            self.executions += 1
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            self._waiters[key] = 0
+            task.add_done_callback(lambda _, key=key, task=task: self._forget(key, task))
+        else:
+            self.coalesced += 1
+
+        self._waiters[key] += 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if task.done() or self._waiters.get(key, 0) > 1:
+                raise
+            # Forget the call before cancelling it, so a caller arriving while the
+            # cancellation is in progress starts a fresh call instead of joining it
+            if self._inflight.get(key) is task:
+                del self._inflight[key]
+                del self._waiters[key]
+            task.cancel()
+            raise
+        finally:
+            if self._inflight.get(key) is task:
+                self._waiters[key] -= 1
+
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        """Remove a finished task from the registry."""
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+            del self._waiters[key]
+        if not task.cancelled():
+            # Mark the exception as retrieved when every waiter has gone away
+            task.exception()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return coalescing counters."""
+        return {
+            "calls": self.calls,
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._inflight),
+            "waiters": sum(self._waiters.values()),
+        }
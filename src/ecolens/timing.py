@@ -0,0 +1,41 @@
+"""Per-request phase timings, reported in the Server-Timing response header.
+
+The HTTP middleware opens a timing scope for each request. Code on the
+request's path (including tasks it starts, which inherit the context)
+adds phase durations with ``record_phase``; analysis stages do so through
+``metrics.stage``. Outside a request, for example in job workers,
+recording is a no-op.
+"""
+
+import re
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+_phases: ContextVar[Optional[Dict[str, float]]] = ContextVar("ecolens_request_phases", default=None)
+
+_TOKEN_RE = re.compile(r"[^A-Za-z0-9_.-]")
+
+
+def start_request() -> Dict[str, float]:
+    """Open a timing scope for the current request and return its phase -> seconds dict."""
+    phases: Dict[str, float] = {}
+    _phases.set(phases)
+    return phases
+
+
+def record_phase(name: str, seconds: float) -> None:
+    """Add seconds to a phase of the current request; repeated phases accumulate."""
+    phases = _phases.get()
+    if phases is not None:
+        phases[name] = phases.get(name, 0.0) + seconds
+
+
+def current_phases() -> Optional[Dict[str, float]]:
+    return _phases.get()
+
+
+def server_timing_header(phases: Dict[str, float], total: float) -> str:
+    """Format phases plus the total as a Server-Timing header value (durations in milliseconds)."""
+    metrics = [f"{_TOKEN_RE.sub('_', name)};dur={seconds * 1000:.1f}" for name, seconds in phases.items()]
+    metrics.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(metrics)
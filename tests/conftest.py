@@ -0,0 +1,96 @@
+"""Shared fixtures: an isolated ecolens.main and a fake OpenAI upstream served through httpx.MockTransport."""
+
+import json
+import os
+import tempfile
+
+import pytest
+
+# ecolens.main reads its configuration at import; keep the tests away from the shared temp-dir state
+_STATE_DIR = tempfile.mkdtemp(prefix="ecolens-tests-")
+os.environ.update({
+    "OPENAI_API_KEY": "sk-test",
+    "ECOLENS_CACHE_PATH": os.path.join(_STATE_DIR, "cache.sqlite3"),
+    "ECOLENS_ANALYTICS_PATH": os.path.join(_STATE_DIR, "analytics"),
+    "ECOLENS_JOBS_PATH": os.path.join(_STATE_DIR, "jobs.sqlite3"),
+    "ECOLENS_JOBS_WORKERS": "0",
+    "ECOLENS_POPULARITY_SNAPSHOT_PATH": "",
+    "ECOLENS_PREFETCH_TOP_N": "0",
+})
+
+ANALYSIS = {
+    "story": "Raw materials emit 2 kg CO2.\n\nProduction uses 300 liters of water.\n\nIt lasts 5 years in landfill.",
+    "carbon_footprint_kg": 2.0,
+    "water_usage_liters": 300,
+    "landfill_years": 5,
+    "recyclability_percent": 70,
+}
+
+
+class FakeUpstream:
+    """OpenAI chat completions API double; set ``status`` to fail calls, ``content`` to change answers."""
+
+    def __init__(self):
+        self.calls = []
+        self.status = 200
+        self.content = json.dumps(ANALYSIS)
+
+    def __call__(self, request):
+        import httpx
+
+        body = json.loads(request.content)
+        self.calls.append(body)
+        if self.status != 200:
+            # retry-after-ms keeps the SDK's own retries of 429/5xx short
+            return httpx.Response(self.status, headers={"retry-after-ms": "1"},
+                                  json={"error": {"message": "upstream failed", "type": "server_error"}})
+        if body.get("stream"):
+            return httpx.Response(200, headers={"content-type": "text/event-stream"},
+                                  content=self._stream(body).encode("utf-8"))
+        return httpx.Response(200, json={
+            "id": "chatcmpl-test", "object": "chat.completion", "created": 0, "model": body["model"],
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": self.content}}],
+            "usage": {"prompt_tokens": 400, "completion_tokens": 200, "total_tokens": 600},
+        })
+
+    def _stream(self, body):
+        """The streaming prompt's format: story paragraphs, then the METRICS: line (if any), in small chunks."""
+        from ecolens.prompts import STREAM_METRICS_MARKER
+
+        analysis = json.loads(self.content)
+        metrics = {key: value for key, value in analysis.items() if key != "story"}
+        text = analysis["story"]
+        if metrics:
+            text += f"\n\n{STREAM_METRICS_MARKER} {json.dumps(metrics)}"
+        chunks = [text[i:i + 16] for i in range(0, len(text), 16)]
+        events = [
+            {"id": "chatcmpl-test", "object": "chat.completion.chunk", "created": 0, "model": body["model"],
+             "choices": [{"index": 0, "delta": {"content": chunk}, "finish_reason": None}]}
+            for chunk in chunks
+        ]
+        return "".join(f"data: {json.dumps(event)}\n\n" for event in events) + "data: [DONE]\n\n"
+
+
+@pytest.fixture
+def upstream():
+    return FakeUpstream()
+
+
+@pytest.fixture
+def main(monkeypatch, upstream):
+    """ecolens.main with an empty cache, fresh breaker, admission and coalescing, and the fake upstream."""
+    import httpx
+
+    import ecolens.main as main
+    from ecolens.admission import AdmissionController
+    from ecolens.breaker import CircuitBreaker
+    from ecolens.client import OpenAIClientManager
+    from ecolens.singleflight import SingleFlight
+
+    main.result_cache.clear()
+    monkeypatch.setattr(main, "openai_clients", OpenAIClientManager(transport=httpx.MockTransport(upstream)))
+    monkeypatch.setattr(main, "upstream_breaker", CircuitBreaker())
+    monkeypatch.setattr(main, "analysis_admission", AdmissionController())
+    monkeypatch.setattr(main, "inflight_analyses", SingleFlight())
+    return main
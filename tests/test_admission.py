@@ -0,0 +1,137 @@
+"""Tests for ecolens.admission: two-lane queue, queue deadline and load shedding."""
+
+import asyncio
+
+import pytest
+
+from ecolens.admission import BULK, INTERACTIVE, AdmissionController, AdmissionRejected, parse_priority
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+async def settle():
+    """Let queued acquire() calls reach their waiting point."""
+    for _ in range(3):
+        await asyncio.sleep(0)
+
+
+def test_interactive_waiters_are_admitted_before_bulk():
+    async def scenario():
+        admission = AdmissionController(max_concurrent=1, max_queue=10, queue_timeout=5)
+        holder = await admission.acquire(INTERACTIVE)
+        order = []
+
+        async def wait(name, priority):
+            ticket = await admission.acquire(priority)
+            order.append(name)
+            ticket.release()
+
+        waiters = [asyncio.ensure_future(wait("bulk-1", BULK))]
+        await settle()
+        waiters.append(asyncio.ensure_future(wait("bulk-2", BULK)))
+        await settle()
+        waiters.append(asyncio.ensure_future(wait("interactive", INTERACTIVE)))
+        await settle()
+        holder.release()
+        await asyncio.gather(*waiters)
+        return order, admission
+
+    order, admission = run(scenario())
+    assert order == ["interactive", "bulk-1", "bulk-2"]
+    assert admission.active == 0
+
+
+def test_release_wakes_the_next_waiter():
+    async def scenario():
+        admission = AdmissionController(max_concurrent=1, max_queue=10, queue_timeout=5)
+        holder = await admission.acquire(BULK)
+        waiter = asyncio.ensure_future(admission.acquire(BULK))
+        await settle()
+        assert not waiter.done() and admission.queued == 1
+        holder.release()
+        ticket = await asyncio.wait_for(waiter, timeout=1)
+        active_while_held = admission.active
+        ticket.release()
+        # Releasing twice does not free a second slot
+        ticket.release()
+        return active_while_held, admission.active
+
+    assert run(scenario()) == (1, 0)
+
+
+def test_full_queue_rejects_with_429():
+    async def scenario():
+        admission = AdmissionController(max_concurrent=1, max_queue=1, queue_timeout=5)
+        await admission.acquire(BULK)
+        queued = asyncio.ensure_future(admission.acquire(BULK))
+        await settle()
+        with pytest.raises(AdmissionRejected) as rejected:
+            await admission.acquire(BULK)
+        queued.cancel()
+        return rejected.value, admission
+
+    rejected, admission = run(scenario())
+    assert (rejected.reason, rejected.status_code) == ("queue_full", 429)
+    assert rejected.retry_after >= 1
+    assert admission.rejected["queue_full"] == 1
+
+
+def test_interactive_request_sheds_the_newest_bulk_waiter():
+    async def scenario():
+        admission = AdmissionController(max_concurrent=1, max_queue=2, queue_timeout=5)
+        holder = await admission.acquire(BULK)
+        oldest = asyncio.ensure_future(admission.acquire(BULK))
+        await settle()
+        newest = asyncio.ensure_future(admission.acquire(BULK))
+        await settle()
+        interactive = asyncio.ensure_future(admission.acquire(INTERACTIVE))
+        await settle()
+        with pytest.raises(AdmissionRejected) as shed:
+            await newest
+        holder.release()
+        (await asyncio.wait_for(interactive, timeout=1)).release()
+        (await asyncio.wait_for(oldest, timeout=1)).release()
+        return shed.value, admission
+
+    shed, admission = run(scenario())
+    assert (shed.reason, shed.status_code) == ("shed", 503)
+    assert admission.active == 0 and admission.queued == 0
+
+
+def test_waiting_past_the_queue_timeout_gives_up_with_503():
+    async def scenario():
+        admission = AdmissionController(max_concurrent=1, max_queue=10, queue_timeout=0.05)
+        holder = await admission.acquire(BULK)
+        with pytest.raises(AdmissionRejected) as timed_out:
+            await admission.acquire(INTERACTIVE)
+        queued_after = admission.queued
+        holder.release()
+        return timed_out.value, queued_after, admission
+
+    timed_out, queued_after, admission = run(scenario())
+    assert (timed_out.reason, timed_out.status_code) == ("queue_timeout", 503)
+    assert queued_after == 0
+    assert admission.active == 0
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    async def scenario():
+        admission = AdmissionController(max_concurrent=1, max_queue=10, queue_timeout=5)
+        holder = await admission.acquire(BULK)
+        waiter = asyncio.ensure_future(admission.acquire(BULK))
+        await settle()
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        queued_after = admission.queued
+        holder.release()
+        return queued_after, admission.active
+
+    assert run(scenario()) == (0, 0)
+
+
+def test_parse_priority():
+    assert parse_priority(" Interactive ") == INTERACTIVE
+    assert parse_priority("urgent") == BULK
+    assert parse_priority(None, INTERACTIVE) == INTERACTIVE
@@ -0,0 +1,23 @@
+"""Tests for POST /api/analyze-items: validation of item names, de-duplication and input order."""
+
+import pytest
+from fastapi.testclient import TestClient
+
+
+@pytest.mark.parametrize("item_names", [["apple", ""], ["   "], ["apple", "\t\n"]])
+def test_blank_names_are_rejected_without_calling_upstream(main, upstream, item_names):
+    client = TestClient(main.app)
+    for path in ("/api/analyze-items", "/api/jobs"):
+        response = client.post(path, json={"item_names": item_names})
+        assert response.status_code == 422
+    assert upstream.calls == []
+
+
+def test_names_are_trimmed_and_analyzed_once_in_input_order(main, upstream):
+    response = TestClient(main.app).post("/api/analyze-items", json={"item_names": [" glass jar ", "paper cup", "Glass Jars"]})
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [result["item_name"] for result in results] == ["glass jar", "paper cup", "Glass Jars"]
+    assert [result["status"] for result in results] == ["success"] * 3
+    assert response.json()["summary"]["unique"] == 2
+    assert len(upstream.calls) == 2
@@ -0,0 +1,140 @@
+"""Tests for ecolens.breaker: state transitions on an injected clock, the half-open probe, failure kinds."""
+
+import pytest
+
+from ecolens.breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError, classify_failure
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+def make_breaker(clock, **overrides):
+    options = dict(failure_threshold=0.5, min_calls=4, window_seconds=30.0,
+                   max_consecutive_failures=3, open_seconds=15.0, clock=clock)
+    options.update(overrides)
+    return CircuitBreaker(**options)
+
+
+def fail(breaker, kind="error"):
+    breaker.before_call()
+    breaker.record_failure(kind)
+
+
+def succeed(breaker):
+    breaker.before_call()
+    breaker.record_success()
+
+
+def test_closed_open_half_open_closed(clock):
+    breaker = make_breaker(clock)
+    for _ in range(3):
+        fail(breaker)
+    assert breaker.state == OPEN and breaker.times_opened == 1
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    assert breaker.stats()["retry_in_seconds"] == 15.0
+
+    clock.now += 14.9
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    clock.now += 0.1
+    breaker.before_call()
+    assert breaker.state == HALF_OPEN
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.stats()["window_calls"] == 0 and breaker.rejected == 2
+
+
+def test_failed_probe_reopens(clock):
+    breaker = make_breaker(clock)
+    for _ in range(3):
+        fail(breaker)
+    clock.now += 15
+    fail(breaker, "timeout")
+    assert breaker.state == OPEN and breaker.times_opened == 2
+    assert breaker.opened_at == clock.now
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_half_open_lets_a_single_probe_through(clock):
+    breaker = make_breaker(clock)
+    for _ in range(3):
+        fail(breaker)
+    clock.now += 15
+    breaker.before_call()
+    with pytest.raises(CircuitOpenError, match="already probing"):
+        breaker.before_call()
+    # A probe that ended without an outcome frees the slot for the next one
+    breaker.release()
+    breaker.before_call()
+    assert breaker.state == HALF_OPEN
+    breaker.record_success()
+    assert breaker.state == CLOSED
+
+
+def test_failure_rate_opens_only_after_min_calls(clock):
+    breaker = make_breaker(clock)
+    for outcome in (fail, succeed, fail):
+        outcome(breaker)
+    assert breaker.state == CLOSED  # 2 of 3 failed, under min_calls
+    succeed(breaker)
+    assert breaker.state == CLOSED  # the rate is only checked when a failure is recorded
+    fail(breaker)
+    assert breaker.state == OPEN  # 3 of 5
+
+
+def test_old_outcomes_leave_the_window(clock):
+    breaker = make_breaker(clock)
+    fail(breaker)
+    succeed(breaker)
+    fail(breaker)
+    clock.now += 31
+    succeed(breaker)
+    fail(breaker)
+    assert breaker.state == CLOSED
+    assert breaker.stats()["window_calls"] == 2
+
+
+def test_disabled_breaker_only_counts_failures(clock):
+    breaker = make_breaker(clock, enabled=False)
+    for _ in range(10):
+        fail(breaker, "rate_limit")
+    assert breaker.state == CLOSED
+    assert breaker.failures == {"rate_limit": 10}
+
+
+class APITimeoutError(Exception):
+    pass
+
+
+class RateLimitError(Exception):
+    pass
+
+
+class APIStatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+
+
+@pytest.mark.parametrize("error, kind", [
+    (TimeoutError(), "timeout"),
+    (APITimeoutError(), "timeout"),
+    (RateLimitError(), "rate_limit"),
+    (APIStatusError(429), "rate_limit"),
+    (APIStatusError(500), "error"),
+    (ValueError("bad json"), "error"),
+])
+def test_classify_failure(error, kind):
+    assert classify_failure(error) == kind
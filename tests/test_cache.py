@@ -0,0 +1,61 @@
+"""Tests for ecolens.cache.ResultCache when another process holds the store's write lock."""
+
+import sqlite3
+import time
+
+import pytest
+
+from ecolens.cache import ResultCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ResultCache(path=str(tmp_path / "cache.sqlite3"), busy_timeout=0.05)
+    assert cache.open()
+    return cache
+
+
+@pytest.fixture
+def locked(cache):
+    """Another worker holding the write lock for the duration of the test."""
+    other = sqlite3.connect(cache.path, isolation_level=None)
+    other.execute("BEGIN EXCLUSIVE")
+    yield other
+    other.execute("ROLLBACK")
+    other.close()
+
+
+def test_lookups_do_not_wait_for_a_writer(cache):
+    cache.set("apple", {"story": "s"})
+    cache._entries.clear()
+    with sqlite3.connect(cache.path, isolation_level=None) as other:
+        other.execute("BEGIN EXCLUSIVE")
+        started = time.perf_counter()
+        assert cache.get("apple") == {"story": "s"}
+        assert cache.expires_in("apple") > 0
+        assert time.perf_counter() - started < 0.5
+        other.execute("ROLLBACK")
+
+
+def test_write_gives_up_after_busy_timeout(cache, locked):
+    started = time.perf_counter()
+    cache.set("apple", {"story": "s"})
+    assert time.perf_counter() - started < 1.0
+    # Still served by this process from memory
+    assert cache.get("apple") == {"story": "s"}
+
+
+def test_invalidation_reports_a_busy_store(cache, locked):
+    cache.set("apple", {"story": "s"})
+    with pytest.raises(sqlite3.Error):
+        cache.invalidate("apple")
+    assert "apple" not in cache._entries
+    with pytest.raises(sqlite3.Error):
+        cache.clear()
+
+
+def test_invalidation_reaches_the_disk_tier(cache):
+    cache.set("apple", {"story": "s"})
+    assert cache.invalidate("apple")
+    cache._entries.clear()
+    assert cache.get("apple") is None
@@ -0,0 +1,70 @@
+"""Tests for ecolens.catalog lookups, including the near misses that must not skip the model."""
+
+import pytest
+
+from ecolens.catalog import Catalog, covers_words, write_catalog
+
+# The thresholds main.py uses by default for model-replacing and degraded lookups
+CATALOG_THRESHOLD = 0.8
+DEGRADED_CATALOG_THRESHOLD = 0.75
+
+NAMES = ["plastic bag", "plastic water bottle", "banana", "aluminum can", "cotton t-shirt"]
+
+
+@pytest.fixture(scope="module")
+def catalog(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("catalog"))
+    write_catalog(path, [
+        {"item_name": name, "story": f"The story of {name}.", "carbon_footprint_kg": 1.0,
+         "water_usage_liters": 100.0, "landfill_years": 10.0, "recyclability": 50.0,
+         "sustainability_score": 6, "environmental_impact_score": 6}
+        for name in NAMES
+    ])
+    return Catalog(path)
+
+
+def matched_name(catalog, query, threshold=CATALOG_THRESHOLD, cover_words=True):
+    match = catalog.lookup(query, threshold, cover_words=cover_words)
+    return match[0]["item_name"] if match else None
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("plastic bag", "plastic bag"),
+    ("Plastic Water Bottles", "plastic water bottle"),  # case and plural fold to an exact match
+    ("bananas!", "banana"),
+    ("plastik water bottle", "plastic water bottle"),  # a typo still covers the word
+    ("aluminium can", "aluminum can"),
+])
+def test_close_names_match(catalog, query, expected):
+    assert matched_name(catalog, query) == expected
+
+
+def test_prefix_of_a_name_does_not_match(catalog):
+    # Exactly at the threshold by trigram similarity, but "bag" is not in the query
+    assert catalog.search("plastic")[1] == pytest.approx(0.8)
+    assert matched_name(catalog, "plastic") is None
+
+
+@pytest.mark.parametrize("query", ["water bottle", "plastic bottle", "bag", "cotton"])
+def test_part_of_a_multi_word_name_does_not_match(catalog, query):
+    assert matched_name(catalog, query) is None
+
+
+def test_different_product_sharing_a_word_does_not_match(catalog):
+    assert matched_name(catalog, "banana bread") is None
+
+
+def test_degraded_lookup_accepts_a_similar_product(catalog):
+    # Degraded answers say which entry they came from, so they do not require every word
+    assert matched_name(catalog, "plastic", DEGRADED_CATALOG_THRESHOLD, cover_words=False) == "plastic bag"
+
+
+def test_unrelated_name_has_no_match(catalog):
+    assert catalog.lookup("zzz", 0.0) is None
+
+
+def test_covers_words():
+    assert covers_words("plastic water bottles", "plastic water bottle")
+    assert covers_words("large plastic bag", "plastic bag")
+    assert not covers_words("plastic", "plastic bag")
+    assert not covers_words("water bottle", "plastic water bottle")
@@ -0,0 +1,72 @@
+"""Tests for fetch_product_analysis through the pooled OpenAI client and an httpx.MockTransport upstream."""
+
+import asyncio
+import json
+
+import pytest
+
+from conftest import ANALYSIS
+
+
+def fetch(main, item_name):
+    return asyncio.run(main.fetch_product_analysis(item_name))
+
+
+def test_successful_analysis_is_scored_from_the_reported_metrics(main, upstream):
+    result = fetch(main, "glass jar")
+    assert result["item_name"] == "glass jar" and result["source"] == "model"
+    assert result["story"] == ANALYSIS["story"]
+    assert (result["carbon_footprint_kg"], result["water_usage_liters"]) == (2.0, 300)
+    assert result["recyclability"] == 70
+    assert 1 <= result["sustainability_score"] <= 10
+
+    request = upstream.calls[0]
+    assert request["model"] == "gpt-4o-mini"
+    assert request["response_format"]["type"] == "json_schema"
+    assert main.upstream_breaker.stats()["window_calls"] == 1
+    assert main.upstream_breaker.failures == {}
+    assert main.openai_clients.in_flight == 0 and main.openai_clients.acquired == 1
+
+
+def test_calls_share_one_pooled_client(main, upstream):
+    async def scenario():
+        await main.fetch_product_analysis("glass jar")
+        client = main.get_openai_client()
+        await main.fetch_product_analysis("paper cup")
+        return client is main.get_openai_client()
+
+    assert asyncio.run(scenario())
+    assert len(upstream.calls) == 2
+
+
+def test_metrics_missing_from_the_answer_are_extracted_from_the_story(main, upstream):
+    upstream.content = json.dumps({"story": "It emits 4 kg CO2 and uses 90 liters water."})
+    result = fetch(main, "tin can")
+    assert (result["carbon_footprint_kg"], result["water_usage_liters"]) == (4.0, 90.0)
+
+
+@pytest.mark.parametrize("status, kind, error", [
+    (429, "rate_limit", "RateLimitError"),
+    (500, "error", "InternalServerError"),
+])
+def test_upstream_failure_is_raised_and_classified(main, upstream, status, kind, error):
+    upstream.status = status
+    with pytest.raises(Exception) as raised:
+        fetch(main, "glass jar")
+    assert type(raised.value).__name__ == error
+    assert main.upstream_breaker.failures == {kind: 1}
+    assert main.openai_clients.in_flight == 0
+
+
+def test_open_breaker_rejects_without_calling_upstream(main, upstream):
+    from ecolens.breaker import CircuitOpenError
+
+    upstream.status = 500
+    for _ in range(main.upstream_breaker.max_consecutive_failures):
+        with pytest.raises(Exception):
+            fetch(main, "glass jar")
+    calls = len(upstream.calls)
+    with pytest.raises(CircuitOpenError):
+        fetch(main, "glass jar")
+    assert len(upstream.calls) == calls
+    assert main.upstream_breaker.rejected == 1
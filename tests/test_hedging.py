@@ -0,0 +1,130 @@
+"""Tests for ecolens.hedging: the hedge delay, the token-bucket budget and cancelling the losing call."""
+
+import asyncio
+
+import pytest
+
+from ecolens.hedging import Hedger
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+class Upstream:
+    """Answers call n after ``delays[n]`` seconds (the last delay repeats) and records cancelled calls."""
+
+    def __init__(self, *delays):
+        self.delays = delays
+        self.started = 0
+        self.cancelled = []
+
+    async def __call__(self):
+        call = self.started
+        self.started += 1
+        try:
+            await asyncio.sleep(self.delays[min(call, len(self.delays) - 1)])
+        except asyncio.CancelledError:
+            self.cancelled.append(call)
+            raise
+        return call
+
+
+def primed(**options):
+    """A hedger whose window already holds one near-zero latency, so it hedges after ``min_delay``."""
+    settings = dict(enabled=True, min_samples=1, min_delay=0.02, burst=10.0)
+    settings.update(options)
+    hedger = Hedger(**settings)
+    run(hedger.run(Upstream(0)))
+    return hedger
+
+
+def test_hedge_delay_is_the_latency_percentile_floored_at_min_delay():
+    hedger = Hedger(percentile=0.9, min_samples=10, min_delay=0.001)
+    assert hedger.hedge_delay() is None
+
+    async def scenario():
+        for delay in [0] * 9 + [0.05]:
+            await hedger.run(Upstream(delay))
+
+    run(scenario())
+    assert 0.05 <= hedger.hedge_delay() < 0.1
+    hedger.min_delay = 0.5
+    assert hedger.hedge_delay() == 0.5
+
+
+def test_disabled_hedger_never_hedges():
+    hedger = Hedger(enabled=False, min_samples=1, min_delay=0.01)
+    upstream = Upstream(0, 0.05)
+    run(hedger.run(upstream))
+    assert run(hedger.run(upstream)) == 1
+    assert upstream.started == 2 and hedger.hedges_issued == 0
+
+
+def test_winning_hedge_cancels_the_primary():
+    hedger = primed()
+    upstream = Upstream(5, 0)
+    assert run(hedger.run(upstream)) == 1
+    assert upstream.cancelled == [0]
+    assert (hedger.hedges_issued, hedger.hedges_won) == (1, 1)
+    # The cancelled primary's elapsed time is kept as a lower bound of its latency
+    assert max(hedger._latencies) >= 0.02
+
+
+def test_winning_primary_cancels_the_hedge():
+    hedger = primed()
+    upstream = Upstream(0.05, 5)
+    assert run(hedger.run(upstream)) == 0
+    assert upstream.cancelled == [1]
+    assert (hedger.hedges_issued, hedger.hedges_won) == (1, 0)
+
+
+def test_failed_call_does_not_win_over_one_in_flight():
+    hedger = primed()
+    calls = []
+
+    async def fn():
+        calls.append(len(calls))
+        if len(calls) == 1:
+            await asyncio.sleep(0.05)
+            return "primary"
+        raise RuntimeError("hedge failed")
+
+    assert run(hedger.run(fn)) == "primary"
+
+
+def test_both_calls_failing_raises_the_first_error():
+    hedger = primed()
+    calls = []
+
+    async def fn():
+        calls.append(len(calls))
+        if len(calls) == 1:
+            await asyncio.sleep(0.05)
+            raise RuntimeError("primary failed")
+        raise RuntimeError("hedge failed")
+
+    with pytest.raises(RuntimeError, match="hedge failed"):
+        run(hedger.run(fn))
+
+
+def test_token_bucket_caps_hedges_at_max_ratio():
+    # One token to start; each call adds half a token and a hedge costs a whole one.
+    # percentile=0 keeps the delay at the primed latency as the slow calls fill the window
+    hedger = primed(max_ratio=0.5, burst=1.0, percentile=0.0)
+
+    async def scenario():
+        for _ in range(6):
+            await hedger.run(Upstream(0.05))
+
+    run(scenario())
+    assert hedger.hedges_issued == 3
+    assert hedger.skipped_budget == 3
+
+
+def test_saturated_upstream_skips_the_hedge():
+    hedger = primed()
+    upstream = Upstream(0.05)
+    assert run(hedger.run(upstream, can_hedge=lambda: False)) == 0
+    assert upstream.started == 1
+    assert (hedger.hedges_issued, hedger.skipped_saturated) == (0, 1)
@@ -0,0 +1,76 @@
+"""Tests for GET /api/items/{item_name}: content ETags, conditional requests and Cache-Control."""
+
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture
+def client(main):
+    with TestClient(main.app) as client:
+        yield client
+
+
+def test_content_etag_is_strong_and_follows_the_body(main):
+    etag = main.content_etag(b'{"a": 1}')
+    assert etag.startswith('"') and etag.endswith('"') and len(etag) == 34
+    assert main.content_etag(b'{"a": 1}') == etag
+    assert main.content_etag(b'{"a": 2}') != etag
+
+
+@pytest.mark.parametrize("if_none_match, matches", [
+    (None, False),
+    ("", False),
+    ('"abc"', True),
+    ('W/"abc"', True),
+    ('"xyz", W/"abc"', True),
+    ("*", True),
+    ('"xyz"', False),
+    ("abc", False),
+])
+def test_etag_matches(main, if_none_match, matches):
+    assert main.etag_matches(if_none_match, '"abc"') is matches
+
+
+def test_matching_if_none_match_gets_304(client, upstream):
+    first = client.get("/api/items/glass jar")
+    assert first.status_code == 200 and first.json()["data"]["item_name"] == "glass jar"
+    etag = first.headers["etag"]
+    assert first.headers["cache-control"].startswith("public, max-age=")
+
+    again = client.get("/api/items/glass jar", headers={"If-None-Match": etag})
+    assert again.status_code == 304 and again.content == b""
+    assert again.headers["etag"] == etag
+    assert again.headers["cache-control"] == first.headers["cache-control"]
+    assert len(upstream.calls) == 1
+
+    other = client.get("/api/items/glass jar", headers={"If-None-Match": '"something-else"'})
+    assert other.status_code == 200 and other.headers["etag"] == etag
+
+
+def test_each_spelling_has_its_own_etag(client, upstream):
+    lower = client.get("/api/items/glass jar")
+    upper = client.get("/api/items/Glass Jars")
+    assert len(upstream.calls) == 1
+    assert lower.headers["etag"] != upper.headers["etag"]
+
+
+def test_degraded_answer_is_not_stored(client, upstream):
+    upstream.status = 500
+    response = client.get("/api/items/rubber duck")
+    assert response.status_code == 200 and response.json()["degraded"]
+    assert response.headers["cache-control"] == "no-store"
+
+
+def test_stale_answer_must_be_revalidated(main, client, upstream, monkeypatch, tmp_path):
+    from ecolens.cache import ResultCache
+
+    # Expired entries are served stale from the disk tier
+    monkeypatch.setattr(main, "result_cache", ResultCache(ttl_seconds=0.05, path=str(tmp_path / "cache.sqlite3")))
+    assert client.get("/api/items/tin can").headers["cache-control"].startswith("public")
+    time.sleep(0.06)
+
+    stale = client.get("/api/items/tin can")
+    assert stale.status_code == 200 and not stale.json()["degraded"]
+    assert stale.headers["cache-control"] == "no-cache"
@@ -0,0 +1,127 @@
+"""Tests for ecolens.jobs: idempotent submits, leases and conditional completion, retries of fallbacks."""
+
+import asyncio
+import time
+
+import pytest
+
+from ecolens.jobs import FAILED, FALLBACK, QUEUED, RUNNING, SUCCESS, IdempotencyConflict, JobStore, JobWorkers
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite3"), lease_seconds=0.05)
+    yield store
+    store.close()
+
+
+def test_resubmitting_with_the_same_key_returns_the_original_job(store):
+    job_id, created = store.enqueue(["apple", "pear"], "key-1")
+    assert created
+    assert store.enqueue(["apple", "pear"], "key-1") == (job_id, False)
+    assert store.get(job_id)["progress"]["total"] == 2
+
+
+def test_reusing_a_key_for_different_items_conflicts(store):
+    store.enqueue(["apple"], "key-1")
+    with pytest.raises(IdempotencyConflict):
+        store.enqueue(["pear"], "key-1")
+
+
+def test_submit_endpoint_answers_conflicts_with_409(main):
+    from fastapi.testclient import TestClient
+
+    client = TestClient(main.app)
+    headers = {"Idempotency-Key": f"key-{time.time()}"}
+    first = client.post("/api/jobs", json={"item_names": ["apple"]}, headers=headers)
+    assert first.status_code == 202 and first.json()["created"]
+    again = client.post("/api/jobs", json={"item_names": ["apple"]}, headers=headers)
+    assert again.status_code == 202
+    assert again.json()["job_id"] == first.json()["job_id"] and not again.json()["created"]
+    assert client.post("/api/jobs", json={"item_names": ["pear"]}, headers=headers).status_code == 409
+
+
+def test_expired_lease_is_claimed_again(store):
+    store.enqueue(["apple"])
+    seq, item_name, attempt = store.claim(max_attempts=3)
+    assert (item_name, attempt) == ("apple", 1)
+    assert store.claim(max_attempts=3) is None  # leased
+    time.sleep(0.06)
+    assert store.claim(max_attempts=3) == (seq, "apple", 2)
+
+
+def test_stale_attempt_cannot_complete_the_item(store):
+    job_id, _ = store.enqueue(["apple"])
+    seq, _, first = store.claim(max_attempts=3)
+    time.sleep(0.06)
+    _, _, second = store.claim(max_attempts=3)
+    assert not store.complete(seq, first, SUCCESS, {"from": "lost worker"})
+    assert not store.retry(seq, first, 0.0)
+    assert store.complete(seq, second, SUCCESS, {"from": "current worker"})
+    item = store.get(job_id)["results"][0]
+    assert (item["status"], item["data"]) == (SUCCESS, {"from": "current worker"})
+
+
+def test_lost_item_fails_once_attempts_are_used_up(store):
+    job_id, _ = store.enqueue(["apple"])
+    store.claim(max_attempts=1)
+    time.sleep(0.06)
+    assert store.claim(max_attempts=1) is None
+    assert store.get(job_id)["results"][0]["status"] == FAILED
+
+
+def test_release_returns_the_item_without_counting_the_attempt(store):
+    job_id, _ = store.enqueue(["apple"])
+    seq, _, attempt = store.claim(max_attempts=3)
+    assert store.get(job_id)["results"][0]["status"] == RUNNING
+    assert store.release(seq, attempt)
+    item = store.get(job_id)["results"][0]
+    assert (item["status"], item["attempts"]) == (QUEUED, 0)
+
+
+def run_workers(store, handler, max_attempts=3):
+    """Drain the store with one worker; return the on_complete calls."""
+    completed = []
+
+    async def scenario():
+        workers = JobWorkers(store, handler, concurrency=1, poll_interval=0.01, max_attempts=max_attempts,
+                             retry_delay=0.0, on_complete=lambda status, data: completed.append((status, data)))
+        workers.start()
+        while any(status in (QUEUED, RUNNING) for status in store.counts()):
+            await asyncio.sleep(0.01)
+        await workers.stop()
+
+    asyncio.run(scenario())
+    return completed
+
+
+def test_fallback_is_retried_and_reported_once(store):
+    outcomes = iter([(FALLBACK, {"n": 1}), (FALLBACK, {"n": 2}), (SUCCESS, {"n": 3})])
+
+    async def handler(item_name):
+        return next(outcomes)
+
+    job_id, _ = store.enqueue(["apple"])
+    assert run_workers(store, handler) == [(SUCCESS, {"n": 3})]
+    item = store.get(job_id)["results"][0]
+    assert (item["status"], item["attempts"], item["data"]) == (SUCCESS, 3, {"n": 3})
+
+
+def test_last_fallback_is_final_after_max_attempts(store):
+    async def handler(item_name):
+        return FALLBACK, {"item_name": item_name}
+
+    job_id, _ = store.enqueue(["apple"])
+    assert run_workers(store, handler, max_attempts=2) == [(FALLBACK, {"item_name": "apple"})]
+    item = store.get(job_id)["results"][0]
+    assert (item["status"], item["attempts"]) == (FALLBACK, 2)
+
+
+def test_handler_errors_are_retried_then_recorded(store):
+    async def handler(item_name):
+        raise RuntimeError("boom")
+
+    job_id, _ = store.enqueue(["apple"])
+    assert run_workers(store, handler, max_attempts=2) == []
+    item = store.get(job_id)["results"][0]
+    assert (item["status"], item["attempts"], item["error"]) == (FAILED, 2, "boom")
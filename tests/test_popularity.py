@@ -0,0 +1,218 @@
+"""Tests for ecolens.popularity: forward-decay ranking, snapshots, and refreshes with their backoff."""
+
+import asyncio
+import json
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from conftest import ANALYSIS
+from ecolens.popularity import PopularityTracker, PopularRefresher
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+def test_recent_requests_outrank_older_ones(clock):
+    tracker = PopularityTracker(half_life_seconds=10, clock=clock)
+    for _ in range(4):
+        tracker.record("apple", "apple")
+    clock.now += 30  # three half-lives: 4 requests now count as 0.5
+    tracker.record("pear", "Pears")
+    assert tracker.score("apple") == pytest.approx(0.5)
+    assert [(key, name) for key, name, _ in tracker.top(2)] == [("pear", "Pears"), ("apple", "apple")]
+
+    clock.now += 10
+    assert tracker.score("pear") == pytest.approx(0.5)
+    assert tracker.score("apple") == pytest.approx(0.25)
+    assert tracker.score("plum") == 0.0
+
+
+def test_counts_survive_rebasing_the_decay_origin(clock):
+    tracker = PopularityTracker(half_life_seconds=1, clock=clock)
+    tracker.record("apple", "apple")
+    clock.now += 1000  # far past the largest exponent a weight may reach
+    tracker.record("pear", "pear")
+    tracker.record("pear", "pear")
+    assert tracker.score("pear") == pytest.approx(2.0)
+    assert tracker.score("apple") == pytest.approx(0.0)
+    assert tracker.top(1)[0][0] == "pear"
+
+
+def test_least_popular_names_are_pruned(clock):
+    tracker = PopularityTracker(max_items=10, clock=clock)
+    for i in range(10):
+        for _ in range(i + 1):
+            tracker.record(f"item {i}", f"item {i}")
+    tracker.record("newcomer", "newcomer")
+    assert len(tracker) == 10
+    assert "item 0" not in tracker and "item 9" in tracker
+
+
+def test_snapshot_is_decayed_for_the_time_it_was_saved(clock, tmp_path):
+    path = str(tmp_path / "popularity.json")
+    tracker = PopularityTracker(half_life_seconds=10, clock=clock)
+    for _ in range(4):
+        tracker.record("apple", "Apples")
+    tracker.save(path)
+
+    clock.now += 10
+    restored = PopularityTracker(half_life_seconds=10, clock=clock)
+    assert restored.load(path) == 1
+    assert restored.score("apple") == pytest.approx(2.0)
+    assert restored.top(1)[0][1] == "Apples"
+    assert restored.requests == 0
+
+
+class Rejected(Exception):
+    """Stands in for CircuitOpenError: the refresh was refused without trying the item."""
+
+
+def make_refresher(clock, tracker, outcomes, **options):
+    """A refresher whose refresh raises or returns the next of outcomes; calls are recorded."""
+    calls = []
+
+    async def refresh(key, item_name):
+        calls.append(key)
+        outcome = outcomes.pop(0) if outcomes else None
+        if isinstance(outcome, BaseException):
+            raise outcome
+
+    settings = dict(expires_in=lambda key: None, refresh=refresh, failure_backoff=10.0, max_failures=3,
+                    item_failure=lambda e: not isinstance(e, Rejected), clock=clock)
+    settings.update(options)
+    return PopularRefresher(tracker, **settings), calls
+
+
+def test_failed_refreshes_back_off_then_forget_the_item(clock):
+    tracker = PopularityTracker(clock=clock)
+    tracker.record("apple", "apple")
+    refresher, calls = make_refresher(clock, tracker, [RuntimeError("down")] * 3)
+
+    async def scenario():
+        assert await refresher.refresh_due() == 0
+        assert await refresher.refresh_due() == 0  # backing off for 10 s
+        clock.now += 10
+        await refresher.refresh_due()
+        clock.now += 19  # the backoff doubled to 20 s
+        await refresher.refresh_due()
+        clock.now += 1
+        await refresher.refresh_due()
+
+    asyncio.run(scenario())
+    assert calls == ["apple"] * 3
+    assert "apple" not in tracker
+    assert (refresher.failed, refresher.forgotten) == (3, 1)
+
+
+def test_rejected_refresh_neither_backs_off_nor_forgets(clock):
+    tracker = PopularityTracker(clock=clock)
+    tracker.record("apple", "apple")
+    refresher, calls = make_refresher(clock, tracker, [Rejected()] * 5)
+
+    async def scenario():
+        for _ in range(5):
+            await refresher.refresh_due()
+        return await refresher.refresh_due()
+
+    assert asyncio.run(scenario()) == 1
+    assert calls == ["apple"] * 6
+    assert "apple" in tracker
+    assert (refresher.skipped, refresher.failed, refresher.forgotten) == (5, 0, 0)
+    assert refresher.stats()["backing_off"] == 0
+
+
+def test_refresh_due_skips_unpopular_and_fresh_items(clock):
+    tracker = PopularityTracker(clock=clock)
+    for _ in range(3):
+        tracker.record("apple", "apple")
+    tracker.record("pear", "pear")
+    tracker.record("plum", "plum")
+    tracker.record("plum", "plum")
+    expires_in = {"apple": None, "pear": None, "plum": 7200.0}
+    refresher, calls = make_refresher(clock, tracker, [], expires_in=expires_in.get, min_score=2.0)
+
+    assert asyncio.run(refresher.refresh_due()) == 1
+    assert calls == ["apple"]
+    assert refresher.refreshed["popular"] == 1
+
+
+def test_one_pending_refresh_per_key(clock):
+    tracker = PopularityTracker(clock=clock)
+    refresher, calls = make_refresher(clock, tracker, [])
+
+    async def scenario():
+        refresher.refresh_soon("apple", "apple")
+        refresher.refresh_soon("apple", "Apples")
+        await asyncio.gather(*refresher._pending.values())
+
+    asyncio.run(scenario())
+    assert calls == ["apple"]
+    assert refresher.refreshed["stale"] == 1 and not refresher._pending
+
+
+@pytest.fixture
+def stale_main(main, monkeypatch, tmp_path):
+    """ecolens.main with results that expire after 300 ms but are served stale from disk for a day."""
+    from ecolens.cache import ResultCache
+
+    monkeypatch.setattr(main, "result_cache", ResultCache(ttl_seconds=0.3, path=str(tmp_path / "cache.sqlite3")))
+    return main
+
+
+def wait_for_refreshes(main):
+    deadline = time.time() + 5
+    while main.popular_refresher._pending and time.time() < deadline:
+        time.sleep(0.01)
+
+
+def test_stale_answer_is_served_once_then_refreshed(stale_main, upstream):
+    main = stale_main
+    upstream.content = json.dumps({**ANALYSIS, "carbon_footprint_kg": 3.5})
+    with TestClient(main.app) as client:
+        client.post("/api/analyze-item", json={"item_name": "tin can"})
+        upstream.content = json.dumps({**ANALYSIS, "carbon_footprint_kg": 1.5})
+        time.sleep(0.31)
+
+        stale = client.get("/api/items/tin can")
+        assert stale.headers["cache-control"] == "no-cache"
+        assert stale.json()["data"]["carbon_footprint_kg"] == 3.5
+        wait_for_refreshes(main)
+        assert len(upstream.calls) == 2
+
+        fresh = client.get("/api/items/tin can")
+        assert fresh.headers["cache-control"].startswith("public")
+        assert fresh.json()["data"]["carbon_footprint_kg"] == 1.5
+        assert len(upstream.calls) == 2
+
+
+def test_open_breaker_does_not_count_against_the_item(stale_main, upstream):
+    main = stale_main
+    with TestClient(main.app) as client:
+        client.get("/api/items/tin can")
+        time.sleep(0.31)
+        for _ in range(main.upstream_breaker.max_consecutive_failures):
+            main.upstream_breaker.record_failure()
+        assert main.upstream_breaker.state == "open"
+        skipped = main.popular_refresher.skipped
+
+        for _ in range(main.popular_refresher.max_failures + 1):
+            stale = client.get("/api/items/tin can")
+            assert stale.headers["cache-control"] == "no-cache"
+            wait_for_refreshes(main)
+
+        assert main.popular_refresher.skipped == skipped + main.popular_refresher.max_failures + 1
+        assert "tin can" in main.popularity
+        assert not main.popular_refresher._backing_off("tin can")
+        assert len(upstream.calls) == 1
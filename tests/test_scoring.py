@@ -0,0 +1,230 @@
+"""Tests for ecolens.scoring against the original if/elif ladders."""
+
+import itertools
+import math
+import random
+
+import numpy as np
+import pytest
+
+from ecolens.scoring import (
+    ENVIRONMENTAL_IMPACT_SCALE,
+    ENVIRONMENTAL_IMPACT_TABLES,
+    SUSTAINABILITY_BONUS_LIMITS,
+    SUSTAINABILITY_PENALTY_LIMITS,
+    SUSTAINABILITY_TABLES,
+    environmental_impact_score,
+    lookup,
+    lookup_value,
+    score_environmental_impact,
+    score_sustainability,
+    sustainability_score,
+)
+
+METRICS = ("carbon_footprint_kg", "water_usage_liters", "landfill_years", "recyclability")
+
+
+# The ladders as they were in main.py before the table-driven engine, frozen as the reference
+
+def reference_sustainability_score(carbon_footprint, water_usage, landfill_years, recyclability):
+    if carbon_footprint <= 0.1: carbon_score = 10
+    elif carbon_footprint <= 0.3: carbon_score = 9
+    elif carbon_footprint <= 0.8: carbon_score = 8
+    elif carbon_footprint <= 2.0: carbon_score = 7
+    elif carbon_footprint <= 5.0: carbon_score = 6
+    elif carbon_footprint <= 10.0: carbon_score = 5
+    elif carbon_footprint <= 20.0: carbon_score = 4
+    elif carbon_footprint <= 50.0: carbon_score = 3
+    else: carbon_score = 2
+
+    if water_usage <= 50: water_score = 10
+    elif water_usage <= 150: water_score = 9
+    elif water_usage <= 300: water_score = 8
+    elif water_usage <= 600: water_score = 7
+    elif water_usage <= 1200: water_score = 6
+    elif water_usage <= 3000: water_score = 5
+    elif water_usage <= 8000: water_score = 4
+    else: water_score = 3
+
+    if landfill_years <= 0.1: landfill_score = 10
+    elif landfill_years <= 0.5: landfill_score = 9
+    elif landfill_years <= 2: landfill_score = 8
+    elif landfill_years <= 10: landfill_score = 7
+    elif landfill_years <= 50: landfill_score = 6
+    elif landfill_years <= 200: landfill_score = 5
+    elif landfill_years <= 500: landfill_score = 4
+    else: landfill_score = 3
+
+    if recyclability >= 90: recycle_score = 10
+    elif recyclability >= 80: recycle_score = 9
+    elif recyclability >= 70: recycle_score = 8
+    elif recyclability >= 60: recycle_score = 7
+    elif recyclability >= 50: recycle_score = 6
+    elif recyclability >= 40: recycle_score = 5
+    elif recyclability >= 30: recycle_score = 4
+    elif recyclability >= 20: recycle_score = 3
+    else: recycle_score = 2
+
+    weighted_score = (
+        carbon_score * 0.35 +
+        water_score * 0.25 +
+        landfill_score * 0.25 +
+        recycle_score * 0.15
+    )
+    if carbon_footprint <= 0.3 and water_usage <= 200 and landfill_years <= 1:
+        weighted_score += 0.5
+    if carbon_footprint > 50 or water_usage > 10000 or landfill_years > 1000:
+        weighted_score *= 0.8
+    return max(1, min(10, round(weighted_score)))
+
+
+def reference_environmental_impact_score(carbon_footprint, water_usage, landfill_years, recyclability):
+    base_score = 5.0
+
+    if carbon_footprint <= 0.1: carbon_impact = 2.5
+    elif carbon_footprint <= 0.3: carbon_impact = 2.0
+    elif carbon_footprint <= 0.8: carbon_impact = 1.5
+    elif carbon_footprint <= 2.0: carbon_impact = 1.0
+    elif carbon_footprint <= 5.0: carbon_impact = 0.0
+    elif carbon_footprint <= 10.0: carbon_impact = -1.0
+    elif carbon_footprint <= 20.0: carbon_impact = -2.0
+    elif carbon_footprint <= 50.0: carbon_impact = -3.0
+    else: carbon_impact = -4.0
+
+    if water_usage <= 50: water_impact = 1.5
+    elif water_usage <= 150: water_impact = 1.0
+    elif water_usage <= 300: water_impact = 0.5
+    elif water_usage <= 600: water_impact = 0.0
+    elif water_usage <= 1200: water_impact = -0.5
+    elif water_usage <= 3000: water_impact = -1.0
+    elif water_usage <= 8000: water_impact = -1.5
+    else: water_impact = -2.0
+
+    if landfill_years <= 0.1: landfill_impact = 1.0
+    elif landfill_years <= 0.5: landfill_impact = 0.5
+    elif landfill_years <= 2: landfill_impact = 0.0
+    elif landfill_years <= 10: landfill_impact = -0.5
+    elif landfill_years <= 50: landfill_impact = -1.0
+    elif landfill_years <= 200: landfill_impact = -1.5
+    elif landfill_years <= 500: landfill_impact = -2.0
+    else: landfill_impact = -2.5
+
+    if recyclability >= 90: recycle_impact = 1.0
+    elif recyclability >= 80: recycle_impact = 0.8
+    elif recyclability >= 70: recycle_impact = 0.5
+    elif recyclability >= 60: recycle_impact = 0.2
+    elif recyclability >= 50: recycle_impact = 0.0
+    elif recyclability >= 40: recycle_impact = -0.2
+    elif recyclability >= 30: recycle_impact = -0.5
+    elif recyclability >= 20: recycle_impact = -0.8
+    else: recycle_impact = -1.0
+
+    total_impact = base_score + (carbon_impact * 0.4) + (water_impact * 0.25) + (landfill_impact * 0.25) + (recycle_impact * 0.1)
+
+    if total_impact >= 8.5: return 10
+    elif total_impact >= 7.5: return 9
+    elif total_impact >= 6.5: return 8
+    elif total_impact >= 5.5: return 7
+    elif total_impact >= 4.5: return 6
+    elif total_impact >= 3.5: return 5
+    elif total_impact >= 2.5: return 4
+    elif total_impact >= 1.5: return 3
+    elif total_impact >= 0.5: return 2
+    else: return 1
+
+
+def boundary_values(metric):
+    """Every threshold of a metric, one ulp either side of it, and the non-finite values."""
+    thresholds = set(SUSTAINABILITY_TABLES[metric].edges) | set(ENVIRONMENTAL_IMPACT_TABLES[metric].edges)
+    if metric != "recyclability":
+        index = METRICS.index(metric)
+        thresholds |= {SUSTAINABILITY_BONUS_LIMITS[index], SUSTAINABILITY_PENALTY_LIMITS[index]}
+    values = [0.0, -1.0, math.nan, math.inf, -math.inf]
+    for threshold in sorted(thresholds):
+        values += [math.nextafter(threshold, -math.inf), float(threshold), math.nextafter(threshold, math.inf)]
+    return values
+
+
+# Baselines for the metrics that are held still: excellent, typical, and past every penalty limit
+BASELINES = [(0.05, 40.0, 0.05, 95.0), (3.0, 700.0, 20.0, 55.0), (80.0, 20000.0, 2000.0, 5.0)]
+
+
+def boundary_cases():
+    cases = []
+    for index, metric in enumerate(METRICS):
+        for value, baseline in itertools.product(boundary_values(metric), BASELINES):
+            case = list(baseline)
+            case[index] = value
+            cases.append(tuple(case))
+    return cases
+
+
+def random_cases(count=20000, seed=1234):
+    """Log-uniform metrics over their realistic ranges and beyond, mixed with boundary values."""
+    rng = random.Random(seed)
+    ranges = {
+        "carbon_footprint_kg": (1e-3, 1e3),
+        "water_usage_liters": (1e-1, 1e5),
+        "landfill_years": (1e-3, 1e4),
+    }
+    boundaries = {metric: boundary_values(metric) for metric in METRICS}
+    cases = []
+    for _ in range(count):
+        case = []
+        for metric in METRICS:
+            if rng.random() < 0.2:
+                case.append(rng.choice(boundaries[metric]))
+            elif metric == "recyclability":
+                case.append(rng.uniform(-5.0, 105.0))
+            else:
+                low, high = ranges[metric]
+                case.append(math.exp(rng.uniform(math.log(low), math.log(high))))
+        cases.append(tuple(case))
+    return cases
+
+
+CASES = {"boundaries": boundary_cases(), "random": random_cases()}
+
+
+@pytest.mark.parametrize("cases", CASES.values(), ids=list(CASES))
+def test_scalar_scores_match_the_original_ladders(cases):
+    for case in cases:
+        assert sustainability_score(*case) == reference_sustainability_score(*case), case
+        assert environmental_impact_score(*case) == reference_environmental_impact_score(*case), case
+
+
+@pytest.mark.parametrize("cases", CASES.values(), ids=list(CASES))
+def test_vectorized_scores_match_the_original_ladders(cases):
+    columns = [np.array(column, dtype=np.float64) for column in zip(*cases)]
+    sustainability = score_sustainability(*columns)
+    impact = score_environmental_impact(*columns)
+    assert sustainability.dtype == np.int64 and impact.dtype == np.int64
+    expected_sustainability = np.array([reference_sustainability_score(*case) for case in cases])
+    expected_impact = np.array([reference_environmental_impact_score(*case) for case in cases])
+    mismatches = np.flatnonzero(sustainability != expected_sustainability)
+    assert not mismatches.size, [cases[i] for i in mismatches[:5]]
+    mismatches = np.flatnonzero(impact != expected_impact)
+    assert not mismatches.size, [cases[i] for i in mismatches[:5]]
+
+
+def reference_impact_scale(total_impact):
+    for score, low in zip(range(10, 1, -1), (8.5, 7.5, 6.5, 5.5, 4.5, 3.5, 2.5, 1.5, 0.5)):
+        if total_impact >= low:
+            return score
+    return 1
+
+
+def test_impact_scale_matches_the_original_ladder():
+    # Metric combinations reach only some totals, so check the final scale on its own
+    totals = [math.nan, math.inf, -math.inf]
+    for edge in ENVIRONMENTAL_IMPACT_SCALE.edges:
+        totals += [math.nextafter(edge, -math.inf), edge, math.nextafter(edge, math.inf)]
+    for total in totals:
+        assert lookup_value(ENVIRONMENTAL_IMPACT_SCALE, total) == reference_impact_scale(total), total
+    expected = [reference_impact_scale(total) for total in totals]
+    assert lookup(ENVIRONMENTAL_IMPACT_SCALE, np.array(totals)).tolist() == expected
+
+
+def test_scalar_inputs_to_the_vectorized_scores():
+    assert score_sustainability(0.2, 100, 0.3, 95) == sustainability_score(0.2, 100, 0.3, 95)
+    assert score_environmental_impact(30, 5000, 400, 25) == environmental_impact_score(30, 5000, 400, 25)
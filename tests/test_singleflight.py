@@ -0,0 +1,95 @@
+"""Tests for ecolens.singleflight."""
+
+import asyncio
+
+import pytest
+
+from ecolens.singleflight import SingleFlight
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_concurrent_callers_share_one_call():
+    async def scenario():
+        flight = SingleFlight()
+        calls = 0
+
+        async def fn():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return "result"
+
+        results = await asyncio.gather(*(flight.do("k", fn) for _ in range(5)))
+        return flight, calls, results
+
+    flight, calls, results = run(scenario())
+    assert calls == 1
+    assert results == ["result"] * 5
+    assert flight.stats()["coalesced"] == 4
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_errors_propagate_to_every_waiter():
+    async def scenario():
+        flight = SingleFlight()
+
+        async def fn():
+            await asyncio.sleep(0.01)
+            raise ValueError("upstream failed")
+
+        return flight, await asyncio.gather(*(flight.do("k", fn) for _ in range(3)), return_exceptions=True)
+
+    flight, outcomes = run(scenario())
+    assert all(isinstance(outcome, ValueError) for outcome in outcomes)
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_cancelling_one_waiter_keeps_the_call_for_the_others():
+    async def scenario():
+        flight = SingleFlight()
+        started = asyncio.Event()
+
+        async def fn():
+            started.set()
+            await asyncio.sleep(0.05)
+            return "result"
+
+        first = asyncio.ensure_future(flight.do("k", fn))
+        second = asyncio.ensure_future(flight.do("k", fn))
+        await started.wait()
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert run(scenario()) == "result"
+
+
+def test_caller_after_last_waiter_cancelled_starts_a_fresh_call():
+    async def scenario():
+        flight = SingleFlight()
+        started = asyncio.Event()
+
+        async def slow():
+            started.set()
+            await asyncio.sleep(10)
+
+        async def fast():
+            return "fresh"
+
+        waiter = asyncio.ensure_future(flight.do("k", slow))
+        await started.wait()
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        # The cancelled call may still be unwinding; a new caller must not join it
+        result = await flight.do("k", fast)
+        return flight, result
+
+    flight, result = run(scenario())
+    assert result == "fresh"
+    assert flight.stats()["executions"] == 2
+    assert flight.stats()["in_flight"] == 0
@@ -0,0 +1,36 @@
+"""Tests for how ecolens.main starts: run as a script, and what importing it loads."""
+
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_python(*args, **env_overrides):
+    env = {**os.environ, "PYTHONPATH": os.path.join(ROOT, "src"), **env_overrides}
+    return subprocess.run([sys.executable, *args], cwd=ROOT, env=env, capture_output=True, text=True, timeout=60)
+
+
+def test_running_main_by_path_names_the_module_form():
+    result = run_python(os.path.join("src", "ecolens", "main.py"))
+    assert result.returncode == 1
+    assert "python -m ecolens.main" in result.stderr and "python -m ecolens.serve" in result.stderr
+    assert "ImportError" not in result.stderr
+
+
+def test_importing_main_defers_the_heavy_dependencies(tmp_path):
+    # Cold starts pay for openai, httpx and numpy only when an analysis, catalog lookup or batch needs them
+    probe = ("import json, sys; import ecolens.main; "
+             "print(json.dumps([m for m in ('openai', 'httpx', 'numpy', 'dotenv') if m in sys.modules]))")
+    result = run_python(
+        "-c", probe,
+        VERCEL_ENV="production",
+        ECOLENS_CACHE_PATH=str(tmp_path / "cache.sqlite3"),
+        ECOLENS_ANALYTICS_PATH=str(tmp_path / "analytics"),
+        ECOLENS_JOBS_PATH=str(tmp_path / "jobs.sqlite3"),
+        ECOLENS_POPULARITY_SNAPSHOT_PATH=str(tmp_path / "popularity.json"),
+    )
+    assert result.returncode == 0, result.stderr
+    assert json.loads(result.stdout.strip().splitlines()[-1]) == []
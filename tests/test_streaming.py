@@ -0,0 +1,116 @@
+"""Tests for GET /api/analyze-item/stream: SSE events, the METRICS: marker, caching and admission."""
+
+import json
+import os
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+
+from conftest import ANALYSIS
+
+STREAM = "/api/analyze-item/stream"
+
+
+def read_events(response):
+    """(event, data) pairs of a Server-Sent Events body."""
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = []
+    for message in response.text.split("\n\n"):
+        if message.strip():
+            event, data = message.split("\n", 1)
+            events.append((event.removeprefix("event: "), json.loads(data.removeprefix("data: "))))
+    return events
+
+
+def stream(client, item_name):
+    return read_events(client.get(STREAM, params={"item_name": item_name}))
+
+
+def test_story_streams_as_paragraphs_then_the_scored_result(main, upstream):
+    events = stream(TestClient(main.app), "plastic spoon")
+    paragraphs = [data["text"] for event, data in events if event == "paragraph"]
+    assert paragraphs == ANALYSIS["story"].split("\n\n")
+    assert [event for event, _ in events][-1] == "result"
+
+    result = events[-1][1]
+    assert result["success"] and not result["degraded"]
+    # Metrics come from the METRICS: line, not from guessing at the story text
+    assert result["data"]["source"] == "model"
+    assert result["data"]["carbon_footprint_kg"] == 2.0
+    assert result["data"]["recyclability"] == 70  # the story does not mention it
+    assert "METRICS" not in result["data"]["story"]
+    assert upstream.calls[0]["stream"] is True
+
+
+def test_streamed_result_is_cached(main, upstream):
+    client = TestClient(main.app)
+    first = stream(client, "plastic spoon")
+    cached = main.result_cache.get(main.normalize_item_name("plastic spoon"))
+    assert cached is not None and cached["carbon_footprint_kg"] == 2.0
+
+    second = stream(client, "Plastic spoons")
+    assert len(upstream.calls) == 1
+    assert [event for event, _ in second] == [event for event, _ in first]
+    assert second[-1][1]["data"]["item_name"] == "Plastic spoons"
+    assert second[-1][1]["data"]["carbon_footprint_kg"] == 2.0
+
+
+def test_cached_answers_skip_admission(main, monkeypatch):
+    from ecolens.admission import AdmissionController
+
+    client = TestClient(main.app)
+    stream(client, "plastic spoon")
+    # An admission controller whose slot is taken and whose queue holds nobody
+    full = AdmissionController(max_concurrent=1, max_queue=0)
+    full.active = 1
+    monkeypatch.setattr(main, "analysis_admission", full)
+
+    assert stream(client, "plastic spoon")[-1][1]["success"]
+    response = client.get(STREAM, params={"item_name": "glass jar"})
+    assert response.status_code == 429 and "Retry-After" in response.headers
+
+
+def test_story_without_metrics_marker_is_not_cached(main, upstream):
+    upstream.content = json.dumps({"story": "It is made of steel.\n\nIt lasts 50 years in landfill."})
+    events = stream(TestClient(main.app), "steel fork")
+    assert [event for event, _ in events] == ["paragraph", "paragraph", "result"]
+    assert not events[-1][1]["degraded"]
+    assert main.result_cache.get(main.normalize_item_name("steel fork")) is None
+
+
+def test_upstream_failure_streams_a_degraded_answer(main, upstream):
+    upstream.status = 500
+    events = stream(TestClient(main.app), "rubber duck")
+    result = events[-1][1]
+    assert events[-1][0] == "result" and result["degraded"]
+    assert [event for event, _ in events[:-1]] == ["paragraph"] * (len(events) - 1)
+    assert main.upstream_breaker.failures == {"error": 1}
+    assert main.result_cache.get(main.normalize_item_name("rubber duck")) is None
+
+
+@pytest.fixture
+def stub_openai():
+    benchmarks = os.path.join(os.path.dirname(os.path.dirname(__file__)), "benchmarks")
+    sys.path.insert(0, benchmarks)
+    try:
+        from stub_openai import create_stub_app
+    finally:
+        sys.path.remove(benchmarks)
+    return create_stub_app(seed=7)
+
+
+def test_benchmark_stub_serves_streaming_analyses(main, monkeypatch, stub_openai):
+    import httpx
+
+    from ecolens.client import OpenAIClientManager
+
+    monkeypatch.setattr(main, "openai_clients", OpenAIClientManager(
+        base_url="http://openai-stub/v1", transport=httpx.ASGITransport(app=stub_openai)))
+    events = stream(TestClient(main.app), "paper cup")
+    assert [event for event, _ in events].count("paragraph") == 4
+    result = events[-1][1]
+    assert not result["degraded"] and result["data"]["source"] == "model"
+    assert stub_openai.state.requests == 1
+    assert main.result_cache.get(main.normalize_item_name("paper cup")) is not None